@@ -0,0 +1,63 @@
+"""
+Compares the time and (Python) memory it takes to produce the JSON response for
+a ~5MB inline ReadRecordsResponse.
+
+"dict" is the default: `process_event` returns a dictionary that the Lambda runtime JSON-encodes.
+"bytes" is `response_format="bytes"`: the records are base64-encoded straight into the encoded response.
+
+Usage: python benchmarks/bench_encoding.py
+"""
+
+import json
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from athena.federation.encoding import encode_json
+from athena.federation.models import ReadRecordsResponse
+
+ROWS = 150_000
+
+
+def make_batch() -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict(
+        {
+            "id": pa.array(range(ROWS), type=pa.int64()),
+            "name": [f"name-{n}" for n in range(ROWS)],
+        }
+    )
+
+
+def as_dict(response: ReadRecordsResponse) -> bytes:
+    # What the Lambda runtime does with the returned dictionary
+    return json.dumps(response.as_dict()).encode("utf-8")
+
+
+def as_bytes(response: ReadRecordsResponse) -> bytearray:
+    return encode_json(response.as_dict(lazy_payloads=True))
+
+
+def measure(fn, response: ReadRecordsResponse, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(response)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    encoded = fn(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(encoded)
+
+
+if __name__ == "__main__":
+    batch = make_batch()
+    response = ReadRecordsResponse("bench", batch.schema, batch)
+    print(f"Records: {batch.nbytes / 1024 / 1024:.2f} MB in memory")
+    for name, fn in [("dict", as_dict), ("bytes", as_bytes)]:
+        seconds, peak, size = measure(fn, response)
+        print(
+            f"{name}: {seconds * 1000:.1f} ms, peak Python allocations "
+            f"{peak / 1024 / 1024:.2f} MB ({peak / size:.1f}x the response size)"
+        )
@@ -0,0 +1,76 @@
+"""
+Measures how long it takes to import the Lambda handler, which is part of every cold start.
+
+Runs `python -X importtime` in a fresh interpreter (a few times, keeping the fastest run),
+and fails if the import takes longer than the budget, or if any of the modules that should
+only be loaded on first use were imported - so it can be run as a regression check.
+
+Usage: python benchmarks/bench_import_time.py [--budget-ms 400] [--runs 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict
+
+MODULE = "athena.federation.lambda_handler"
+
+# Only needed once records are read (or spilled)
+LAZY_MODULES = ["pyarrow.compute", "smart_open", "boto3", "cryptography", "pandas"]
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by `module`."""
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+    env = dict(
+        os.environ, PYTHONPATH=os.pathsep.join([src, os.environ.get("PYTHONPATH", "")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=400)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [import_times(MODULE) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[MODULE])
+    total_ms = best[MODULE] / 1000
+
+    print(f"import {MODULE}: {total_ms:.1f}ms (best of {args.runs})")
+    top_level = sorted(
+        ((name, us) for name, us in best.items() if "." not in name),
+        key=lambda item: -item[1],
+    )
+    for name, us in top_level[:8]:
+        print(f"  {name:<24} {us / 1000:8.1f}ms")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in best]
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over the budget of {args.budget_ms:.0f}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Converting nested, JSON-like records (e.g. from `json.loads`) to Arrow: structs, lists of structs
+and maps, with decimals and timestamps as strings.
+
+- "inferred": let Arrow infer the types, then cast - the fallback ColumnConverter used to take
+- "converter": ColumnConverter, which normalizes the values guided by the schema
+- "converter, native values": ColumnConverter given Decimals, datetimes and tuples, for reference
+
+Usage: python benchmarks/bench_nested.py
+"""
+
+import datetime
+import decimal
+import json
+import time
+
+import pyarrow as pa
+
+from athena.federation.converters import build_converters
+
+ROWS = 50_000
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        (
+            "user",
+            pa.struct([("name", pa.string()), ("balance", pa.decimal128(12, 2))]),
+        ),
+        ("created_at", pa.timestamp("ms", tz="UTC")),
+        (
+            "items",
+            pa.list_(
+                pa.struct(
+                    [
+                        ("sku", pa.string()),
+                        ("quantity", pa.int32()),
+                        ("price", pa.decimal128(10, 2)),
+                    ]
+                )
+            ),
+        ),
+        ("attributes", pa.map_(pa.string(), pa.string())),
+    ]
+)
+
+
+def make_json_rows():
+    rows = []
+    for i in range(ROWS):
+        rows.append(
+            {
+                "id": i,
+                "user": {
+                    "name": f"user-{i % 1000}",
+                    "balance": f"{i % 997}.{i % 100:02d}",
+                },
+                "created_at": f"2024-01-{i % 28 + 1:02d}T12:{i % 60:02d}:00Z",
+                "items": [
+                    {"sku": f"sku-{i + n}", "quantity": n + 1, "price": f"{n + 1}.99"}
+                    for n in range(i % 4)
+                ],
+                "attributes": {"source": "web" if i % 2 else "app", "region": "eu"},
+            }
+        )
+    # Round trip, so the payload is exactly what a JSON API would give us
+    return json.loads(json.dumps(rows))
+
+
+def to_native(rows):
+    utc = datetime.timezone.utc
+    return [
+        {
+            "id": row["id"],
+            "user": {
+                "name": row["user"]["name"],
+                "balance": decimal.Decimal(row["user"]["balance"]),
+            },
+            "created_at": datetime.datetime.fromisoformat(
+                row["created_at"][:-1]
+            ).replace(tzinfo=utc),
+            "items": [
+                {**item, "price": decimal.Decimal(item["price"])}
+                for item in row["items"]
+            ],
+            "attributes": list(row["attributes"].items()),
+        }
+        for row in rows
+    ]
+
+
+def columns(rows):
+    return {name: [row[name] for row in rows] for name in SCHEMA.names}
+
+
+def inferred(data):
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(data[name]).cast(SCHEMA.field(name).type, safe=False)
+            for name in SCHEMA.names
+        ],
+        schema=SCHEMA,
+    )
+
+
+def converted(data):
+    # Fresh converters each time, so every run pays for detecting that values need normalizing
+    converters = build_converters(SCHEMA)
+    return pa.RecordBatch.from_arrays(
+        [c.convert(data[c.name]) for c in converters], schema=SCHEMA
+    )
+
+
+def measure(fn, data, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            fn(data)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            return f"failed ({type(e).__name__}: {str(e)[:60]})"
+        best = min(best, time.perf_counter() - start)
+    return f"{best / ROWS * 1e9:,.0f} ns/row"
+
+
+if __name__ == "__main__":
+    json_rows = make_json_rows()
+    json_columns = columns(json_rows)
+    native_columns = columns(to_native(json_rows))
+
+    expected = converted(native_columns)
+    assert converted(json_columns).equals(expected)
+
+    print(f"inferred: {measure(inferred, json_columns)}")
+    print(f"converter: {measure(converted, json_columns)}")
+    print(f"converter, native values: {measure(converted, native_columns)}")
@@ -0,0 +1,74 @@
+"""
+Compares the per-row cost of building an inline ReadRecordsResponse.
+
+"before" is the old path: the buffered batches are round-tripped through an IPC stream,
+converted to a pydict and rebuilt into Arrow arrays before being encoded.
+"after" is the current path: the batches stay columnar from the BatchWriter to the response.
+
+Usage: python benchmarks/bench_read_records.py
+"""
+
+import time
+
+import pyarrow as pa
+
+from athena.federation.batch_writer import BatchWriter
+from athena.federation.models import ReadRecordsResponse
+from athena.federation.utils import AthenaSDKUtils
+
+BATCHES = 10
+
+
+def make_batch(num_columns: int, num_rows: int) -> pa.RecordBatch:
+    columns = {}
+    for i in range(num_columns):
+        if i % 2 == 0:
+            columns[f"c{i}"] = pa.array(range(num_rows), type=pa.int64())
+        else:
+            columns[f"c{i}"] = pa.array([f"value-{n}" for n in range(num_rows)])
+    return pa.RecordBatch.from_pydict(columns)
+
+
+def before(batch: pa.RecordBatch):
+    sink = pa.BufferOutputStream()
+    writer = pa.RecordBatchStreamWriter(sink, batch.schema)
+    for _ in range(BATCHES):
+        writer.write_batch(batch)
+    writer.close()
+    reader = pa.ipc.open_stream(sink.getvalue())
+    table = pa.Table.from_batches([b for b in reader]).combine_chunks()
+    combined = table.to_batches(max_chunksize=None)[0]
+    records = AthenaSDKUtils.encode_pyarrow_records(batch.schema, combined.to_pydict())
+    return ReadRecordsResponse("bench", batch.schema, records).as_dict()
+
+
+def after(batch: pa.RecordBatch):
+    # Large enough that nothing spills
+    writer = BatchWriter({}, batch.schema, max_inline_response_bytes=2**40)
+    for _ in range(BATCHES):
+        writer.write_rows(batch)
+    return ReadRecordsResponse("bench", batch.schema, writer.all_records()).as_dict()
+
+
+def measure(fn, batch: pa.RecordBatch, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return best / (batch.num_rows * BATCHES) * 1e9
+
+
+if __name__ == "__main__":
+    shapes = {
+        "wide (200 columns x 2,000 rows)": (200, 2_000),
+        "long (4 columns x 100,000 rows)": (4, 100_000),
+    }
+    for name, (num_columns, num_rows) in shapes.items():
+        batch = make_batch(num_columns, num_rows)
+        before_ns = measure(before, batch)
+        after_ns = measure(after, batch)
+        print(
+            f"{name}: before {before_ns:,.0f} ns/row, after {after_ns:,.0f} ns/row "
+            f"({before_ns / after_ns:.1f}x)"
+        )
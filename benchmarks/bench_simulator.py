@@ -0,0 +1,23 @@
+"""
+Runs a full simulated query against every table of `SyntheticDataSource`,
+to catch throughput regressions in the BatchWriter and response encoding.
+
+Usage: python benchmarks/bench_simulator.py [table ...]
+"""
+
+import shutil
+import sys
+
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.simulator import QuerySimulator
+
+from synthetic_sources import DATABASE, TABLES, SyntheticDataSource
+
+if __name__ == "__main__":
+    tables = sys.argv[1:] or list(TABLES)
+    handler = AthenaLambdaHandler(SyntheticDataSource(), "local-spill")
+    for table_name in tables:
+        simulator = QuerySimulator(handler)
+        report = simulator.run(DATABASE, table_name)
+        print(f"== {table_name}\n{report}\n")
+        shutil.rmtree(simulator.spill_dir)
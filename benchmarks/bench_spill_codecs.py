@@ -0,0 +1,66 @@
+"""
+Compares the size and throughput of spill blocks with each compression codec,
+with and without encryption, on a wide table of strings.
+
+Throughput is measured on the serialized (uncompressed) size, so codecs can be compared directly.
+Encryption requires the `cryptography` package.
+
+Usage: python benchmarks/bench_spill_codecs.py
+"""
+
+import time
+
+import pyarrow as pa
+
+from athena.federation.spill import (
+    encrypt_block,
+    generate_encryption_key,
+    read_block,
+    serialize_block,
+)
+
+ROWS = 20_000
+COLUMNS = 20
+
+
+def make_block() -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict(
+        {
+            f"c{i}": [f"status-{n % 7}-region-{n % 13}-{i}" for n in range(ROWS)]
+            for i in range(COLUMNS)
+        }
+    )
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    block = make_block()
+    raw_size = block.serialize().size
+    print(
+        f"Block: {ROWS} rows x {COLUMNS} string columns, {raw_size / 1024 / 1024:.2f} MB serialized"
+    )
+    for compression in [None, "lz4", "zstd"]:
+        for key in [None, generate_encryption_key()]:
+
+            def write():
+                data = serialize_block(block, compression)
+                return data if key is None else encrypt_block(data, key)
+
+            data = write()
+            write_seconds = best_of(write)
+            read_seconds = best_of(lambda: read_block(data, block.schema, key))
+            assert read_block(data, block.schema, key).equals(block)
+            print(
+                f"{compression or 'none':>5} {'encrypted' if key else '         '}: "
+                f"{len(data) / raw_size:6.1%} of the size, "
+                f"write {raw_size / write_seconds / 1024 / 1024:7.1f} MB/s, "
+                f"read {raw_size / read_seconds / 1024 / 1024:7.1f} MB/s"
+            )
@@ -0,0 +1,107 @@
+"""
+Synthetic data sources used to benchmark the SDK end to end with `QuerySimulator`.
+
+Records are generated directly as Arrow arrays (except for `*_rows` tables),
+so what's measured is the SDK rather than the data generation.
+"""
+
+from typing import Dict, List, Mapping
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from athena.federation.athena_data_source import AthenaDataSource
+
+DATABASE = "synthetic"
+ROWS_PER_BATCH = 10_000
+
+
+def narrow_schema() -> pa.Schema:
+    return pa.schema(
+        [("id", pa.int64()), ("name", pa.string()), ("score", pa.float64())]
+    )
+
+
+def wide_schema(num_columns: int = 200) -> pa.Schema:
+    return pa.schema(
+        [
+            (f"c{i}", pa.int64() if i % 2 == 0 else pa.string())
+            for i in range(num_columns)
+        ]
+    )
+
+
+def nested_schema() -> pa.Schema:
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("attrs", pa.struct([("kind", pa.string()), ("weight", pa.int64())])),
+            ("tags", pa.list_(pa.string())),
+            ("counts", pa.map_(pa.string(), pa.int64())),
+        ]
+    )
+
+
+# table name: (schema, number of splits, rows per split)
+TABLES = {
+    "narrow_small": (narrow_schema(), 4, 10_000),
+    "narrow_huge": (narrow_schema(), 8, 1_000_000),
+    "wide_small": (wide_schema(), 4, 1_000),
+    "wide_huge": (wide_schema(), 8, 50_000),
+    "nested": (nested_schema(), 4, 100_000),
+    "narrow_rows": (narrow_schema(), 4, 100_000),
+}
+
+
+def column(field: pa.Field, start: int, length: int) -> pa.Array:
+    ids = pa.array(range(start, start + length), type=pa.int64())
+    if field.type == pa.int64():
+        return ids
+    if field.type == pa.float64():
+        return pc.divide(pc.cast(ids, pa.float64()), 7.0)
+    if field.type == pa.string():
+        return pc.binary_join_element_wise(
+            f"{field.name}-", pc.cast(ids, pa.string()), ""
+        )
+    if pa.types.is_struct(field.type):
+        kinds = pa.array(["a", "b", "c", "d"] * (length // 4 + 1))[:length]
+        return pa.StructArray.from_arrays([kinds, ids], fields=list(field.type))
+    if pa.types.is_list(field.type):
+        offsets = pa.array(range(0, 2 * length + 1, 2), type=pa.int32())
+        values = pc.cast(pa.array(range(2 * length), type=pa.int64()), pa.string())
+        return pa.ListArray.from_arrays(offsets, values)
+    if pa.types.is_map(field.type):
+        offsets = pa.array(range(0, 2 * length + 1, 2), type=pa.int32())
+        keys = pa.array(["x", "y"] * length)
+        items = pa.array(range(2 * length), type=pa.int64())
+        return pa.MapArray.from_arrays(offsets, keys, items)
+    raise ValueError(f"Unsupported type {field.type}")
+
+
+class SyntheticDataSource(AthenaDataSource):
+    def databases(self) -> List[str]:
+        return [DATABASE]
+
+    def tables(self, database_name: str) -> List[str]:
+        return list(TABLES)
+
+    def schema(self, database_name: str, table_name: str) -> pa.Schema:
+        return TABLES[table_name][0]
+
+    def splits(self, database_name: str, table_name: str) -> List[Dict]:
+        _, num_splits, _ = TABLES[table_name]
+        return [{"split": str(i)} for i in range(num_splits)]
+
+    def records(self, database_name: str, table_name: str, split: Mapping[str, str]):
+        schema, _, rows_per_split = TABLES[table_name]
+        first = int(split["split"]) * rows_per_split
+        for start in range(first, first + rows_per_split, ROWS_PER_BATCH):
+            length = min(ROWS_PER_BATCH, first + rows_per_split - start)
+            batch = pa.RecordBatch.from_arrays(
+                [column(field, start, length) for field in schema], schema=schema
+            )
+            if table_name.endswith("_rows"):
+                # Exercise the conversion of Python values
+                yield batch.to_pydict()
+            else:
+                yield batch
@@ -37,9 +37,11 @@ class SampleDataSource(AthenaDataSource):
             }
         ]
 
-    def records(self, database: str, table: str, split: Mapping[str,str]) -> Dict[str,List[Any]]:
+    def rows(self, database: str, table: str, split: Mapping[str,str]) -> List[List[Any]]:
         """
         Generate example records
+
+        Rows are batched up into columns for us by the SDK.
         """
         records = [
             [1, "John"],
@@ -50,5 +52,4 @@ class SampleDataSource(AthenaDataSource):
         # Demonstrate how splits work by generating a huge response. :)
         if split.get('action', "") == "spill":
             records = records * 4000
-        # We unfortunately need to transpose the data - we should add a helper for this
-        return dict(zip(self.columns(database, table), list(zip(*records))))
\ No newline at end of file
+        return records
@@ -0,0 +1,131 @@
+import inspect
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Union
+
+import pyarrow as pa
+
+from athena.federation.athena_data_source import RecordsBatch
+from athena.federation.pagination import Page
+from athena.federation.row_batcher import (
+    DEFAULT_BYTES_PER_BATCH,
+    DEFAULT_ROWS_PER_BATCH,
+    RowBatcher,
+    projected_schema,
+)
+from athena.federation.utils import AthenaSDKUtils
+
+
+class AsyncAthenaDataSource(ABC):
+    """
+    AsyncAthenaDataSource is the asyncio version of `AthenaDataSource`.
+
+    All methods are coroutines, and `records` (or `rows`) is an async generator. This is a good fit
+    if your backend is an HTTP API: while one batch of records is being encoded, the SDK
+    is already waiting on the next page from your backend.
+
+    Pass it to `AsyncAthenaLambdaHandler`. See `AthenaDataSource` for what each method should return -
+    they accept the same (optional) keyword arguments.
+    """
+
+    rows_per_batch = DEFAULT_ROWS_PER_BATCH
+    bytes_per_batch = DEFAULT_BYTES_PER_BATCH
+    filter_records = False
+
+    def __init__(self) -> None:
+        self._data_source_type = "athena_python_sdk"
+
+    @property
+    def data_source_type(self):
+        """Get the data source type. Only used for PingRequest and debugging."""
+        return self._data_source_type
+
+    def implements(self, method_name: str) -> bool:
+        """Returns True if this data source provides its own implementation of an optional method."""
+        return getattr(type(self), method_name) is not getattr(
+            AsyncAthenaDataSource, method_name
+        )
+
+    @abstractmethod
+    async def databases(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    async def tables(self, database_name: str) -> Union[Iterable[str], Page]:
+        pass
+
+    async def columns(self, database_name: str, table_name: str) -> List[str]:
+        return []
+
+    async def schema(self, database_name: str, table_name: str) -> pa.Schema:
+        return pa.schema(
+            [
+                (col, pa.string())
+                for col in await self.columns(database_name, table_name)
+            ]
+        )
+
+    async def partition_columns(self, database_name: str, table_name: str) -> List[str]:
+        return []
+
+    async def table_version(self, database_name: str, table_name: str) -> Optional[str]:
+        return None
+
+    async def partitions(
+        self, database_name: str, table_name: str, **kwargs
+    ) -> Optional[RecordsBatch]:
+        return None
+
+    async def splits(
+        self, database_name: str, table_name: str
+    ) -> Union[Iterable[Dict], Page]:
+        return []
+
+    async def records(
+        self, database_name: str, table_name: str, split: Mapping[str, str], **kwargs
+    ) -> AsyncIterator[RecordsBatch]:
+        """
+        Yield batches of records for the given table and split.
+
+        The default implementation batches up the rows from `rows`.
+        """
+        rows_kwargs = AthenaSDKUtils.supported_kwargs(self.rows, **kwargs)
+        batcher = RowBatcher(
+            # If `rows` accepts `columns`, its rows only have those columns
+            projected_schema(
+                await self.schema(database_name, table_name),
+                rows_kwargs.get("columns"),
+            ),
+            rows_per_batch=self.rows_per_batch,
+            bytes_per_batch=self.bytes_per_batch,
+        )
+        rows = self.rows(database_name, table_name, split, **rows_kwargs)
+        if inspect.isawaitable(rows):
+            rows = await rows
+        if hasattr(rows, "__aiter__"):
+            async for row in rows:
+                batch = batcher.append(row)
+                if batch is not None:
+                    yield batch
+        else:
+            for row in rows:
+                batch = batcher.append(row)
+                if batch is not None:
+                    yield batch
+        batch = batcher.flush()
+        if batch is not None:
+            yield batch
+
+    async def rows(
+        self, database_name: str, table_name: str, split: Mapping[str, str]
+    ) -> Union[AsyncIterator[Any], Iterable[Any]]:
+        """
+        Yield (or return) the rows for the given table and split.
+        Only used if you don't override `records`.
+
+        Rows are tuples in the order of the table's schema, or dictionaries. Like `records`, this
+        can optionally accept `columns` and `constraints` keyword arguments. If it accepts `columns`,
+        tuples must have one value per column in `columns`, in that order.
+        """
+        raise NotImplementedError(
+            "Data sources must implement either `records` or `rows`"
+        )
@@ -0,0 +1,192 @@
+import asyncio
+import copy
+import inspect
+import threading
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.async_data_source import AsyncAthenaDataSource
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.utils import AthenaSDKUtils
+
+
+class _BlockingDataSource(AthenaDataSource):
+    """
+    Exposes an `AsyncAthenaDataSource` as a regular, blocking `AthenaDataSource`.
+
+    The handler logic runs on a worker thread and every call to the data source
+    is scheduled back onto the event loop, where the coroutines actually run.
+    """
+
+    def __init__(
+        self, source: AsyncAthenaDataSource, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        super().__init__()
+        self._source = source
+        self._loop = loop
+        self.rows_per_batch = source.rows_per_batch
+        self.bytes_per_batch = source.bytes_per_batch
+        self.filter_records = source.filter_records
+
+    @property
+    def data_source_type(self):
+        return self._source.data_source_type
+
+    def implements(self, method_name: str) -> bool:
+        # Async data sources don't have every optional method, e.g. `subtasks`
+        if not hasattr(AsyncAthenaDataSource, method_name):
+            return False
+        return self._source.implements(method_name)
+
+    def _run(self, coro) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _call(self, method, *args, **kwargs) -> Any:
+        """
+        Call a data source method, resolving coroutines and turning async iterators into regular ones.
+        """
+        result = method(*args, **AthenaSDKUtils.supported_kwargs(method, **kwargs))
+        if inspect.isawaitable(result):
+            result = self._run(result)
+        if hasattr(result, "__aiter__"):
+            result = self._iterate(result)
+        return result
+
+    def _iterate(self, async_iterator) -> Iterator[Any]:
+        """
+        Iterate over an async iterator from a worker thread.
+
+        As soon as an item is handed out, we start fetching the next one on the event loop,
+        so your backend I/O overlaps with whatever we do with the item (e.g. encoding it).
+        """
+        pending = asyncio.run_coroutine_threadsafe(
+            async_iterator.__anext__(), self._loop
+        )
+        try:
+            while True:
+                try:
+                    item = pending.result()
+                except StopAsyncIteration:
+                    pending = None
+                    return
+                pending = asyncio.run_coroutine_threadsafe(
+                    async_iterator.__anext__(), self._loop
+                )
+                yield item
+        finally:
+            # If we stopped early, let the prefetch finish before closing the generator.
+            if hasattr(async_iterator, "aclose"):
+                self._run(self._close(async_iterator, pending))
+
+    @staticmethod
+    async def _close(async_iterator, pending) -> None:
+        if pending is not None:
+            try:
+                await asyncio.wrap_future(pending)
+            except BaseException:
+                pass
+        await async_iterator.aclose()
+
+    def databases(self):
+        return self._call(self._source.databases)
+
+    def tables(self, database_name, **kwargs):
+        return self._call(self._source.tables, database_name, **kwargs)
+
+    def columns(self, database_name, table_name):
+        return self._call(self._source.columns, database_name, table_name)
+
+    def schema(self, database_name, table_name):
+        return self._call(self._source.schema, database_name, table_name)
+
+    def partition_columns(self, database_name, table_name):
+        return self._call(self._source.partition_columns, database_name, table_name)
+
+    def table_version(self, database_name, table_name):
+        return self._call(self._source.table_version, database_name, table_name)
+
+    def partitions(self, database_name, table_name, **kwargs):
+        return self._call(self._source.partitions, database_name, table_name, **kwargs)
+
+    def splits(self, database_name, table_name, **kwargs):
+        return self._call(self._source.splits, database_name, table_name, **kwargs)
+
+    def records(self, database_name, table_name, split, **kwargs):
+        return self._call(
+            self._source.records, database_name, table_name, split, **kwargs
+        )
+
+
+class _LoopThread:
+    """
+    An event loop running forever on a background thread, started on first use.
+
+    Blocking callers (possibly from several threads at once) submit coroutines to it,
+    so they all share the same loop and whatever clients are bound to it.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def run(self, coro) -> Any:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="event-loop", daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+
+class AsyncAthenaLambdaHandler(AthenaLambdaHandler):
+    """
+    AsyncAthenaLambdaHandler serves an `AsyncAthenaDataSource`.
+
+    In an asyncio application, `await handler.process_event_async(event)`.
+    The encoding work runs on a worker thread so it doesn't block the event loop.
+
+    For the (synchronous) Lambda Python runtime, call `process_event` as usual.
+    It runs the request on an event loop that's kept around between warm invocations,
+    so connection pools and other loop-bound clients can be reused. `process_event`
+    can be called from several threads at once; they all share that loop.
+
+    Takes the same options as `AthenaLambdaHandler`.
+    """
+
+    def __init__(
+        self, data_source: AsyncAthenaDataSource, spill_bucket: str, **kwargs
+    ) -> None:
+        super().__init__(data_source, spill_bucket, **kwargs)
+        self._loop_thread = _LoopThread()
+
+    def _blocking_copy(self, loop: asyncio.AbstractEventLoop) -> AthenaLambdaHandler:
+        # Each request gets its own copy of the handler, so concurrent requests don't
+        # overwrite each other's event. Caches and clients are still shared.
+        handler = copy.copy(self)
+        handler.data_source = _BlockingDataSource(self.data_source, loop)
+        return handler
+
+    async def process_event_async(self, event):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, AthenaLambdaHandler.process_event, self._blocking_copy(loop), event
+        )
+
+    def process_event(self, event):
+        return self._loop_thread.run(self.process_event_async(event))
+
+    async def warm_async(
+        self, tables: Optional[Iterable[Tuple[str, str]]] = None
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, AthenaLambdaHandler.warm, self._blocking_copy(loop), tables
+        )
+
+    def warm(self, tables: Optional[Iterable[Tuple[str, str]]] = None) -> None:
+        """
+        See `AthenaLambdaHandler.warm`. This also starts the event loop `process_event` uses.
+        In an asyncio application, `await handler.warm_async(tables)` instead.
+        """
+        self._loop_thread.run(self.warm_async(tables))
@@ -1,8 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Mapping, Union, Generator
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union, Generator
 
 import pyarrow as pa
 
+from athena.federation.pagination import Page
+from athena.federation.utils import AthenaSDKUtils
+from athena.federation.row_batcher import (
+    DEFAULT_BYTES_PER_BATCH,
+    DEFAULT_ROWS_PER_BATCH,
+    RowBatcher,
+    projected_schema,
+)
+
+# A single batch of records - either a dictionary of column name to values,
+# or a columnar object like a `pa.RecordBatch`, `pa.Table` or `pandas.DataFrame`.
+RecordsBatch = Union[Dict[str, List[Any]], pa.RecordBatch, pa.Table]
+
 class AthenaDataSource(ABC):
     """
     AthenaDataCatalog is a class that makes it easy to build a custom data connector for Athena using Python.
@@ -11,6 +24,14 @@ class AthenaDataSource(ABC):
     Once defined, it is then passed to `AthenaLambdaHandler`. That class handles the
     majority of encoding your responses in the format necessary for the Athena SDK.
     """
+    # Batch sizes used when records are provided through `rows`
+    rows_per_batch = DEFAULT_ROWS_PER_BATCH
+    bytes_per_batch = DEFAULT_BYTES_PER_BATCH
+
+    # If your data source can't filter records itself, set this to True and the SDK
+    # will filter the records you return using the query's constraints before sending them to Athena.
+    filter_records = False
+
     def __init__(self) -> None:
         self._data_source_type = "athena_python_sdk"
 
@@ -18,6 +39,10 @@ class AthenaDataSource(ABC):
     def data_source_type(self):
         """Get the data source type. Only used for PingRequest and debugging."""
         return self._data_source_type
+
+    def implements(self, method_name: str) -> bool:
+        """Returns True if this data source provides its own implementation of an optional method."""
+        return getattr(type(self), method_name) is not getattr(AthenaDataSource, method_name)
     
     @abstractmethod
     def databases(self) -> List[str]:
@@ -27,9 +52,14 @@ class AthenaDataSource(ABC):
         pass
 
     @abstractmethod
-    def tables(self, database_name: str) -> List[str]:
+    def tables(self, database_name: str) -> Union[Iterable[str], Page]:
         """
         Return a list of table names in the given database.
+
+        For databases with a lot of tables, you can return a generator instead and the SDK
+        will only consume as many table names as Athena asked for (`pageSize`).
+        If your catalog paginates itself, accept `continuation_token` and `page_size`
+        keyword arguments and return a `Page` of table names instead.
         """
         pass
 
@@ -59,9 +89,41 @@ class AthenaDataSource(ABC):
             [(col, pa.string()) for col in self.columns(database_name, table_name)]
         )
     
-    def splits(self, database_name: str, table_name: str) -> List[Dict]:
+    def partition_columns(self, database_name: str, table_name: str) -> List[str]:
+        """
+        Return the names of the columns the given table is partitioned by.
+
+        Partition columns must also be part of the table's `schema`.
+        If you declare partition columns, you also need to implement `partitions`.
+        """
+        return []
+
+    def table_version(self, database_name: str, table_name: str) -> Optional[str]:
         """
-        Return a list of splits for the given table.
+        Return a value that changes whenever the data in the given table changes,
+        e.g. a snapshot id or last modified timestamp.
+
+        Only used by the `ResultCache`: cached results are tied to the version of the table
+        they were read from, so a new version means they're read again. If you return None
+        (the default), cached results are only invalidated by their TTL.
+        """
+        return None
+
+    def partitions(self, database_name: str, table_name: str, **kwargs) -> Optional[RecordsBatch]:
+        """
+        Return the partitions of the given table, one row per partition and one column
+        per partition column.
+
+        Partitions can be returned as a dictionary of column lists, a `pa.RecordBatch` or a `pa.Table`.
+        The SDK prunes them using the query's constraints, so only matching partitions
+        are passed to `splits`. Your implementation can optionally accept a `constraints`
+        keyword argument if it can prune partitions itself.
+        """
+        return None
+
+    def splits(self, database_name: str, table_name: str) -> Union[Iterable[Dict], Page]:
+        """
+        Return a list (or generator) of splits for the given table.
 
         A split is a dictionary of key-value pairs that are passed to the `records` method
         and can be used to retrieve a subset of the records.
@@ -69,16 +131,91 @@ class AthenaDataSource(ABC):
         Splits are used by Athena to determine how to parallelize the query.
         If your data is small enough (6mb or less) that you don't need to parallelize,
         you can use the default implementation, which generates a single split.
+
+        If your table is partitioned, your implementation can optionally accept a `partitions`
+        keyword argument, a list of dictionaries with the values of each partition that matched the query.
+        If you don't override this method, the SDK generates one split per matching partition,
+        with the partition values as its properties.
+
+        If you have a lot of splits, return a generator - the SDK sends them to Athena in pages,
+        so Athena can start reading records before all splits have been enumerated.
+        If your backend paginates itself, accept a `continuation_token` keyword argument and
+        return a `Page` with the token for the next page instead.
         """
         return []
     
-    @abstractmethod
-    def records(self, database_name: str, table_name: str, split: Mapping[str,str]) -> Union[Dict[str,List[Any]], Generator[Dict[str,List[Any]],None,None]]:
+    def records(self, database_name: str, table_name: str, split: Mapping[str,str], **kwargs) -> Union[RecordsBatch, Generator[RecordsBatch,None,None]]:
         """
         Return a dictionary of records for the given table and split.
 
         The dictionary must have the column names as the keys and column data as a list.
+        If your data is already columnar, you can also return (or yield) any of:
+
+        - a `pa.RecordBatch` or `pa.Table`
+        - a `pandas.DataFrame`
+        - a dictionary of NumPy arrays
+        - any object implementing the Arrow C stream protocol (`__arrow_c_stream__`)
+
+        These are written without converting individual values, and are only cast
+        if their types differ from the requested schema.
 
         Either a single batch of records can be returned or a generator of records.
+
+        If your data is row-oriented, you can implement `rows` instead and the default
+        implementation will batch them up into columns for you.
+
+        Your implementation can optionally accept any of these keyword arguments
+        to push work down into your backend:
+
+        - `columns`: the list of column names the query needs. Other columns can be omitted.
+        - `constraints`: the `Constraints` of the query's `WHERE` clause.
+        - `limit`: the query's `LIMIT`, or None. You only need to return that many (matching) rows -
+          once you have, the SDK stops iterating and closes your generator.
         """
-        pass
+        rows_kwargs = AthenaSDKUtils.supported_kwargs(self.rows, **kwargs)
+        return RowBatcher(
+            # If `rows` accepts `columns`, its rows only have those columns
+            projected_schema(
+                self.schema(database_name, table_name), rows_kwargs.get("columns")
+            ),
+            rows_per_batch=self.rows_per_batch,
+            bytes_per_batch=self.bytes_per_batch,
+        ).batches(self.rows(database_name, table_name, split, **rows_kwargs))
+
+    def subtasks(self, database_name: str, table_name: str, split: Mapping[str,str], **kwargs) -> Optional[List[Any]]:
+        """
+        Optionally divide a split into smaller pieces of work, e.g. key ranges or a list of files.
+
+        If this returns a non-empty list, `records` isn't used for the split. Instead, the SDK
+        calls `subtask_records` for each subtask on a thread (or process) pool and writes
+        the batches they produce as they come in. This lets CPU-bound sources, like ones parsing
+        JSON or CSV, use every core the Lambda function has. See `AthenaLambdaHandler` for
+        how to configure the pool.
+
+        Like `records`, this can optionally accept `columns` and `constraints` keyword arguments.
+        """
+        return None
+
+    def subtask_records(self, database_name: str, table_name: str, split: Mapping[str,str], subtask: Any, **kwargs) -> Union[RecordsBatch, Generator[RecordsBatch,None,None]]:
+        """
+        Return (or yield) the records for a single subtask returned by `subtasks`.
+
+        This is called concurrently, so it must be thread-safe. With a process pool,
+        the data source and subtask must also be picklable.
+        Accepts the same optional keyword arguments as `records`.
+        """
+        raise NotImplementedError("Data sources that implement `subtasks` must implement `subtask_records`")
+
+    def rows(self, database_name: str, table_name: str, split: Mapping[str,str]) -> Iterable[Union[Sequence[Any], Dict[str, Any]]]:
+        """
+        Return (or yield) the rows for the given table and split.
+
+        Each row can be either a tuple with values in the same order as the table's `schema`,
+        or a dictionary of column name to value. Rows are batched by `RowBatcher`, which cuts
+        a batch every `rows_per_batch` rows or roughly `bytes_per_batch` bytes.
+
+        Only used if you don't override `records`. Like `records`, this can optionally
+        accept `columns` and `constraints` keyword arguments. If it accepts `columns`, tuples must
+        have one value per column in `columns`, in that order (dictionaries can have any keys).
+        """
+        raise NotImplementedError("Data sources must implement either `records` or `rows`")
@@ -1,10 +1,47 @@
-from typing import Dict, List
+import json
+import logging
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import pyarrow as pa
-from smart_open import open
+
+from athena.federation.converters import build_converters, cast_column
+from athena.federation.encoding import base64_length
+from athena.federation.instrumentation import count, timed, timer
+from athena.federation.memory import MemoryBudget
+from athena.federation.models import ReadRecordsResponse
+from athena.federation.profiler import ColumnProfiler
+from athena.federation.spill import S3SpillClient, SpillUploader
 
 SPILL_THRESHOLD_BYTES = 5 * 1024 * 1024  # 5MB
 
+# Lambda's limit on the size of a response, which applies to the JSON-encoded ReadRecordsResponse.
+# We leave a little room for anything the runtime might add.
+LAMBDA_RESPONSE_LIMIT_BYTES = 6 * 1024 * 1024
+MAX_INLINE_RESPONSE_BYTES = LAMBDA_RESPONSE_LIMIT_BYTES - 16 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def is_dataframe(data: Any) -> bool:
+    # If pandas hasn't been imported, this can't be a DataFrame - so we don't need to import it either.
+    # Another thread may be importing it (pyarrow does so lazily), and a partially initialized
+    # module may not have DataFrame yet.
+    pd = sys.modules.get("pandas")
+    dataframe = getattr(pd, "DataFrame", None)
+    return dataframe is not None and isinstance(data, dataframe)
+
+
+def is_single_batch(data: Any) -> bool:
+    """
+    Returns True if `data` is a single batch of records rather than an iterable of batches.
+    """
+    return (
+        isinstance(data, (dict, pa.RecordBatch, pa.Table))
+        or is_dataframe(data)
+        or hasattr(data, "__arrow_c_stream__")
+    )
+
 
 class BatchWriter:
     """
@@ -12,49 +49,294 @@ class BatchWriter:
 
     If the Batch gets too big (>6mb), it will automatically get written to S3.
     If not, the data is returned directly to the Lambda function.
+
+    The decision is based on the size of the response Athena would receive: we keep track of
+    the serialized (Arrow IPC) size of the buffered records and predict the size of the
+    base64 and JSON-encoded ReadRecordsResponse. Records are returned inline as long as that
+    stays under `max_inline_response_bytes`.
+
+    Spilling happens incrementally: once we start spilling, blocks of roughly
+    `spill_threshold_bytes` (serialized) are written to `spill.0`, `spill.1`, ...
+    while the data source keeps producing records. That way we only ever hold about
+    one block in memory, regardless of how big the split is.
+
+    Blocks are handed to a `SpillUploader`, which uploads them in the background so
+    record generation overlaps with network I/O.
+
+    Dictionaries of column values are converted using the type of each field in the
+    requested schema - see `ColumnConverter` for the `fast_primitives` and `strict` options.
+
+    If provided, `row_filter` is applied to every batch before it's buffered,
+    and `profiler` observes every batch that is.
+
+    With a `limit`, rows past the first `limit` are dropped, and `full` tells the
+    caller to stop producing records.
+
+    With a `memory` budget, every batch we allocate comes out of its pool, and once the request
+    goes over budget we spill the pending records and wait for the queued uploads to finish
+    before taking more records - so a fast data source can't run the function out of memory.
     """
 
-    def __init__(self, spill_config: Dict, schema: pa.Schema) -> None:
+    def __init__(
+        self,
+        spill_config: Dict,
+        schema: pa.Schema,
+        spill_threshold_bytes: int = SPILL_THRESHOLD_BYTES,
+        uploader: Optional[SpillUploader] = None,
+        fast_primitives: bool = False,
+        strict: bool = False,
+        row_filter: Optional[Callable[[pa.RecordBatch], pa.RecordBatch]] = None,
+        max_inline_response_bytes: int = MAX_INLINE_RESPONSE_BYTES,
+        catalog_name: str = "",
+        profiler: Optional[ColumnProfiler] = None,
+        limit: Optional[int] = None,
+        memory: Optional[MemoryBudget] = None,
+    ) -> None:
         self._spill_config = spill_config
         self._schema = schema
+        self._memory = memory
+        self._memory_pool = memory.pool if memory is not None else None
+        self._warned = False
+        self._converters = build_converters(
+            schema, fast_primitives, strict, self._memory_pool
+        )
+        self._row_filter = row_filter
+        self._profiler = profiler
+        self._limit = limit
+        self._rows = 0
+        self._spill_threshold_bytes = spill_threshold_bytes
+        self._max_inline_response_bytes = max_inline_response_bytes
         self._spilled = False
-        self._sink = pa.BufferOutputStream()
-        self._writer = pa.RecordBatchStreamWriter(self._sink, self._schema)
-        self._batch_size = 0
+        self._pending: List[pa.RecordBatch] = []
+        # Serialized size of the pending records, without the message header.
+        # Every batch has a header, but they'll be combined into a single message.
+        self._pending_bytes = 0
+        self._header_bytes = pa.ipc.get_record_batch_size(self._empty_batch())
+        self._response_overhead = self._measure_response_overhead(catalog_name)
+        self._spill_keys: List[str] = []
+        self._uploader = uploader or SpillUploader(S3SpillClient())
 
     @property
     def spilled(self) -> bool:
         return self._spilled
 
-    def write_rows(self, data: Dict):
-        record_batch = pa.RecordBatch.from_arrays(
-            [pa.array(data[name]) for name in self._schema.names],
-            schema=self._schema,
+    @property
+    def full(self) -> bool:
+        """True once `limit` rows have been written."""
+        return self._limit is not None and self._rows >= self._limit
+
+    @property
+    def pending_ipc_bytes(self) -> int:
+        """The serialized (Arrow IPC) size of the records that haven't been spilled."""
+        return self._header_bytes + self._pending_bytes
+
+    @property
+    def predicted_response_bytes(self) -> int:
+        """The size of the JSON-encoded ReadRecordsResponse if the pending records were returned inline."""
+        # The first 4 bytes of the serialized records aren't sent, see `encode_pyarrow_object`
+        return base64_length(self.pending_ipc_bytes - 4) + self._response_overhead
+
+    def _measure_response_overhead(self, catalog_name: str) -> int:
+        """Everything in a ReadRecordsResponse apart from the base64-encoded records."""
+        empty = self._empty_batch()
+        response = ReadRecordsResponse(catalog_name, self._schema, empty).as_dict()
+        return len(json.dumps(response)) - base64_length(
+            pa.ipc.get_record_batch_size(empty) - 4
         )
-        self._batch_size += record_batch.nbytes
-        self._writer.write_batch(record_batch)
 
-    def _build_spill_uri(self):
-        return (
-            f"s3://{self._spill_config['bucket']}/{self._spill_config['key']}/spill.0"
+    @property
+    def remote_blocks(self) -> List[Dict]:
+        """The S3 spill locations of every block written so far, in order."""
+        return [
+            {
+                "@type": "S3SpillLocation",
+                "bucket": self._spill_config["bucket"],
+                "key": key,
+                "directory": False,
+            }
+            for key in self._spill_keys
+        ]
+
+    def write_rows(self, data: Any):
+        """
+        Write a batch of records.
+
+        `data` can be any of the forms `AthenaDataSource.records` supports - a dictionary of
+        column lists (or NumPy arrays), a `pa.RecordBatch`, a `pa.Table`, a `pandas.DataFrame`,
+        or any object implementing the Arrow C stream protocol (`__arrow_c_stream__`).
+        """
+        if self.full:
+            return
+        batches = timed(self._record_batches(data), "conversion")
+        for record_batch in batches:
+            with timer("conversion"):
+                record_batch = self._conform(record_batch)
+                if self._row_filter is not None:
+                    record_batch = self._row_filter(record_batch)
+            if self._limit is not None:
+                record_batch = record_batch.slice(0, self._limit - self._rows)
+            self._rows += record_batch.num_rows
+            if self._profiler is not None:
+                self._profiler.observe(record_batch)
+            count("rows", record_batch.num_rows)
+            count("bytes", record_batch.nbytes)
+            self._pending.append(record_batch)
+            self._pending_bytes += self._body_bytes(record_batch)
+
+            if (
+                not self._spilled
+                and self.predicted_response_bytes > self._max_inline_response_bytes
+            ):
+                # The estimate can be a bit high (e.g. padding), combine the records to know for sure
+                combined = self._combine(self._pending)
+                self._pending = [combined]
+                self._pending_bytes = self._body_bytes(combined)
+                if self.predicted_response_bytes > self._max_inline_response_bytes:
+                    self._spill_block()
+
+            while (
+                self._spilled and self.pending_ipc_bytes > self._spill_threshold_bytes
+            ):
+                self._spill_block()
+
+            if (
+                self._memory is not None
+                and (self._pending or self._uploader.in_flight)
+                and self._memory.exceeded
+            ):
+                self._relieve_memory_pressure()
+
+            if self.full:
+                # Don't convert (or read) anything we'd drop
+                batches.close()
+                break
+
+    def _record_batches(self, data: Any) -> Iterator[pa.RecordBatch]:
+        if isinstance(data, pa.RecordBatch):
+            yield data
+        elif isinstance(data, pa.Table):
+            yield from data.to_batches()
+        elif is_dataframe(data):
+            yield pa.RecordBatch.from_pandas(
+                data, schema=self._schema, preserve_index=False
+            )
+        elif hasattr(data, "__arrow_c_stream__"):
+            yield from pa.RecordBatchReader.from_stream(data)
+        else:
+            # Columns are converted straight to the requested type, and
+            # NumPy arrays without touching the individual elements.
+            yield pa.RecordBatch.from_arrays(
+                [
+                    converter.convert(data[converter.name])
+                    for converter in self._converters
+                ],
+                schema=self._schema,
+            )
+
+    def _conform(self, record_batch: pa.RecordBatch) -> pa.RecordBatch:
+        """
+        Make sure the batch matches the requested schema, reordering or casting columns if necessary.
+        """
+        if record_batch.schema.equals(self._schema):
+            return record_batch
+        columns = []
+        for field in self._schema:
+            column = record_batch.column(field.name)
+            if column.type != field.type:
+                column = cast_column(column, field, self._memory_pool)
+            columns.append(column)
+        return pa.RecordBatch.from_arrays(columns, schema=self._schema)
+
+    def _body_bytes(self, record_batch: pa.RecordBatch) -> int:
+        return pa.ipc.get_record_batch_size(record_batch) - self._header_bytes
+
+    def _spill_key(self, index: int) -> str:
+        return f"{self._spill_config['key']}/spill.{index}"
+
+    def _spill_block(self):
+        """
+        Queues one block of (at most) `spill_threshold_bytes` from the pending records for upload.
+
+        If the pending records are larger than a block, we slice off just enough rows
+        to fill it and keep the remainder pending for the next block.
+        """
+        combined = self._combine(self._pending)
+        block = combined
+        body_bytes = self._body_bytes(combined)
+        max_body_bytes = self._spill_threshold_bytes - self._header_bytes
+        if body_bytes > max_body_bytes and combined.num_rows > 1:
+            rows_per_block = max(1, combined.num_rows * max_body_bytes // body_bytes)
+            block = combined.slice(0, rows_per_block)
+
+        key = self._spill_key(len(self._spill_keys))
+        self._uploader.submit(self._spill_config["bucket"], key, block)
+        self._spill_keys.append(key)
+        self._spilled = True
+
+        remainder = combined.slice(block.num_rows)
+        if remainder.num_rows > 0:
+            self._pending = [remainder]
+            self._pending_bytes = self._body_bytes(remainder)
+        else:
+            self._pending = []
+            self._pending_bytes = 0
+
+    def _relieve_memory_pressure(self):
+        """
+        Free up what we can: spill the pending records, and block until the uploads are done
+        (which stops us from pulling more records from the data source in the meantime).
+        """
+        count("memory_pressure")
+        if self._pending:
+            self._spill_block()
+            while self._pending:
+                self._spill_block()
+        self._uploader.wait()
+        if self._memory.exceeded and not self._warned:
+            self._warned = True
+            logger.warning(
+                "Arrow memory (%d bytes) is over the budget (%d bytes) even after spilling. "
+                "Consider smaller batches or more memory.",
+                self._memory.used_bytes(),
+                self._memory.limit_bytes,
+            )
+
+    def _combine(self, batches: List[pa.RecordBatch]) -> pa.RecordBatch:
+        if len(batches) == 1:
+            return batches[0]
+        one_chunk_table = pa.Table.from_batches(
+            batches, schema=self._schema
+        ).combine_chunks(memory_pool=self._memory_pool)
+        combined = one_chunk_table.to_batches(max_chunksize=None)
+        if not combined:
+            # No rows at all, but Athena still expects a (empty) batch
+            return self._empty_batch()
+        return combined[0]
+
+    def _empty_batch(self) -> pa.RecordBatch:
+        return pa.RecordBatch.from_arrays(
+            [pa.array([], type=field.type) for field in self._schema],
+            schema=self._schema,
         )
 
     def close(self):
-        print(f"Total bytes: {self._batch_size}")
-        self._writer.close()
-        # For now, if we're over 5mb of data, spill everything to s3.
-        # I don't know how to do this without just serializing the whole thing.
-        # If I use `RecordBatchStreamWriter`, it adds a schema IPC message when it doesn't need it.
-        # Perhaps upgrading Arrow will help, but for now...let's do this.
-        if self._batch_size > SPILL_THRESHOLD_BYTES:
-            self._spilled = True
-            with open(self._build_spill_uri(), "wb") as fout:
-                fout.write(self.all_records().serialize())
-
-    def all_records(self):
-        buf = self._sink.getvalue()
-        reader = pa.ipc.open_stream(buf)
-        record_batches = [b for b in reader]
-        one_chunk_table = pa.Table.from_batches(record_batches).combine_chunks()
-        batches = one_chunk_table.to_batches(max_chunksize=None)
-        return batches[0]
\ No newline at end of file
+        # Once we've started spilling, everything has to go to S3 - Athena
+        # doesn't support mixing inline records with remote blocks.
+        if self._spilled and self._pending:
+            self._spill_block()
+        if self._spilled:
+            count("spilled")
+            self._uploader.wait()
+        if self._memory is not None:
+            self._memory.process_bytes()  # Samples the process high-water mark
+            count("sdk_peak_arrow_bytes", self._memory.sdk_peak_bytes)
+            count("process_peak_arrow_bytes", self._memory.process_peak_bytes)
+
+    def all_records(self) -> pa.RecordBatch:
+        """
+        Returns the buffered (non-spilled) records as a single RecordBatch.
+
+        If only one batch was written it's returned as-is, otherwise the batches
+        are concatenated once into contiguous arrays.
+        """
+        return self._combine(self._pending)
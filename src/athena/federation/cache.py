@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL_SECONDS = 300
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache where entries also expire `ttl` seconds after they're added.
+
+    If `ttl` is None, entries only get evicted when the cache is full.
+    Because Lambda reuses the process between warm invocations, a cache held at module
+    level (or by your handler) lives across requests.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: Optional[float] = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, calling `loader` to populate it on a miss.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(
+        self, predicate: Optional[Callable[[Hashable], bool]] = None
+    ) -> None:
+        """
+        Remove every entry, or only the entries whose key matches `predicate`.
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class MetadataCache(TTLCache):
+    """
+    Caches the results of `AthenaDataSource` metadata calls (databases, tables, schemas, ...)
+    so repeated requests for the same query don't go back to your catalog.
+
+    Keys are tuples of `(kind, database_name, table_name, ...)`.
+    """
+
+    def invalidate_table(
+        self, database_name: Optional[str] = None, table_name: Optional[str] = None
+    ) -> None:
+        """
+        Invalidate everything cached for a database, or a single table in it.
+        With no arguments, the whole cache is invalidated.
+        """
+        if database_name is None:
+            return self.invalidate()
+
+        def matches(key):
+            if len(key) < 2 or key[1] != database_name:
+                return False
+            return table_name is None or (len(key) > 2 and key[2] == table_name)
+
+        self.invalidate(matches)
@@ -0,0 +1,35 @@
+"""
+Helpers shared by the command-line tools, `athena.federation.simulator` and `athena.federation.server`.
+"""
+
+import importlib
+import math
+import sys
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def load_data_source(spec: str):
+    """Instantiate a data source from a `module:ClassName` string."""
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, if we can tell."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
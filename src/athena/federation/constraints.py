@@ -0,0 +1,403 @@
+"""
+Python models for the query constraints Athena sends with TableLayout, Splits and ReadRecords requests.
+
+Athena summarizes the `WHERE` clause of a query into a value set per column:
+
+- `SortedRangeSet`: the column must fall within one of a list of ranges (`x > 5`, `x BETWEEN 1 AND 3`, `x = 7`)
+- `EquatableValueSet`: the column must (or must not) be one of a set of values (`x IN ('a', 'b')`)
+- `AllOrNoneValueSet`: every value (or no value) matches - typically only used for nulls (`x IS NULL`)
+
+Each value set also says whether null values are allowed.
+"""
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+
+from athena.federation.converters import python_array
+from athena.federation.utils import AthenaSDKUtils
+
+logger = logging.getLogger(__name__)
+
+# What we can get comparing a column with constraint values Arrow can't convert to its type
+_COMPARISON_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+
+
+def _is_number(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_integer(data_type)
+        or pa.types.is_floating(data_type)
+        or pa.types.is_decimal(data_type)
+    )
+
+
+def _comparable(values: List[Any], array: pa.Array) -> Tuple[pa.Array, pa.Array]:
+    """
+    Returns `array` and `values` as arrays of the same type, so they can be compared.
+
+    That's the column's type, unless a value doesn't fit it - e.g. a bigint literal compared
+    with an int column, or 2.5 with an integer column. Then numbers are compared in the wider
+    type of the values, where they simply don't match. Anything else raises.
+    """
+    try:
+        return array, python_array(values, array.type)
+    except (*_COMPARISON_ERRORS, OverflowError):
+        wide = pa.array(values)
+        if not (_is_number(array.type) and _is_number(wide.type)):
+            raise
+        return array.cast(wide.type), wide
+
+
+class ValueSet(ABC):
+    def __init__(self, null_allowed: bool) -> None:
+        self.null_allowed = null_allowed
+
+    def contains(self, value: Any) -> bool:
+        """
+        Returns True if the (Python) value satisfies this value set.
+        """
+        if value is None:
+            return self.null_allowed
+        return self._contains(value)
+
+    def mask(self, array: pa.Array) -> pa.Array:
+        """
+        Returns a boolean array that is True for every value in `array` that satisfies this value set.
+        """
+        import pyarrow.compute as pc
+
+        mask = self._mask(array)
+        return pc.if_else(pc.is_null(array), self.null_allowed, mask)
+
+    @abstractmethod
+    def canonical(self) -> List[Any]:
+        """
+        A JSON-serializable form of this value set that's the same for equivalent value sets,
+        whichever order Athena sent the values (or ranges) in.
+        """
+        pass
+
+    @abstractmethod
+    def _contains(self, value: Any) -> bool:
+        pass
+
+    @abstractmethod
+    def _mask(self, array: pa.Array) -> pa.Array:
+        pass
+
+
+class AllOrNoneValueSet(ValueSet):
+    def __init__(self, all: bool, null_allowed: bool) -> None:
+        super().__init__(null_allowed)
+        self.all = all
+
+    def canonical(self) -> List[Any]:
+        return ["all" if self.all else "none", self.null_allowed]
+
+    def _contains(self, value: Any) -> bool:
+        return self.all
+
+    def _mask(self, array: pa.Array) -> pa.Array:
+        return pa.array([self.all] * len(array), type=pa.bool_())
+
+    def __repr__(self) -> str:
+        return f"AllOrNoneValueSet(all={self.all}, null_allowed={self.null_allowed})"
+
+
+class EquatableValueSet(ValueSet):
+    """
+    If `white_list` is True, the column must be one of `values`, otherwise it must _not_ be one of them.
+    """
+
+    def __init__(self, values: List[Any], white_list: bool, null_allowed: bool) -> None:
+        super().__init__(null_allowed)
+        self.values = values
+        self.white_list = white_list
+
+    def canonical(self) -> List[Any]:
+        return [
+            "in" if self.white_list else "not in",
+            self.null_allowed,
+            sorted(self.values, key=_sort_key),
+        ]
+
+    def _contains(self, value: Any) -> bool:
+        return (value in self.values) == self.white_list
+
+    def _mask(self, array: pa.Array) -> pa.Array:
+        import pyarrow.compute as pc
+
+        array, value_set = _comparable(self.values, array)
+        mask = pc.is_in(array, value_set=value_set)
+        return mask if self.white_list else pc.invert(mask)
+
+    def __repr__(self) -> str:
+        return (
+            f"EquatableValueSet(values={self.values!r}, white_list={self.white_list}, "
+            f"null_allowed={self.null_allowed})"
+        )
+
+
+class Range:
+    """
+    A range of values. `low` or `high` are None if the range is unbounded on that side.
+    """
+
+    def __init__(
+        self,
+        low: Any = None,
+        high: Any = None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+    ) -> None:
+        self.low = low
+        self.high = high
+        self.low_inclusive = low_inclusive
+        self.high_inclusive = high_inclusive
+
+    @property
+    def is_single_value(self) -> bool:
+        return (
+            self.low is not None
+            and self.low == self.high
+            and self.low_inclusive
+            and self.high_inclusive
+        )
+
+    def canonical(self) -> List[Any]:
+        return [self.low, self.low_inclusive, self.high, self.high_inclusive]
+
+    def contains(self, value: Any) -> bool:
+        if self.low is not None:
+            if value < self.low or (value == self.low and not self.low_inclusive):
+                return False
+        if self.high is not None:
+            if value > self.high or (value == self.high and not self.high_inclusive):
+                return False
+        return True
+
+    def mask(self, array: pa.Array) -> Optional[pa.Array]:
+        """Returns None if the range is unbounded on both sides."""
+        import pyarrow.compute as pc
+
+        masks = []
+        if self.low is not None:
+            column, low = _comparable([self.low], array)
+            compare = pc.greater_equal if self.low_inclusive else pc.greater
+            masks.append(compare(column, low[0]))
+        if self.high is not None:
+            column, high = _comparable([self.high], array)
+            compare = pc.less_equal if self.high_inclusive else pc.less
+            masks.append(compare(column, high[0]))
+        if not masks:
+            return None
+        return masks[0] if len(masks) == 1 else pc.and_(masks[0], masks[1])
+
+    def __repr__(self) -> str:
+        left = "[" if self.low_inclusive else "("
+        right = "]" if self.high_inclusive else ")"
+        low = "-inf" if self.low is None else repr(self.low)
+        high = "+inf" if self.high is None else repr(self.high)
+        return f"Range{left}{low}, {high}{right}"
+
+
+class SortedRangeSet(ValueSet):
+    """
+    The column must fall within at least one of `ranges`.
+    """
+
+    def __init__(self, ranges: List[Range], null_allowed: bool) -> None:
+        super().__init__(null_allowed)
+        self.ranges = ranges
+
+    def canonical(self) -> List[Any]:
+        ranges = [r.canonical() for r in self.ranges]
+        return ["ranges", self.null_allowed, sorted(ranges, key=_sort_key)]
+
+    def _contains(self, value: Any) -> bool:
+        return any(r.contains(value) for r in self.ranges)
+
+    def _mask(self, array: pa.Array) -> pa.Array:
+        import pyarrow.compute as pc
+
+        mask = None
+        for r in self.ranges:
+            range_mask = r.mask(array)
+            if range_mask is None:
+                # Unbounded - everything matches
+                return pa.array([True] * len(array), type=pa.bool_())
+            mask = range_mask if mask is None else pc.or_(mask, range_mask)
+        if mask is None:
+            return pa.array([False] * len(array), type=pa.bool_())
+        return mask
+
+    def __repr__(self) -> str:
+        return (
+            f"SortedRangeSet(ranges={self.ranges!r}, null_allowed={self.null_allowed})"
+        )
+
+
+class Constraints:
+    """
+    The constraints of a query, keyed by column name.
+
+    Data sources can use these to only read matching rows from their backend.
+    They're only a hint though: Athena still applies the full `WHERE` clause to
+    whatever records are returned.
+
+    `limit` is the query's `LIMIT`, if Athena pushed it down - None otherwise.
+    """
+
+    def __init__(
+        self,
+        summary: Optional[Dict[str, ValueSet]] = None,
+        limit: Optional[int] = None,
+    ) -> None:
+        self.summary = summary or {}
+        self.limit = limit
+
+    @classmethod
+    def from_dict(cls, constraints: Optional[Dict]) -> "Constraints":
+        """
+        Parse the `constraints` object of an Athena request.
+        """
+        if not constraints:
+            return cls()
+        summary = {}
+        for column, value_set in (constraints.get("summary") or {}).items():
+            parsed = _parse_value_set(value_set)
+            # Constraints are only a hint, so we can safely skip anything we don't understand
+            if parsed is not None:
+                summary[column] = parsed
+        # Athena sends -1 for "no limit"
+        limit = constraints.get("limit")
+        if limit is not None and limit < 0:
+            limit = None
+        return cls(summary, limit)
+
+    def canonical(self) -> Dict[str, Any]:
+        """
+        A JSON-serializable form of the constraints, the same for equivalent constraints - e.g. to
+        build a cache key. Unlike the request's constraints object, it doesn't depend on the order of
+        the columns or values, or on how the values were serialized.
+        """
+        return {
+            "summary": {
+                column: value_set.canonical()
+                for column, value_set in sorted(self.summary.items())
+            },
+            "limit": self.limit,
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.summary)
+
+    def __getitem__(self, column: str) -> ValueSet:
+        return self.summary[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.summary
+
+    def get(self, column: str) -> Optional[ValueSet]:
+        return self.summary.get(column)
+
+    def matches(self, row: Dict[str, Any]) -> bool:
+        """
+        Returns True if a row (a dictionary of column name to value) satisfies all the constraints
+        on the columns it contains.
+        """
+        return all(
+            value_set.contains(row[column])
+            for column, value_set in self.summary.items()
+            if column in row
+        )
+
+    def filter(self, record_batch: pa.RecordBatch) -> pa.RecordBatch:
+        """
+        Returns only the rows of `record_batch` that satisfy the constraints,
+        using vectorized `pyarrow.compute` kernels.
+
+        Constraints on columns that aren't in the batch are ignored, and so are constraints
+        with values that can't be compared with the column (e.g. a string with a date column).
+        Values outside the range of a numeric column just don't match.
+        """
+        import pyarrow.compute as pc
+
+        mask = None
+        for column, value_set in self.summary.items():
+            index = record_batch.schema.get_field_index(column)
+            if index < 0:
+                continue
+            try:
+                column_mask = value_set.mask(record_batch.column(index))
+            except _COMPARISON_ERRORS as e:
+                # Athena applies the constraints again anyway
+                logger.warning(
+                    "Not filtering on %s, its constraints don't apply to %s values: %s",
+                    column,
+                    record_batch.schema.field(index).type,
+                    e,
+                )
+                continue
+            mask = column_mask if mask is None else pc.and_(mask, column_mask)
+        if mask is None:
+            return record_batch
+        return record_batch.filter(mask)
+
+    def __repr__(self) -> str:
+        if self.limit is None:
+            return f"Constraints({self.summary!r})"
+        return f"Constraints({self.summary!r}, limit={self.limit})"
+
+
+def _sort_key(value: Any) -> str:
+    # Values of a column all have the same type, but can be None (an unbounded range)
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _decode_block_values(block: Dict) -> List[Any]:
+    """
+    Values in constraints are sent as single-column Arrow blocks.
+    """
+    records = AthenaSDKUtils.decode_pyarrow_records(block["schema"], block["records"])
+    return records.column(0).to_pylist()
+
+
+def _parse_marker_value(marker: Dict) -> Any:
+    if marker.get("nullValue"):
+        return None
+    return _decode_block_values(marker["valueBlock"])[0]
+
+
+def _parse_ranges(ranges: Iterable[Dict]) -> List[Range]:
+    parsed = []
+    for r in ranges:
+        low, high = r["low"], r["high"]
+        parsed.append(
+            Range(
+                low=_parse_marker_value(low),
+                high=_parse_marker_value(high),
+                low_inclusive=low.get("bound") == "EXACTLY",
+                high_inclusive=high.get("bound") == "EXACTLY",
+            )
+        )
+    return parsed
+
+
+def _parse_value_set(value_set: Dict) -> Optional[ValueSet]:
+    value_set_type = value_set.get("@type")
+    null_allowed = value_set.get("nullAllowed", False)
+    if value_set_type == "SortedRangeSet":
+        return SortedRangeSet(_parse_ranges(value_set.get("ranges", [])), null_allowed)
+    if value_set_type == "EquatableValueSet":
+        return EquatableValueSet(
+            _decode_block_values(value_set["valueBlock"]),
+            value_set.get("whiteList", True),
+            null_allowed,
+        )
+    if value_set_type == "AllOrNoneValueSet":
+        return AllOrNoneValueSet(value_set.get("all", True), null_allowed)
+    return None
@@ -0,0 +1,430 @@
+import datetime
+import decimal
+from typing import Any, Callable, List, Optional, Sequence
+
+import pyarrow as pa
+
+# Errors we can get turning a Python value into an Arrow value
+_CONVERSION_ERRORS = (
+    pa.ArrowInvalid,
+    pa.ArrowTypeError,
+    pa.ArrowNotImplementedError,
+    OverflowError,
+    TypeError,
+    ValueError,
+    ArithmeticError,
+    # A struct value that isn't a dict
+    AttributeError,
+)
+
+
+class ColumnConversionError(ValueError):
+    """
+    Raised when a value can't be converted to the type of its column in the requested schema.
+    """
+
+    def __init__(
+        self,
+        column: str,
+        row: Optional[int],
+        value: Any,
+        arrow_type: pa.DataType,
+        reason: str,
+    ) -> None:
+        self.column = column
+        self.row = row
+        self.value = value
+        self.arrow_type = arrow_type
+        location = f"row {row}" if row is not None else "unknown row"
+        super().__init__(
+            f'Column "{column}", {location}: cannot convert {value!r} to {arrow_type}: {reason}'
+        )
+
+
+def integer_range(data_type: pa.DataType):
+    """The smallest and largest values of an integer type."""
+    if pa.types.is_unsigned_integer(data_type):
+        return 0, 2**data_type.bit_width - 1
+    return -(2 ** (data_type.bit_width - 1)), 2 ** (data_type.bit_width - 1) - 1
+
+
+def _to_decimal(value: Any) -> Any:
+    if isinstance(value, str):
+        return decimal.Decimal(value)
+    if isinstance(value, float):
+        # repr is the shortest string that round-trips, so 0.1 becomes 0.1 rather than 0.1000000000000000055...
+        return decimal.Decimal(repr(value))
+    return value
+
+
+def _to_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        # fromisoformat only accepts "Z" from Python 3.11
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def _to_date(value: Any) -> Any:
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+# Python values Arrow won't convert to these types by itself: decimals as strings or floats,
+# timestamps and dates as ISO 8601 strings.
+_LEAF_NORMALIZERS = [
+    (pa.types.is_decimal, _to_decimal),
+    (pa.types.is_timestamp, _to_datetime),
+    (pa.types.is_date, _to_date),
+]
+
+ArrayBuilder = Callable[[Sequence[Any], Optional[pa.MemoryPool]], pa.Array]
+
+
+def python_array(
+    values: Any, data_type: pa.DataType, memory_pool: Optional[pa.MemoryPool] = None
+) -> pa.Array:
+    """
+    `pa.array(values, type=data_type)`, except that lossy values raise.
+
+    Arrow silently truncates floats converting them to an integer type (2.7 becomes 2),
+    so integer columns are inferred (int64, or double if there are floats) and then cast,
+    which checks every value fits.
+    """
+    if not pa.types.is_integer(data_type):
+        return pa.array(values, type=data_type, memory_pool=memory_pool)
+    try:
+        array = pa.array(values, memory_pool=memory_pool)
+    except OverflowError:
+        # Too large for an int64, e.g. in a uint64 column
+        return pa.array(values, type=data_type, memory_pool=memory_pool)
+    if array.type == data_type:
+        return array
+    if not (
+        pa.types.is_integer(array.type)
+        or pa.types.is_floating(array.type)
+        or pa.types.is_null(array.type)
+    ):
+        raise pa.ArrowTypeError(f"Expected integers, got {array.type} values")
+    return array.cast(data_type, memory_pool=memory_pool)
+
+
+def array_builder(data_type: pa.DataType) -> Optional[ArrayBuilder]:
+    """
+    Build a function that converts a list of JSON-like Python values to an array of `data_type`,
+    or return None if `pa.array` can do that by itself.
+
+    The function is built once per field from the schema. Structs, lists and maps are split up
+    into one list of values per child, so leaves are converted a whole column at a time - strings
+    are parsed into decimals and timestamps by an Arrow cast rather than one by one in Python.
+    Maps can be given as dicts or lists of pairs. Integers are checked by `python_array`.
+    """
+    if pa.types.is_integer(data_type):
+        return lambda values, memory_pool: python_array(values, data_type, memory_pool)
+    for is_type, normalize in _LEAF_NORMALIZERS:
+        if is_type(data_type):
+            return _leaf_builder(data_type, normalize)
+    if pa.types.is_struct(data_type):
+        return _struct_builder(data_type)
+    if pa.types.is_map(data_type):
+        return _map_builder(data_type)
+    if pa.types.is_list(data_type):
+        return _list_builder(data_type)
+    return None
+
+
+def _build(
+    builder: Optional[ArrayBuilder],
+    values: Sequence[Any],
+    data_type: pa.DataType,
+    memory_pool: Optional[pa.MemoryPool],
+) -> pa.Array:
+    if builder is None:
+        return python_array(values, data_type, memory_pool)
+    return builder(values, memory_pool)
+
+
+def _leaf_builder(data_type: pa.DataType, normalize: Callable[[Any], Any]):
+    def build_leaf(values, memory_pool):
+        try:
+            return pa.array(values, type=data_type, memory_pool=memory_pool)
+        except _CONVERSION_ERRORS:
+            pass
+        try:
+            # If they're all strings (or floats), Arrow can parse them in one go
+            return pa.array(values, memory_pool=memory_pool).cast(
+                data_type, memory_pool=memory_pool
+            )
+        except _CONVERSION_ERRORS:
+            return pa.array(
+                [None if v is None else normalize(v) for v in values],
+                type=data_type,
+                memory_pool=memory_pool,
+            )
+
+    return build_leaf
+
+
+def _struct_builder(data_type: pa.StructType) -> Optional[ArrayBuilder]:
+    fields = list(data_type)
+    children = [array_builder(field.type) for field in fields]
+    if all(child is None for child in children):
+        return None
+
+    def build_struct(values, memory_pool):
+        nulls = [v is None for v in values]
+        arrays = [
+            _build(
+                child,
+                [None if v is None else v.get(field.name) for v in values],
+                field.type,
+                memory_pool,
+            )
+            for field, child in zip(fields, children)
+        ]
+        return pa.StructArray.from_arrays(
+            arrays,
+            fields=fields,
+            mask=pa.array(nulls, type=pa.bool_()) if any(nulls) else None,
+            memory_pool=memory_pool,
+        )
+
+    return build_struct
+
+
+def _offsets(values: Sequence[Any], flatten: Callable[[Any], None], size) -> pa.Array:
+    """
+    The offsets of a list (or map) array, flattening each value along the way.
+    A null offset makes its slot null.
+    """
+    offsets = []
+    for v in values:
+        if v is None:
+            offsets.append(None)
+        else:
+            offsets.append(size())
+            flatten(v)
+    offsets.append(size())
+    return pa.array(offsets, type=pa.int32())
+
+
+def _list_builder(data_type: pa.ListType) -> Optional[ArrayBuilder]:
+    child = array_builder(data_type.value_type)
+    if child is None:
+        return None
+
+    def build_list(values, memory_pool):
+        flat = []
+        offsets = _offsets(values, flat.extend, flat.__len__)
+        return pa.ListArray.from_arrays(
+            offsets,
+            _build(child, flat, data_type.value_type, memory_pool),
+            type=data_type,
+            pool=memory_pool,
+        )
+
+    return build_list
+
+
+def _map_builder(data_type: pa.MapType) -> Optional[ArrayBuilder]:
+    key_child = array_builder(data_type.key_type)
+    item_child = array_builder(data_type.item_type)
+    if key_child is None and item_child is None:
+        return None
+
+    def build_map(values, memory_pool):
+        keys, items = [], []
+
+        def flatten(value):
+            for key, item in value.items() if isinstance(value, dict) else value:
+                keys.append(key)
+                items.append(item)
+
+        offsets = _offsets(values, flatten, keys.__len__)
+        return pa.MapArray.from_arrays(
+            offsets,
+            _build(key_child, keys, data_type.key_type, memory_pool),
+            _build(item_child, items, data_type.item_type, memory_pool),
+            type=data_type,
+            pool=memory_pool,
+        )
+
+    return build_map
+
+
+def cast_column(
+    column: pa.Array, field: pa.Field, memory_pool: Optional[pa.MemoryPool] = None
+) -> pa.Array:
+    """
+    Cast an Arrow array to the type of `field`, making sure no values are lost.
+
+    Narrowing casts (e.g. int64 -> int32) are checked, and raise a `ColumnConversionError`
+    naming the column and the first value that doesn't fit.
+    """
+    try:
+        return column.cast(field.type, memory_pool=memory_pool)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        import pyarrow.compute as pc
+
+        row = value = None
+        if pa.types.is_integer(field.type) and pa.types.is_integer(column.type):
+            low, high = integer_range(field.type)
+            outside = pc.or_(pc.less(column, low), pc.greater(column, high))
+            row = pc.index(outside, True).as_py()
+            if row >= 0:
+                value = column[row].as_py()
+            else:
+                row = None
+        raise ColumnConversionError(field.name, row, value, field.type, str(e)) from e
+
+
+class ColumnConverter:
+    """
+    Converts a column of Python values to an Arrow array of a field's type.
+
+    The conversion function is picked once per field, so converting a batch
+    doesn't need to re-inspect the schema or infer a type from the values.
+
+    - `fast_primitives` converts integer columns of plain Python ints through NumPy,
+      which avoids Arrow's per-element type checks. Arrow's float and boolean conversion
+      is already about as fast, so those are left alone. Columns with a `None` fall
+      back to the regular path, but other values are not checked (e.g. floats are truncated).
+    - `strict` raises a `ColumnConversionError` naming the offending column and row
+      when a value doesn't fit the type. Otherwise we fall back to Arrow's type
+      inference followed by a cast (e.g. for numbers as strings), which still raises
+      a `ColumnConversionError` if a value is out of range or would be truncated.
+
+    Nested columns (structs, lists and maps) are built straight from Python dicts and lists.
+    Values Arrow doesn't accept as-is - decimals as strings or floats, timestamps and dates as
+    ISO 8601 strings - are converted by a builder compiled from the schema, see `array_builder`.
+
+    Arrays are allocated from `memory_pool` (the default pool if None).
+    """
+
+    def __init__(
+        self,
+        field: pa.Field,
+        fast_primitives: bool = False,
+        strict: bool = False,
+        memory_pool: Optional[pa.MemoryPool] = None,
+    ) -> None:
+        self.field = field
+        self.strict = strict
+        self.memory_pool = memory_pool
+        self._builder = array_builder(field.type)
+        # Set once a batch needed the builder - the next ones most likely will too.
+        # Arrow truncates floats in nested integer fields too, so those always use the builder.
+        self._use_builder = self._builder is not None and _has_integer_leaf(field.type)
+        self._convert = self._typed
+        if fast_primitives and pa.types.is_integer(field.type):
+            self._convert = self._fast_primitive
+
+    @property
+    def name(self) -> str:
+        return self.field.name
+
+    def convert(self, values: Any) -> pa.Array:
+        if isinstance(values, pa.ChunkedArray):
+            values = values.combine_chunks(memory_pool=self.memory_pool)
+        if isinstance(values, pa.Array):
+            array = values
+            if array.type != self.field.type:
+                array = cast_column(array, self.field, self.memory_pool)
+        else:
+            array = self._convert(values)
+        if not self.field.nullable and array.null_count > 0:
+            row = _first_null(array)
+            raise ColumnConversionError(
+                self.name, row, None, self.field.type, "column is not nullable"
+            )
+        return array
+
+    def _typed(self, values: Any) -> pa.Array:
+        try:
+            if self._use_builder:
+                return self._builder(values, self.memory_pool)
+            return python_array(values, self.field.type, self.memory_pool)
+        except _CONVERSION_ERRORS as e:
+            if self._builder is not None and not self._use_builder:
+                # e.g. decimals or timestamps as strings, possibly nested in structs and lists
+                try:
+                    array = self._builder(values, self.memory_pool)
+                    self._use_builder = True
+                    return array
+                except _CONVERSION_ERRORS:
+                    pass
+            if self.strict:
+                raise self._locate_error(values, e) from e
+            try:
+                return cast_column(
+                    pa.array(values, memory_pool=self.memory_pool),
+                    self.field,
+                    self.memory_pool,
+                )
+            except _CONVERSION_ERRORS as cast_error:
+                raise self._locate_error(values, cast_error) from e
+
+    def _fast_primitive(self, values: Any) -> pa.Array:
+        import numpy as np
+
+        if isinstance(values, np.ndarray):
+            return self._typed(values)
+        try:
+            arr = np.fromiter(
+                values, dtype=self.field.type.to_pandas_dtype(), count=len(values)
+            )
+        except (TypeError, ValueError, OverflowError):
+            # Most likely there's a None in there - let Arrow deal with it
+            return self._typed(values)
+        return pa.array(arr, type=self.field.type, memory_pool=self.memory_pool)
+
+    def _locate_error(self, values: Any, error: Exception) -> ColumnConversionError:
+        """Find the first value that can't be converted, so we can tell the user where it is."""
+        for row, value in enumerate(values):
+            try:
+                if self._builder is not None:
+                    self._builder([value], None)
+                else:
+                    python_array([value], self.field.type)
+            except _CONVERSION_ERRORS as e:
+                return ColumnConversionError(
+                    self.name, row, value, self.field.type, str(e)
+                )
+        return ColumnConversionError(self.name, None, None, self.field.type, str(error))
+
+
+def _has_integer_leaf(data_type: pa.DataType) -> bool:
+    if pa.types.is_integer(data_type):
+        return True
+    if pa.types.is_struct(data_type):
+        return any(_has_integer_leaf(field.type) for field in data_type)
+    if pa.types.is_map(data_type):
+        return _has_integer_leaf(data_type.key_type) or _has_integer_leaf(
+            data_type.item_type
+        )
+    if pa.types.is_list(data_type):
+        return _has_integer_leaf(data_type.value_type)
+    return False
+
+
+def _first_null(array: Any) -> Optional[int]:
+    import pyarrow.compute as pc
+
+    row = pc.index(array.is_null(), True).as_py()
+    return row if row >= 0 else None
+
+
+def build_converters(
+    schema: pa.Schema,
+    fast_primitives: bool = False,
+    strict: bool = False,
+    memory_pool: Optional[pa.MemoryPool] = None,
+) -> List[ColumnConverter]:
+    """Precompile a converter for every field in the schema."""
+    return [
+        ColumnConverter(field, fast_primitives, strict, memory_pool) for field in schema
+    ]
@@ -0,0 +1,87 @@
+import binascii
+import json
+from typing import Any, List
+from uuid import uuid4
+
+from athena.federation.instrumentation import timer
+
+# Base64 is encoded in chunks of this many bytes (a multiple of 3, so chunks
+# don't need padding), so we never hold a second full-size copy of the payload.
+CHUNK_SIZE = 3 * 64 * 1024
+
+
+def base64_length(size: int) -> int:
+    """The length of the base64 encoding of `size` bytes."""
+    return (size + 2) // 3 * 4
+
+
+def b64encode_into(data, out, offset: int = 0) -> int:
+    """
+    Base64-encode `data` (any bytes-like object) into `out` (a bytearray or writable memoryview),
+    starting at `offset`. Returns the offset right after the encoded data.
+    """
+    view = memoryview(data).cast("B")
+    out = memoryview(out)
+    for start in range(0, len(view), CHUNK_SIZE):
+        chunk = binascii.b2a_base64(view[start : start + CHUNK_SIZE], newline=False)
+        out[offset : offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return offset
+
+
+class Base64Payload:
+    """
+    A (large) binary value that is base64-encoded when the response is encoded by `encode_json`,
+    straight into the output buffer.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data) -> None:
+        self.data = data
+
+    def __len__(self) -> int:
+        return base64_length(memoryview(self.data).nbytes)
+
+    def __str__(self) -> str:
+        with timer("base64"):
+            return binascii.b2a_base64(self.data, newline=False).decode("ascii")
+
+
+def encode_json(response: Any) -> bytearray:
+    """
+    JSON-encode a response, like the Lambda runtime does with the dictionary returned by your handler.
+
+    `Base64Payload` values are encoded directly into a buffer preallocated for the whole response,
+    instead of being turned into a string first and copied again by `json.dumps`.
+    """
+    payloads: List[Base64Payload] = []
+    marker = f"__payload_{uuid4().hex}_"
+
+    def placeholder(obj):
+        if isinstance(obj, Base64Payload):
+            payloads.append(obj)
+            return f"{marker}{len(payloads) - 1}"
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    skeleton = json.dumps(response, default=placeholder).encode("utf-8")
+    if not payloads:
+        return bytearray(skeleton)
+
+    # The skeleton has a quoted placeholder for each payload, in order
+    pieces = []
+    rest = skeleton
+    for i in range(len(payloads)):
+        before, _, rest = rest.partition(f"{marker}{i}".encode("utf-8"))
+        pieces.append(before)
+    pieces.append(rest)
+
+    out = bytearray(sum(len(piece) for piece in pieces) + sum(map(len, payloads)))
+    offset = 0
+    with timer("base64"):
+        for piece, payload in zip(pieces, payloads + [None]):
+            out[offset : offset + len(piece)] = piece
+            offset += len(piece)
+            if payload is not None:
+                offset = b64encode_into(payload.data, out, offset)
+    return out
@@ -0,0 +1,215 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# The metrics of the request being processed. None if instrumentation is disabled,
+# in which case all the helpers below return immediately.
+_current_metrics: ContextVar[Optional["RequestMetrics"]] = ContextVar(
+    "athena_request_metrics", default=None
+)
+
+
+class RequestMetrics:
+    """
+    Timings and counters for a single request.
+
+    Timings are in seconds, and accumulate - e.g. `conversion` is the total time spent
+    converting every batch of the request. They can be added to from any thread.
+
+    These timings are recorded by the SDK:
+    - `data_source`: waiting on your data source (`records`, `rows`, `partitions`, ...)
+    - `conversion`: converting records to Arrow, including filtering
+    - `ipc_serialization`: serializing schemas and records to Arrow IPC
+    - `base64`: base64-encoding the serialized records
+    - `spill_upload`: writing spill blocks (which happens in the background)
+    - `total`: the whole request
+
+    And these counters: `rows`, `bytes` (in memory Arrow size), `spilled` (0 or 1),
+    `spill_blocks` and `spill_bytes` - plus `dictionary_bytes_saveable` and
+    `narrowing_bytes_saveable` if the handler profiles columns, `result_cache_hits`
+    if it has a result cache, and the Arrow memory high-water marks `sdk_peak_arrow_bytes`
+    and `process_peak_arrow_bytes`, plus `memory_pressure` (how often the memory budget was hit).
+    """
+
+    def __init__(self, request_type: str, properties: Optional[Dict] = None) -> None:
+        self.request_type = request_type
+        self.properties = properties or {}
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timer(self, name: str) -> "_Timer":
+        return _Timer(self, name)
+
+    def timed(self, iterable: Iterable, name: str) -> Iterator:
+        """Yield from `iterable`, adding the time spent waiting on each item to `name`."""
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.add_time(name, time.perf_counter() - start)
+                yield item
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requestType": self.request_type,
+            **self.properties,
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+        }
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics: RequestMetrics, name: str) -> None:
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._metrics.add_time(self._name, time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current_metrics.get()
+
+
+def timer(name: str):
+    """A context manager that adds its duration to `name` for the current request, if any."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return _NULL_TIMER
+    return _Timer(metrics, name)
+
+
+def count(name: str, value: int = 1) -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.count(name, value)
+
+
+def timed(iterable: Iterable, name: str) -> Iterable:
+    """Time the iteration of `iterable` for the current request. A no-op when disabled."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return iterable
+    return metrics.timed(iterable, name)
+
+
+class MetricsSink(ABC):
+    """
+    MetricsSink receives the `RequestMetrics` of every request once it's done.
+    """
+
+    @abstractmethod
+    def emit(self, metrics: RequestMetrics) -> None:
+        pass
+
+    def record(self, metrics: RequestMetrics):
+        """
+        Start recording `metrics` for the current request (and any threads it starts).
+        Returns a token for `finish`.
+        """
+        return _current_metrics.set(metrics)
+
+    def finish(self, metrics: RequestMetrics, token) -> None:
+        _current_metrics.reset(token)
+        try:
+            self.emit(metrics)
+        except Exception as e:
+            # Metrics should never fail a query
+            print(f"Failed to emit metrics: {e}")
+
+
+class CallbackMetricsSink(MetricsSink):
+    """Passes the metrics of every request to `callback`."""
+
+    def __init__(self, callback: Callable[[RequestMetrics], None]) -> None:
+        self.callback = callback
+
+    def emit(self, metrics: RequestMetrics) -> None:
+        self.callback(metrics)
+
+
+class EMFMetricsSink(MetricsSink):
+    """
+    Prints the metrics of every request as a CloudWatch Embedded Metric Format log line.
+
+    In Lambda, anything printed to stdout ends up in CloudWatch Logs, which extracts the
+    metrics automatically. Metrics are published under `namespace`, with the request type
+    as a dimension. Catalog name, query id and table are included as (searchable) properties.
+    """
+
+    def __init__(
+        self, namespace: str = "AthenaFederation", printer: Callable = print
+    ) -> None:
+        self.namespace = namespace
+        self.printer = printer
+
+    def emit(self, metrics: RequestMetrics) -> None:
+        values = {
+            f"{name}_ms": seconds * 1000 for name, seconds in metrics.timings.items()
+        }
+        values.update(metrics.counters)
+        definitions = [
+            {"Name": name, "Unit": "Milliseconds"}
+            for name in values
+            if name.endswith("_ms")
+        ] + [
+            {"Name": name, "Unit": "Bytes" if name.endswith("bytes") else "Count"}
+            for name in metrics.counters
+        ]
+        self.printer(
+            json.dumps(
+                {
+                    "_aws": {
+                        "Timestamp": int(time.time() * 1000),
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": self.namespace,
+                                "Dimensions": [["RequestType"]],
+                                "Metrics": definitions,
+                            }
+                        ],
+                    },
+                    "RequestType": metrics.request_type,
+                    **metrics.properties,
+                    **values,
+                }
+            )
+        )
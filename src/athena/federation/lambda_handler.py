@@ -1,18 +1,197 @@
-from athena.federation.batch_writer import BatchWriter
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import pyarrow as pa
+
+from athena.federation.batch_writer import (
+    MAX_INLINE_RESPONSE_BYTES,
+    SPILL_THRESHOLD_BYTES,
+    BatchWriter,
+    is_single_batch,
+)
+from athena.federation.cache import MetadataCache
+from athena.federation.constraints import Constraints
+from athena.federation.encoding import encode_json
+from athena.federation.instrumentation import (
+    MetricsSink,
+    RequestMetrics,
+    count,
+    timed,
+    timer,
+)
 from athena.federation.sdk import AthenaFederationSDK
 from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.memory import DEFAULT_MEMORY_BUDGET_BYTES, MemoryBudget
+from athena.federation.pagination import Paginator
+from athena.federation.profiler import ColumnProfiler
+from athena.federation.result_cache import ResultCache
+from athena.federation.row_batcher import projected_schema
+from athena.federation.schema_validation import SchemaValidationError, validate_schema
+from athena.federation.parallel import DEFAULT_QUEUE_SIZE, ParallelRecords
+from athena.federation.spill import (
+    DEFAULT_MAX_CONCURRENT_UPLOADS,
+    S3SpillClient,
+    SpillClient,
+    SpillUploader,
+    generate_encryption_key,
+)
 from athena.federation.utils import AthenaSDKUtils
 import athena.federation.models as models
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SPLITS_PER_PAGE = 1000
+
+_MISSING = object()
+
 
 class AthenaLambdaHandler(AthenaFederationSDK):
-    def __init__(self, data_source: AthenaDataSource, spill_bucket: str) -> None:
+    def __init__(
+        self,
+        data_source: AthenaDataSource,
+        spill_bucket: str,
+        spill_client: Optional[SpillClient] = None,
+        max_concurrent_uploads: int = DEFAULT_MAX_CONCURRENT_UPLOADS,
+        fast_primitive_conversion: bool = False,
+        strict_conversion: bool = False,
+        max_splits_per_page: Optional[int] = DEFAULT_MAX_SPLITS_PER_PAGE,
+        metadata_cache: Optional[MetadataCache] = None,
+        subtask_workers: Optional[int] = None,
+        subtask_executor: str = "thread",
+        ordered_subtasks: bool = True,
+        subtask_queue_size: int = DEFAULT_QUEUE_SIZE,
+        metrics_sink: Optional[MetricsSink] = None,
+        response_format: str = "dict",
+        max_inline_response_bytes: int = MAX_INLINE_RESPONSE_BYTES,
+        spill_block_bytes: int = SPILL_THRESHOLD_BYTES,
+        spill_compression: Optional[str] = None,
+        encrypt_spills: bool = False,
+        profile_columns: bool = False,
+        result_cache: Optional[ResultCache] = None,
+        limit_pushdown: bool = True,
+        memory_budget_bytes: Optional[int] = DEFAULT_MEMORY_BUDGET_BYTES,
+        validate_schemas: Optional[bool] = None,
+    ) -> None:
+        """
+        `spill_client` controls where spilled blocks are written - S3 by default.
+        Up to `max_concurrent_uploads` spill blocks are uploaded in parallel per request.
+        Records are returned inline as long as the encoded ReadRecordsResponse stays under
+        `max_inline_response_bytes`, otherwise they're spilled in blocks of `spill_block_bytes`
+        (serialized). Lower the former if something in front of your function has a smaller limit.
+
+        Spilled blocks can be compressed with `spill_compression` ("lz4" or "zstd"), which uses
+        Arrow's IPC buffer compression. With `encrypt_spills`, every split gets its own AES-GCM key,
+        which is used to encrypt its spilled blocks and returned to Athena to decrypt them.
+        Encryption requires the `cryptography` package.
+
+        With `profile_columns`, the records of every ReadRecordsRequest are profiled to find columns
+        that could be declared with a narrower type or that would benefit from dictionary encoding.
+        The potential savings are recorded as metrics, and suggestions logged at INFO level, once per table.
+        Records are sent as they are, Athena reads them with exactly the requested types - see `ColumnProfiler`.
+
+        If a `result_cache` is provided, the results of ReadRecordsRequests are cached in it, and
+        identical requests (same split, columns and constraints) are answered without calling
+        the data source again - see `ResultCache`.
+
+        With `limit_pushdown`, we tell Athena we support `LIMIT` pushdown. The query's limit is passed to
+        the data source (as the `limit` keyword argument and `constraints.limit`), and as soon as a split
+        has produced enough rows we stop reading records from it. Rows are only cut off by the SDK if it
+        knows they all match the query, i.e. without constraints or with the data source's `filter_records`.
+
+        ReadRecordsRequests stay within `memory_budget_bytes` of Arrow memory (by default 60% of the
+        function's memory, or no limit outside of Lambda): when it's reached, pending records are spilled
+        and we wait for uploads before reading more records. The high-water marks are recorded as metrics,
+        use them to right-size your function's memory - see `MemoryBudget`.
+
+        With `validate_schemas`, `GetTableRequest` raises a `SchemaValidationError` if the table's schema
+        has types Athena can't read (e.g. unsigned integers, large or dictionary types), or partition columns
+        that aren't in it - rather than the query failing later with a less helpful error. By default
+        (None), the problems are only logged as a warning, so existing connectors keep working - this will
+        become an error in a future release. False skips the check.
+
+        `fast_primitive_conversion` and `strict_conversion` control how records returned
+        as Python lists are converted to Arrow, see `ColumnConverter` for details.
+
+        `GetSplitsRequest` returns at most `max_splits_per_page` splits per response,
+        with a continuation token for Athena to fetch the rest.
+
+        If a `metadata_cache` is provided, the results of the data source's `databases`, `tables`,
+        `schema` and `partition_columns` methods are cached in it across (warm) invocations.
+        Use `metadata_cache.invalidate_table` to drop entries when your catalog changes.
+
+        If the data source implements `subtasks`, each split's subtasks run on a pool of
+        `subtask_workers` (default: one per CPU) threads, or processes if `subtask_executor` is "process".
+        Threads work well when the heavy lifting is done by pyarrow (e.g. `pyarrow.json`/`pyarrow.csv`),
+        which releases the GIL. Note that Lambda doesn't provide `/dev/shm`, which `multiprocessing`
+        needs, so the process pool only works outside of Lambda (e.g. in a container).
+        Batches are written in subtask order if `ordered_subtasks`, otherwise as soon as they're ready.
+        Each subtask can have at most `subtask_queue_size` batches waiting to be written.
+
+        If a `metrics_sink` is provided, the time spent in the data source, converting, serializing
+        and spilling records is recorded for every request and passed to it - see `RequestMetrics`.
+        Use `EMFMetricsSink` to publish them to CloudWatch. Without one, nothing is recorded.
+
+        `process_event` returns a dictionary, for the Lambda runtime to JSON-encode.
+        With a `response_format` of "bytes" (or "json", for a string), it returns the encoded JSON instead,
+        with the records base64-encoded straight into the output - saving a few copies of the payload.
+        Only use this where the response is sent as-is, e.g. with a custom runtime or the HTTP server:
+        the managed Python runtime would JSON-encode the string (again).
+        """
         super().__init__()
         print(
             f'Initializing Athena data source "{data_source}", spill bucket: s3://{spill_bucket}'
         )
         self.spill_bucket = spill_bucket
         self.data_source = data_source
+        self.spill_client = spill_client or S3SpillClient()
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.fast_primitive_conversion = fast_primitive_conversion
+        self.strict_conversion = strict_conversion
+        self.max_splits_per_page = max_splits_per_page
+        self.split_paginator = Paginator()
+        self.table_paginator = Paginator()
+        self.metadata_cache = metadata_cache
+        self.subtask_workers = subtask_workers
+        self.subtask_executor = subtask_executor
+        self.ordered_subtasks = ordered_subtasks
+        self.subtask_queue_size = subtask_queue_size
+        self.metrics_sink = metrics_sink
+        if response_format not in ("dict", "json", "bytes"):
+            raise ValueError(
+                f"response_format must be 'dict', 'json' or 'bytes', not {response_format!r}"
+            )
+        self.response_format = response_format
+        self.max_inline_response_bytes = max_inline_response_bytes
+        self.spill_block_bytes = spill_block_bytes
+        self.spill_compression = spill_compression
+        self.encrypt_spills = encrypt_spills
+        self.profile_columns = profile_columns
+        # Shared by the copies of the handler, so suggestions are logged once per table
+        self._profiled_tables: Set[Tuple[str, str]] = set()
+        self.result_cache = result_cache
+        self.limit_pushdown = limit_pushdown
+        self.memory_budget_bytes = memory_budget_bytes
+        self.validate_schemas = validate_schemas
+
+    def warm(self, tables: Optional[Iterable[Tuple[str, str]]] = None) -> None:
+        """
+        Do the expensive one-off work of the first requests ahead of time.
+
+        Call this where your handler is created - during Lambda's init phase, which is faster
+        (and with SnapStart, captured in the snapshot) - rather than in the first query.
+        It imports the modules that are only loaded once records are read, sets up the spill client
+        and, for every (database, table) in `tables`, loads and encodes the schema and partition
+        columns. Those are kept in the `metadata_cache` if you provide one.
+        """
+        import pyarrow.compute  # noqa: F401
+
+        self.spill_client.warm()
+        if self.metadata_cache is not None:
+            self._cached(("databases",), self.data_source.databases)
+        for database_name, table_name in tables or []:
+            schema = self._schema(database_name, table_name)
+            AthenaSDKUtils.encode_schema(schema)
+            self._partition_columns(database_name, table_name)
 
     def process_event(self, event):
         """
@@ -34,49 +213,212 @@ class AthenaLambdaHandler(AthenaFederationSDK):
         # Look up the request type, call it dynamically, and return the dictionary representation of it.
         # Each model returned implements `as_dict` that returns the info necessary for Athena, including
         # specific PyArrow serialization.
-        return getattr(self, request_type)().as_dict()
+        if self.metrics_sink is None:
+            return self._respond(request_type)
+
+        metrics = RequestMetrics(
+            request_type,
+            {
+                "catalogName": self.catalog_name,
+                "queryId": self.event.get("queryId"),
+                **(self.event.get("tableName") or {}),
+            },
+        )
+        token = self.metrics_sink.record(metrics)
+        try:
+            with metrics.timer("total"):
+                return self._respond(request_type)
+        finally:
+            self.metrics_sink.finish(metrics, token)
+
+    def _respond(self, request_type: str):
+        response = getattr(self, request_type)()
+        if self.response_format == "dict":
+            return response.as_dict()
+        encoded = encode_json(
+            response.as_dict(
+                **AthenaSDKUtils.supported_kwargs(response.as_dict, lazy_payloads=True)
+            )
+        )
+        if self.response_format == "json":
+            return encoded.decode("utf-8")
+        return encoded
+
+    def _cached(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        """
+        Look up `key` in the metadata cache, calling `loader` on a miss.
+
+        Generators are never cached, as they can only be consumed once.
+        """
+        if self.metadata_cache is None:
+            return loader()
+        value = self.metadata_cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if not isinstance(value, Iterator):
+                self.metadata_cache.set(key, value)
+        return value
+
+    def _schema(self, database_name: str, table_name: str) -> pa.Schema:
+        return self._cached(
+            ("schema", database_name, table_name),
+            lambda: self.data_source.schema(database_name, table_name),
+        )
+
+    def _partition_columns(self, database_name: str, table_name: str) -> List[str]:
+        return self._cached(
+            ("partition_columns", database_name, table_name),
+            lambda: self.data_source.partition_columns(database_name, table_name),
+        )
 
     def PingRequest(self) -> models.PingResponse:
         return models.PingResponse(
             self.catalog_name, self.event["queryId"], self.data_source.data_source_type
         )
 
+    def GetDataSourceCapabilitiesRequest(
+        self,
+    ) -> models.GetDataSourceCapabilitiesResponse:
+        capabilities = {}
+        if self.limit_pushdown:
+            capabilities[models.LIMIT_PUSHDOWN] = [
+                models.LIMIT_PUSHDOWN_INTEGER_CONSTANT
+            ]
+        return models.GetDataSourceCapabilitiesResponse(self.catalog_name, capabilities)
+
     def ListSchemasRequest(self) -> models.ListSchemasResponse:
-        database_names = self.data_source.databases()
+        database_names = self._cached(("databases",), self.data_source.databases)
         return models.ListSchemasResponse(self.catalog_name, database_names)
 
     def ListTablesRequest(self) -> models.ListTablesResponse:
         database_name = self.event.get("schemaName")
-        table_names = self.data_source.tables(database_name)
-        tableResponse = models.ListTablesResponse(self.catalog_name)
-        for table_name in table_names:
-            tableResponse.addTableDefinition(database_name, table_name)
+        # Athena sends -1 for "no limit"
+        page_size = self.event.get("pageSize")
+        if page_size is not None and page_size < 0:
+            page_size = None
+
+        def fetch_tables(continuation_token):
+            return self._cached(
+                ("tables", database_name, continuation_token, page_size),
+                lambda: self.data_source.tables(
+                    database_name,
+                    **AthenaSDKUtils.supported_kwargs(
+                        self.data_source.tables,
+                        continuation_token=continuation_token,
+                        page_size=page_size,
+                    ),
+                ),
+            )
+
+        table_names, next_token = self.table_paginator.page(
+            fetch_tables,
+            page_size,
+            self.event.get("nextToken"),
+            key=(self.event.get("queryId"), database_name),
+        )
+        tableResponse = models.ListTablesResponse(
+            self.catalog_name, nextToken=next_token
+        )
+        tableResponse.addTableNames(database_name, table_names)
         return tableResponse
 
     def GetTableRequest(self) -> models.GetTableResponse:
         database_name = self.event.get("tableName").get("schemaName")
         table_name = self.event.get("tableName").get("tableName")
-        schema = self.data_source.schema(database_name, table_name)
+        schema = self._schema(database_name, table_name)
+        partition_columns = self._partition_columns(database_name, table_name)
+        if self.validate_schemas is not False:
+            problems = validate_schema(schema, partition_columns)
+            if problems:
+                error = SchemaValidationError(f"{database_name}.{table_name}", problems)
+                if self.validate_schemas:
+                    raise error
+                logger.warning(
+                    "%s - this will be an error in a future release, "
+                    "pass validate_schemas=False to skip the check.",
+                    error,
+                )
         return models.GetTableResponse(
-            self.catalog_name, database_name, table_name, schema
+            self.catalog_name, database_name, table_name, schema, partition_columns
         )
 
-    ## BEGIN: Placeholder methods for partition pruning/splits and spill requests
+    ## BEGIN: Partition pruning and splits
     def GetTableLayoutRequest(self) -> models.GetTableLayoutResponse:
-        # The partition schema above was reused from CloudTrail example - we need to
-        # add (also?) the schema we want to pass back in a split?
-        # e.g. messageIds: pa.list_(pa.int64())
         database_name = self.event.get("tableName").get("schemaName")
         table_name = self.event.get("tableName").get("tableName")
+        constraints = Constraints.from_dict(self.event.get("constraints"))
+
+        partitions = None
+        partition_columns = self._partition_columns(database_name, table_name)
+        if partition_columns:
+            with timer("data_source"):
+                partitions = self.data_source.partitions(
+                    database_name,
+                    table_name,
+                    **AthenaSDKUtils.supported_kwargs(
+                        self.data_source.partitions, constraints=constraints
+                    ),
+                )
+        if isinstance(partitions, dict):
+            # Give the partition columns the types Athena knows them by, rather than inferred ones
+            partitions = AthenaSDKUtils.encode_pyarrow_records(
+                projected_schema(
+                    self._schema(database_name, table_name), partition_columns
+                ),
+                partitions,
+            )
+        if partitions is not None:
+            # Only pass on the partitions that can match the query
+            partitions = constraints.filter(AthenaSDKUtils.to_record_batch(partitions))
+
         return models.GetTableLayoutResponse(
-            self.catalog_name, database_name, table_name, None
+            self.catalog_name, database_name, table_name, partitions
         )
 
     def GetSplitsRequest(self) -> models.GetSplitsResponse:
         database_name = self.event.get("tableName").get("schemaName")
         table_name = self.event.get("tableName").get("tableName")
-        data_source_splits_props = self.data_source.splits(database_name, table_name)
-        if not data_source_splits_props:
+
+        # If the table is partitioned, the request includes the partitions
+        # that survived pruning in GetTableLayoutRequest.
+        partitions = None
+        if self._partition_columns(database_name, table_name):
+            partitions = self._decode_partitions()
+
+        if partitions is not None and not self.data_source.implements("splits"):
+            # Default to one split per partition. Split properties are string -> string maps.
+            def fetch_splits(continuation_token):
+                return (
+                    {k: str(v) for k, v in partition.items()}
+                    for partition in partitions
+                )
+
+        else:
+
+            def fetch_splits(continuation_token):
+                return self.data_source.splits(
+                    database_name,
+                    table_name,
+                    **AthenaSDKUtils.supported_kwargs(
+                        self.data_source.splits,
+                        partitions=partitions,
+                        continuation_token=continuation_token,
+                    ),
+                )
+
+        continuation_token = self.event.get("continuationToken")
+        data_source_splits_props, next_token = self.split_paginator.page(
+            fetch_splits,
+            self.max_splits_per_page,
+            continuation_token,
+            key=(self.event.get("queryId"), database_name, table_name),
+        )
+        # Without partitions, we always need at least one split for Athena to read records.
+        if (
+            not data_source_splits_props
+            and continuation_token is None
+            and partitions is None
+        ):
             data_source_splits_props = [{}]
         splits = [
             {
@@ -87,9 +429,20 @@ class AthenaLambdaHandler(AthenaFederationSDK):
             }
             for props in data_source_splits_props
         ]
-        return models.GetSplitsResponse(self.catalog_name, splits)
+        if self.encrypt_spills:
+            for split in splits:
+                split["encryptionKey"] = generate_encryption_key()
+        return models.GetSplitsResponse(self.catalog_name, splits, next_token)
 
-    ## END: Unimplmented placehodlders
+    def _decode_partitions(self) -> List[Dict]:
+        partitions = self.event.get("partitions")
+        if not partitions:
+            return []
+        return AthenaSDKUtils.decode_pyarrow_records(
+            partitions["schema"], partitions["records"]
+        ).to_pylist()
+
+    ## END: Partition pruning and splits
 
     def ReadRecordsRequest(self) -> models.ReadRecordsResponse:
         schema = AthenaSDKUtils.parse_encoded_schema(self.event["schema"]["schema"])
@@ -97,37 +450,149 @@ class AthenaLambdaHandler(AthenaFederationSDK):
         table_name = self.event.get("tableName").get("tableName")
         split = self.event.get("split")
         split_properties = split.get("properties", {})
+        # Set by GetSplitsRequest if spills are encrypted
+        encryption_key = split.get("encryptionKey")
+        constraints = Constraints.from_dict(self.event.get("constraints"))
+
+        cache_key = None
+        if self.result_cache is not None and self.result_cache.caches(
+            database_name, table_name
+        ):
+            cache_key = ResultCache.key(
+                database_name,
+                table_name,
+                split_properties,
+                schema,
+                constraints,
+                self.data_source.table_version(database_name, table_name),
+                encrypted=encryption_key is not None,
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                count("result_cache_hits")
+                if cached.spilled:
+                    # The blocks are still where the first request spilled them
+                    return models.RemoteReadRecordsResponse(
+                        self.catalog_name,
+                        schema,
+                        cached.remote_blocks,
+                        cached.encryption_key,
+                    )
+                return models.ReadRecordsResponse(
+                    self.catalog_name, schema, cached.records(schema)
+                )
+
+        limit = constraints.limit if self.limit_pushdown else None
+        kwargs = {"columns": schema.names, "constraints": constraints, "limit": limit}
+        subtasks = None
+        if self.data_source.implements("subtasks"):
+            subtasks = self.data_source.subtasks(
+                database_name,
+                table_name,
+                split_properties,
+                **AthenaSDKUtils.supported_kwargs(self.data_source.subtasks, **kwargs),
+            )
 
-        # If the data source returns a generator, we can begin streaming records
-        # to a RecordBatchStreamWriter.
-        # Otherwise we take the response and wrap it in a list.
-        records = self.data_source.records(database_name, table_name, split_properties)
-        if isinstance(records, dict):
-            records = [records]
+        if subtasks:
+            records = ParallelRecords(
+                self.data_source,
+                database_name,
+                table_name,
+                split_properties,
+                subtasks,
+                kwargs,
+                max_workers=self.subtask_workers,
+                executor=self.subtask_executor,
+                ordered=self.ordered_subtasks,
+                queue_size=self.subtask_queue_size,
+            )
+        else:
+            # If the data source returns a generator, we can begin streaming records
+            # to the BatchWriter.
+            # Otherwise we take the response and wrap it in a list.
+            with timer("data_source"):
+                records = self.data_source.records(
+                    database_name,
+                    table_name,
+                    split_properties,
+                    **AthenaSDKUtils.supported_kwargs(
+                        self.data_source.records, **kwargs
+                    ),
+                )
+            if is_single_batch(records):
+                records = [records]
 
         # Convert the records to pyarrow records
         # Regardless of the return type, we stream it so we can spill to S3.
         # If the resulting batch is <6MB, we can return it immediately.
-        writer = BatchWriter(split.get("spillLocation"), schema)
-        for record_batch in records:
-            writer.write_rows(record_batch)
+        row_filter = None
+        if constraints and self.data_source.filter_records:
+            row_filter = constraints.filter
+        profiler = ColumnProfiler(schema) if self.profile_columns else None
+        memory = MemoryBudget(self.memory_budget_bytes)
+        writer = BatchWriter(
+            split.get("spillLocation"),
+            schema,
+            uploader=SpillUploader(
+                self.spill_client,
+                self.max_concurrent_uploads,
+                compression=self.spill_compression,
+                encryption_key=encryption_key,
+                memory_pool=memory.pool,
+            ),
+            fast_primitives=self.fast_primitive_conversion,
+            strict=self.strict_conversion,
+            row_filter=row_filter,
+            spill_threshold_bytes=self.spill_block_bytes,
+            max_inline_response_bytes=self.max_inline_response_bytes,
+            catalog_name=self.catalog_name,
+            profiler=profiler,
+            # Constraints are only a hint - unless we filter the records ourselves,
+            # some of them might not match and we'd return too few rows.
+            limit=limit if row_filter is not None or not constraints else None,
+            memory=memory,
+        )
+        batches = iter(timed(records, "data_source"))
+        try:
+            for record_batch in batches:
+                writer.write_rows(record_batch)
+                if writer.full:
+                    break
+        finally:
+            # Stop the data source (e.g. its backend pagination) if it has more records than we need
+            if hasattr(batches, "close"):
+                batches.close()
 
         writer.close()
+        if profiler is not None:
+            count("dictionary_bytes_saveable", profiler.dictionary_bytes_saved)
+            count("narrowing_bytes_saveable", profiler.narrowing_bytes_saved)
+            suggestions = profiler.suggestions()
+            if suggestions and (database_name, table_name) not in self._profiled_tables:
+                self._profiled_tables.add((database_name, table_name))
+                for suggestion in suggestions:
+                    logger.info("%s.%s: %s", database_name, table_name, suggestion)
         if writer.spilled:
+            if cache_key is not None:
+                self.result_cache.put_remote(
+                    cache_key,
+                    database_name,
+                    table_name,
+                    writer.remote_blocks,
+                    encryption_key,
+                )
             return models.RemoteReadRecordsResponse(
                 self.catalog_name,
                 schema,
-                {
-                    "@type": "S3SpillLocation",
-                    "bucket": split.get("spillLocation").get("bucket"),
-                    "key": split.get("spillLocation").get("key") + "/spill.0",
-                    "directory": False,
-                },
-                None,
+                writer.remote_blocks,
+                encryption_key,
             )
         else:
-            # TODO: Don't convert to a pydict
-            pa_records = AthenaSDKUtils.encode_pyarrow_records(
-                schema, writer.all_records().to_pydict()
-            )
-            return models.ReadRecordsResponse(self.catalog_name, schema, pa_records)
\ No newline at end of file
+            # The records stay columnar all the way through - they're only serialized
+            # once, when the response is encoded.
+            records = writer.all_records()
+            if cache_key is not None:
+                self.result_cache.put_records(
+                    cache_key, database_name, table_name, records
+                )
+            return models.ReadRecordsResponse(self.catalog_name, schema, records)
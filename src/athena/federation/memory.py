@@ -0,0 +1,78 @@
+import os
+from typing import Optional
+
+import pyarrow as pa
+
+# Arrow buffers are only part of what a Lambda function uses: the interpreter, Python objects
+# and allocator fragmentation take the rest, so we leave a good chunk of headroom.
+DEFAULT_MEMORY_BUDGET_FRACTION = 0.6
+
+
+def lambda_memory_budget_bytes(
+    fraction: float = DEFAULT_MEMORY_BUDGET_FRACTION,
+) -> Optional[int]:
+    """
+    The default memory budget: a fraction of the function's memory, from `AWS_LAMBDA_FUNCTION_MEMORY_SIZE`.
+    None when not running in Lambda.
+    """
+    memory_size = os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+    if not memory_size:
+        return None
+    return int(int(memory_size) * 1024 * 1024 * fraction)
+
+
+DEFAULT_MEMORY_BUDGET_BYTES = lambda_memory_budget_bytes()
+
+
+class MemoryBudget:
+    """
+    Keeps track of Arrow memory while a request is processed.
+
+    Everything the SDK allocates for the request (converted and cast columns, combined batches,
+    serialized spill blocks) goes through `pool`, a dedicated proxy of the default memory pool,
+    so `sdk_peak_bytes` is the high-water mark of the SDK's own allocations for the request.
+    It doesn't include records your data source allocated (e.g. Arrow batches it yields that
+    already match the schema, which are used as-is) - that's only in `process_peak_bytes`,
+    which is sampled after every batch is written, so it can miss short-lived allocations.
+
+    The budget is checked against the request's own allocations in `pool`, not all the Arrow
+    memory of the process: several requests can run in the same process (e.g. `athena.federation.server`),
+    and spilling one request's records does nothing for another's, so a request shouldn't be slowed down
+    by memory it can't free. With one request per process, as in Lambda, the two only differ by what
+    your data source allocated. If `limit_bytes` is None, nothing is enforced but high-water marks
+    are still tracked.
+    """
+
+    def __init__(
+        self, limit_bytes: Optional[int] = DEFAULT_MEMORY_BUDGET_BYTES
+    ) -> None:
+        self.limit_bytes = limit_bytes
+        self.pool = pa.proxy_memory_pool(pa.default_memory_pool())
+        self.process_peak_bytes = 0
+
+    def used_bytes(self) -> int:
+        """Arrow memory currently allocated for the request."""
+        return self.pool.bytes_allocated()
+
+    def process_bytes(self) -> int:
+        """Arrow memory currently allocated by the whole process."""
+        used = pa.total_allocated_bytes()
+        if used > self.process_peak_bytes:
+            self.process_peak_bytes = used
+        return used
+
+    @property
+    def exceeded(self) -> bool:
+        self.process_bytes()  # Samples the process high-water mark
+        return self.limit_bytes is not None and self.used_bytes() > self.limit_bytes
+
+    @property
+    def sdk_peak_bytes(self) -> int:
+        return self.pool.max_memory()
+
+    def __str__(self) -> str:
+        limit = "none" if self.limit_bytes is None else f"{self.limit_bytes} bytes"
+        return (
+            f"Arrow memory high-water mark: {self.sdk_peak_bytes} bytes (SDK allocations for the request), "
+            f"{self.process_peak_bytes} bytes (process), budget: {limit}"
+        )
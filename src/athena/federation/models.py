@@ -1,18 +1,33 @@
 from uuid import uuid4
 
+from athena.federation.encoding import Base64Payload
 from athena.federation.utils import AthenaSDKUtils
 
-import pyarrow as pa
-
 # https://github.com/awslabs/aws-athena-query-federation/blob/master/athena-federation-sdk/src/main/java/com/amazonaws/athena/connector/lambda/handlers/FederationCapabilities.java#L33
 CAPABILITIES = 23
 
+# Optimizations a connector can advertise in a GetDataSourceCapabilitiesResponse,
+# with the subtypes it supports.
+LIMIT_PUSHDOWN = "supports_limit_pushdown"
+LIMIT_PUSHDOWN_INTEGER_CONSTANT = "integer_constant"
+
+
+def encode_records(records, lazy_payloads=False):
+    """
+    Base64-encodes records. With `lazy_payloads`, the encoding is left to `encode_json`,
+    which writes it straight into the response.
+    """
+    if lazy_payloads:
+        return Base64Payload(AthenaSDKUtils.serialize_pyarrow_object(records))
+    return AthenaSDKUtils.encode_pyarrow_object(records)
+
 
 class PingResponse:
-    def __init__(self, catalogName, queryId, sourceType) -> None:
+    def __init__(self, catalogName, queryId, sourceType, capabilities=CAPABILITIES) -> None:
         self.catalogName = catalogName
         self.queryId = queryId
         self.sourceType = sourceType
+        self.capabilities = capabilities
 
     def as_dict(self):
         return {
@@ -20,7 +35,30 @@ class PingResponse:
             "catalogName":  self.catalogName,
             "queryId": self.queryId,
             "sourceType": self.sourceType,
-            "capabilities": CAPABILITIES
+            "capabilities": self.capabilities
+        }
+
+
+class GetDataSourceCapabilitiesResponse:
+    requestType = 'GET_DATASOURCE_CAPABILITIES'
+
+    def __init__(self, catalogName, capabilities=None) -> None:
+        """
+        `capabilities` maps the name of each optimization the connector supports (e.g. `LIMIT_PUSHDOWN`)
+        to the list of its supported subtypes.
+        """
+        self.catalogName = catalogName
+        self.capabilities = capabilities or {}
+
+    def as_dict(self):
+        return {
+            "@type": "GetDataSourceCapabilitiesResponse",
+            "catalogName": self.catalogName,
+            "capabilities": {
+                name: [{"subType": subType, "properties": []} for subType in subTypes]
+                for name, subTypes in self.capabilities.items()
+            },
+            "requestType": self.requestType
         }
 
 
@@ -52,21 +90,35 @@ class TableDefinition:
 class ListTablesResponse:
     requestType = 'LIST_TABLES'
 
-    def __init__(self, catalogName, tableDefinitions=None) -> None:
+    def __init__(self, catalogName, tableDefinitions=None, nextToken=None) -> None:
         self.catalogName = catalogName
         self.tables = tableDefinitions or []
+        self.nextToken = nextToken
+        self.tableNames = []
 
     def addTableDefinition(self, schemaName, tableName) -> None:
         self.tables.append(TableDefinition(schemaName, tableName))
 
+    def addTableNames(self, schemaName, tableNames) -> None:
+        """
+        Add a list of table names without creating a TableDefinition for each of them.
+        """
+        self.tableNames.append((schemaName, tableNames))
+
     def as_dict(self):
+        tables = [t.as_dict() for t in self.tables]
+        for schemaName, tableNames in self.tableNames:
+            tables.extend(
+                {"schemaName": schemaName, "tableName": tableName}
+                for tableName in tableNames
+            )
         return {
             "@type": "ListTablesResponse",
             "catalogName": self.catalogName,
-            "tables": [t.as_dict() for t in self.tables],
+            "tables": tables,
+            "nextToken": self.nextToken,
             "requestType": self.requestType
         }
-        # Missing nextToken - listtables can be paginated
 
 
 class GetTableResponse:
@@ -84,7 +136,7 @@ class GetTableResponse:
             "@type": "GetTableResponse",
             "catalogName": self.catalogName,
             "tableName": {'schemaName': self.databaseName, 'tableName': self.tableName},
-            "schema": {"schema": AthenaSDKUtils.encode_pyarrow_object(self.schema)},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(self.schema)},
             "partitionColumns": self.partitions,
             "requestType": self.request_type
         }
@@ -99,20 +151,20 @@ class GetTableLayoutResponse:
         self.tableName = tableName
         self.partitions = partitions
 
-    def encoded_partition_config(self):
+    def encoded_partition_config(self, lazy_payloads=False):
         """
         Encodes the schema and each record in the partition config.
+
+        Partitions can either be a dictionary of column lists or a RecordBatch.
         """
-        partition_keys = self.partitions.keys()
-        data = [pa.array(self.partitions[key]) for key in partition_keys]
-        batch = pa.RecordBatch.from_arrays(data, list(partition_keys))
+        batch = AthenaSDKUtils.to_record_batch(self.partitions)
         return {
             "aId": str(uuid4()),
-            "schema": AthenaSDKUtils.encode_pyarrow_object(batch.schema),
-            "records": AthenaSDKUtils.encode_pyarrow_object(batch)
+            "schema": AthenaSDKUtils.encode_schema(batch.schema),
+            "records": encode_records(batch, lazy_payloads)
         }
 
-    def as_dict(self):
+    def as_dict(self, lazy_payloads=False):
         # If _no_ partition_config is provided, we *must* return at least 1 partition
         # otherwise Athena will not know to retrieve data.
         if self.partitions is None:
@@ -128,7 +180,7 @@ class GetTableLayoutResponse:
             "@type": "GetTableLayoutResponse",
             "catalogName": self.catalogName,
             "tableName": {'schemaName': self.databaseName, 'tableName': self.tableName},
-            "partitions": self.encoded_partition_config(),
+            "partitions": self.encoded_partition_config(lazy_payloads),
             "requestType": self.request_type
         }
 
@@ -136,16 +188,17 @@ class GetTableLayoutResponse:
 class GetSplitsResponse:
     request_type = 'GET_SPLITS'
 
-    def __init__(self, catalogName, splits) -> None:
+    def __init__(self, catalogName, splits, continuationToken=None) -> None:
         self.catalogName = catalogName
         self.splits = splits
+        self.continuationToken = continuationToken
 
     def as_dict(self):
         return {
             "@type": "GetSplitsResponse",
             "catalogName": self.catalogName,
             "splits": self.splits,
-            "continuationToken": None,
+            "continuationToken": self.continuationToken,
             "requestType": self.request_type
         }
 
@@ -158,14 +211,14 @@ class ReadRecordsResponse:
         self.schema = schema
         self.records = records
 
-    def as_dict(self):
+    def as_dict(self, lazy_payloads=False):
         return {
             "@type": "ReadRecordsResponse",
             "catalogName": self.catalogName,
             "records": {
                 "aId": str(uuid4()),
-                "schema": AthenaSDKUtils.encode_pyarrow_object(self.schema),
-                "records": AthenaSDKUtils.encode_pyarrow_object(self.records)
+                "schema": AthenaSDKUtils.encode_schema(self.schema),
+                "records": encode_records(self.records, lazy_payloads)
             },
             "requestType": self.request_type
         }
@@ -183,7 +236,7 @@ class RemoteReadRecordsResponse:
         return {
             "@type": "RemoteReadRecordsResponse",
             "catalogName": self.catalogName,
-            "schema": {"schema": AthenaSDKUtils.encode_pyarrow_object(self.schema)},
-            "remoteBlocks": [self.remoteBlocks],
-            "encryptionKey": None
+            "schema": {"schema": AthenaSDKUtils.encode_schema(self.schema)},
+            "remoteBlocks": self.remoteBlocks,
+            "encryptionKey": self.encryptionKey
         }
\ No newline at end of file
@@ -0,0 +1,98 @@
+import base64
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Tuple
+
+DEFAULT_MAX_CURSORS = 32
+
+
+class Page:
+    """
+    A single page of results from a data source method that paginates itself.
+
+    `next_token` is an opaque string that is passed back to the same method as
+    `continuation_token` to fetch the next page. It should be None on the last page.
+    """
+
+    def __init__(self, items: List[Any], next_token: Optional[str] = None) -> None:
+        self.items = items
+        self.next_token = next_token
+
+
+def encode_token(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode("utf-8")).decode("utf-8")
+
+
+def decode_token(token: str) -> dict:
+    return json.loads(base64.urlsafe_b64decode(token.encode("utf-8")))
+
+
+class Paginator:
+    """
+    Paginator cuts the results of a data source method into bounded pages with an opaque
+    continuation token, so Athena can fetch them across multiple requests.
+
+    Results can be:
+    - A list or generator, which we paginate ourselves. The token records how many items
+      have been returned so far. Between warm invocations we keep the live iterator around,
+      so the next page resumes right where we left off. If the iterator is gone (e.g. on a cold
+      start), the results are re-fetched and the already-returned items are skipped.
+    - A `Page`, in which case the data source paginates itself and we just pass its token along.
+    """
+
+    def __init__(self, max_cursors: int = DEFAULT_MAX_CURSORS) -> None:
+        self._max_cursors = max_cursors
+        self._cursors: "OrderedDict[Tuple[Hashable, str], Iterator]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page(
+        self,
+        fetch: Callable[[Optional[str]], Any],
+        page_size: Optional[int],
+        token: Optional[str] = None,
+        key: Hashable = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Return a page of at most `page_size` items (unlimited if None) and the token for the next page.
+
+        `fetch` is called with the data source's own continuation token, if any.
+        `key` identifies the query the results are for, so cursors aren't shared between queries.
+        """
+        state = decode_token(token) if token else {}
+
+        if "source" in state:
+            return self._source_page(fetch(state["source"]))
+
+        offset = state.get("offset", 0)
+        with self._lock:
+            cursor = self._cursors.pop((key, token), None)
+        if cursor is None:
+            results = fetch(None)
+            if isinstance(results, Page):
+                return self._source_page(results)
+            cursor = iter(results)
+            # Skip whatever was returned on previous pages
+            next(itertools.islice(cursor, offset, offset), None)
+
+        items = list(itertools.islice(cursor, page_size))
+        if page_size is None or len(items) < page_size:
+            return items, None
+
+        # There may be more - peek to find out
+        try:
+            peeked = next(cursor)
+        except StopIteration:
+            return items, None
+        next_token = encode_token({"offset": offset + len(items)})
+        with self._lock:
+            self._cursors[(key, next_token)] = itertools.chain([peeked], cursor)
+            while len(self._cursors) > self._max_cursors:
+                self._cursors.popitem(last=False)
+        return items, next_token
+
+    def _source_page(self, page: Page) -> Tuple[List[Any], Optional[str]]:
+        if page.next_token is None:
+            return list(page.items), None
+        return list(page.items), encode_token({"source": page.next_token})
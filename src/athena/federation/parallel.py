@@ -0,0 +1,190 @@
+import os
+import queue
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from athena.federation.athena_data_source import AthenaDataSource, RecordsBatch
+from athena.federation.batch_writer import is_single_batch
+from athena.federation.utils import AthenaSDKUtils
+
+DEFAULT_QUEUE_SIZE = 2
+
+# Markers put on the queues by the worker threads
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _subtask_batches(
+    data_source: AthenaDataSource,
+    database_name: str,
+    table_name: str,
+    split: Mapping[str, str],
+    subtask: Any,
+    kwargs: Dict,
+) -> Iterator[RecordsBatch]:
+    records = data_source.subtask_records(
+        database_name,
+        table_name,
+        split,
+        subtask,
+        **AthenaSDKUtils.supported_kwargs(data_source.subtask_records, **kwargs),
+    )
+    if is_single_batch(records):
+        return iter([records])
+    return iter(records)
+
+
+def _collect_subtask(*args) -> List[RecordsBatch]:
+    """
+    Runs in a worker process. Generators can't be sent between processes,
+    so all of the subtask's batches are sent back at once.
+    """
+    return list(_subtask_batches(*args))
+
+
+class ParallelRecords:
+    """
+    ParallelRecords runs the subtasks of a single split on a thread or process pool
+    and yields the batches they produce.
+
+    With `ordered=True`, batches are yielded in subtask order (and in order within each subtask),
+    so the output is deterministic. Otherwise they're yielded as soon as they're produced.
+
+    Memory stays bounded: each running subtask can have at most `queue_size` batches waiting
+    to be written before it's paused (unordered, running subtasks share a queue of `queue_size`
+    batches per worker, so one fast subtask can use all of it). In process mode a subtask's
+    batches are returned all at once, so at most `max_workers + queue_size` subtasks' worth of batches are held in memory.
+    """
+
+    def __init__(
+        self,
+        data_source: AthenaDataSource,
+        database_name: str,
+        table_name: str,
+        split: Mapping[str, str],
+        subtasks: List[Any],
+        kwargs: Optional[Dict] = None,
+        max_workers: Optional[int] = None,
+        executor: str = "thread",
+        ordered: bool = True,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(
+                f"executor must be 'thread' or 'process', not {executor!r}"
+            )
+        self._args = (data_source, database_name, table_name, split)
+        self._subtasks = list(subtasks)
+        self._kwargs = kwargs or {}
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._executor = executor
+        self._ordered = ordered
+        self._queue_size = queue_size
+
+    def __iter__(self) -> Iterator[RecordsBatch]:
+        if not self._subtasks:
+            return iter([])
+        if self._executor == "process":
+            return self._process_batches()
+        return self._thread_batches()
+
+    def _thread_batches(self) -> Iterator[RecordsBatch]:
+        stop = threading.Event()
+        if self._ordered:
+            queues = [queue.Queue(self._queue_size) for _ in self._subtasks]
+        else:
+            shared = queue.Queue(self._queue_size * self._max_workers)
+            queues = [shared] * len(self._subtasks)
+
+        def put(q: queue.Queue, item: Any) -> bool:
+            # Don't block forever if the consumer has gone away
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def run(subtask: Any, q: queue.Queue) -> None:
+            if stop.is_set():
+                return
+            try:
+                for batch in _subtask_batches(*self._args, subtask, self._kwargs):
+                    if not put(q, batch):
+                        return
+            except BaseException as e:
+                put(q, _Failed(e))
+                return
+            put(q, _DONE)
+
+        pool = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="subtask"
+        )
+        try:
+            for subtask, q in zip(self._subtasks, queues):
+                pool.submit(run, subtask, q)
+
+            if self._ordered:
+                for q in queues:
+                    yield from self._drain(q, 1)
+            else:
+                yield from self._drain(shared, len(self._subtasks))
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+
+    @staticmethod
+    def _drain(q: queue.Queue, producers: int) -> Iterator[RecordsBatch]:
+        finished = 0
+        while finished < producers:
+            item = q.get()
+            if item is _DONE:
+                finished += 1
+            elif isinstance(item, _Failed):
+                raise item.error
+            else:
+                yield item
+
+    def _process_batches(self) -> Iterator[RecordsBatch]:
+        pool = ProcessPoolExecutor(max_workers=self._max_workers)
+        max_in_flight = self._max_workers + self._queue_size
+        remaining = iter(self._subtasks)
+        in_flight: List[Future] = []
+
+        def submit_more() -> None:
+            while len(in_flight) < max_in_flight:
+                subtask = next(remaining, _DONE)
+                if subtask is _DONE:
+                    return
+                in_flight.append(
+                    pool.submit(_collect_subtask, *self._args, subtask, self._kwargs)
+                )
+
+        try:
+            submit_more()
+            while in_flight:
+                if self._ordered:
+                    future = in_flight.pop(0)
+                else:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    in_flight.remove(future)
+                batches = future.result()
+                submit_more()
+                yield from batches
+        finally:
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown(wait=True)
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+
+from athena.federation.converters import integer_range
+
+DEFAULT_MAX_PROFILED_BATCHES = 10
+
+# Dictionary encoding only pays off if values repeat a lot
+MAX_DICTIONARY_CARDINALITY_RATIO = 0.5
+
+_SIGNED = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+_UNSIGNED = [pa.uint8(), pa.uint16(), pa.uint32(), pa.uint64()]
+
+
+def index_type(cardinality: int) -> pa.DataType:
+    """The narrowest dictionary index type for `cardinality` distinct values."""
+    for candidate in _SIGNED:
+        if cardinality <= 2 ** (candidate.bit_width - 1):
+            return candidate
+    return pa.int64()
+
+
+def narrowest_integer_type(data_type: pa.DataType, low: int, high: int) -> pa.DataType:
+    """The narrowest integer type of the same signedness that can hold `low` to `high`."""
+    for candidate in _UNSIGNED if pa.types.is_unsigned_integer(data_type) else _SIGNED:
+        candidate_low, candidate_high = integer_range(candidate)
+        if candidate_low <= low and high <= candidate_high:
+            return candidate
+    return data_type
+
+
+def _is_string_like(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_string(data_type)
+        or pa.types.is_large_string(data_type)
+        or pa.types.is_binary(data_type)
+    )
+
+
+class ColumnProfile:
+    """
+    What we've learned about a single column from the batches we've profiled.
+    """
+
+    def __init__(self, field: pa.Field) -> None:
+        self.field = field
+        self.rows = 0
+        self.nbytes = 0
+        self.max_cardinality = 0
+        self.dictionary_nbytes = 0
+        self.low: Optional[int] = None
+        self.high: Optional[int] = None
+
+    @property
+    def dictionary_bytes_saved(self) -> int:
+        """How many bytes dictionary-encoding this (string) column would have saved."""
+        if (
+            not _is_string_like(self.field.type)
+            or self.max_cardinality > self.rows * MAX_DICTIONARY_CARDINALITY_RATIO
+        ):
+            return 0
+        return max(0, self.nbytes - self.dictionary_nbytes)
+
+    @property
+    def narrow_type(self) -> pa.DataType:
+        if self.low is None or not pa.types.is_integer(self.field.type):
+            return self.field.type
+        return narrowest_integer_type(self.field.type, self.low, self.high)
+
+    @property
+    def narrowing_bytes_saved(self) -> int:
+        """How many bytes storing this (integer) column as `narrow_type` would have saved."""
+        width = (
+            self.field.type.bit_width // 8
+            if pa.types.is_integer(self.field.type)
+            else 0
+        )
+        return self.rows * (width - self.narrow_type.bit_width // 8) if width else 0
+
+    def observe(self, column: pa.Array) -> None:
+        import pyarrow.compute as pc
+
+        self.rows += len(column)
+        self.nbytes += column.nbytes
+        data_type = column.type
+        if _is_string_like(data_type):
+            cardinality = pc.count_distinct(column).as_py()
+            self.max_cardinality = max(self.max_cardinality, cardinality)
+            # Indices, plus (roughly) the share of the values that are distinct
+            self.dictionary_nbytes += (
+                len(column) * index_type(cardinality).bit_width // 8
+            )
+            self.dictionary_nbytes += column.nbytes * cardinality // max(1, len(column))
+        elif pa.types.is_integer(data_type) and column.null_count < len(column):
+            min_max = pc.min_max(column)
+            low, high = min_max["min"].as_py(), min_max["max"].as_py()
+            self.low = low if self.low is None else min(self.low, low)
+            self.high = high if self.high is None else max(self.high, high)
+
+
+class ColumnProfiler:
+    """
+    ColumnProfiler measures how much smaller the records of a request could be,
+    per column: low-cardinality string columns that could be dictionary-encoded,
+    and integer columns whose values fit in a narrower type.
+
+    Athena reads records using exactly the types of the requested schema, and the response
+    format has no room for Arrow dictionaries, so we can't change what goes over the wire ourselves.
+    What we can do is tell you: declaring a narrower type in your `schema` (e.g. `pa.int16()`
+    for a column that's really a SMALLINT) shrinks every response, and dictionary-friendly columns
+    compress very well with `spill_compression`.
+
+    Only the first `max_batches` batches are profiled, to bound the cost.
+    """
+
+    def __init__(
+        self, schema: pa.Schema, max_batches: int = DEFAULT_MAX_PROFILED_BATCHES
+    ) -> None:
+        self.profiles: Dict[str, ColumnProfile] = {
+            field.name: ColumnProfile(field) for field in schema
+        }
+        self.max_batches = max_batches
+        self.batches = 0
+
+    def observe(self, record_batch: pa.RecordBatch) -> None:
+        if self.batches >= self.max_batches:
+            return
+        self.batches += 1
+        for name, profile in self.profiles.items():
+            profile.observe(record_batch.column(name))
+
+    @property
+    def dictionary_bytes_saved(self) -> int:
+        return sum(p.dictionary_bytes_saved for p in self.profiles.values())
+
+    @property
+    def narrowing_bytes_saved(self) -> int:
+        return sum(p.narrowing_bytes_saved for p in self.profiles.values())
+
+    def suggestions(self) -> List[str]:
+        suggestions = []
+        for name, profile in self.profiles.items():
+            if profile.narrowing_bytes_saved:
+                suggestions.append(
+                    f'Column "{name}" ({profile.field.type}) only holds values from {profile.low} to {profile.high}: '
+                    f"declaring it as {profile.narrow_type} would save {profile.narrowing_bytes_saved} bytes"
+                )
+            if profile.dictionary_bytes_saved:
+                suggestions.append(
+                    f'Column "{name}" has at most {profile.max_cardinality} distinct values per batch: '
+                    f"dictionary encoding (or compression) would save {profile.dictionary_bytes_saved} bytes"
+                )
+        return suggestions
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+from athena.federation.constraints import Constraints
+from athena.federation.utils import AthenaSDKUtils
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+DEFAULT_TTL_SECONDS = 300
+
+_SUFFIX = ".arrow"
+
+# The name of a file the cache wrote: a key (see `ResultCache.key`) and the suffix
+_FILE_NAME = re.compile(r"[0-9a-f]{64}" + re.escape(_SUFFIX))
+
+
+class CachedResult:
+    """
+    The result of a ReadRecordsRequest: either the serialized records that were returned inline,
+    or the spill blocks (and encryption key) they were written to.
+    """
+
+    def __init__(
+        self,
+        database_name: str,
+        table_name: str,
+        size: int,
+        expires_at: Optional[float],
+        buffer: Optional[pa.Buffer] = None,
+        path: Optional[str] = None,
+        remote_blocks: Optional[List[Dict]] = None,
+        encryption_key: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.database_name = database_name
+        self.table_name = table_name
+        self.size = size
+        self.expires_at = expires_at
+        self.buffer = buffer
+        self.path = path
+        self.remote_blocks = remote_blocks
+        self.encryption_key = encryption_key
+
+    @property
+    def spilled(self) -> bool:
+        return self.remote_blocks is not None
+
+    def records(self, schema: pa.Schema) -> pa.RecordBatch:
+        """The cached records, without copying them."""
+        return pa.ipc.read_record_batch(self.buffer, schema)
+
+
+class ResultCache:
+    """
+    Caches the results of ReadRecordsRequests, so queries that run again and again (e.g. dashboards)
+    don't read the same splits from your data source every time.
+
+    Results are keyed on a hash of the database, table, split properties, requested schema and
+    constraints - see `key`. Inline records are kept serialized, in memory or, with `directory`
+    (e.g. "/tmp/athena-results"), in files that are memory-mapped on a hit.
+
+    Spilled results are only cached with `cache_spilled`. Then only the location of their spill blocks
+    (and their encryption key) is kept, and a hit returns the blocks the first query spilled, without
+    checking they're still there: only enable it if nothing deletes spill blocks (e.g. a lifecycle rule
+    on your spill bucket) sooner than the TTL, and if the queries that share cached results can all
+    read each other's spill blocks.
+
+    Entries expire `ttl` seconds after they're added, which can be overridden per table with
+    `table_ttls` (`{(database_name, table_name): ttl}`, 0 to never cache a table). If your data source
+    implements `table_version`, its result is part of the key, so a new version of a table is a miss.
+    The least recently used entries are evicted once the cache holds more than `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: Optional[float] = DEFAULT_TTL_SECONDS,
+        table_ttls: Optional[Dict[Tuple[str, str], Optional[float]]] = None,
+        directory: Optional[str] = None,
+        cache_spilled: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.table_ttls = table_ttls or {}
+        self.directory = directory
+        self.cache_spilled = cache_spilled
+        self._clock = clock
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            # Left over by a previous process - we don't know what they're for anymore.
+            # Only our own files, the directory may be shared (e.g. /tmp).
+            for name in os.listdir(directory):
+                if _FILE_NAME.fullmatch(name):
+                    os.remove(os.path.join(directory, name))
+
+    @staticmethod
+    def key(
+        database_name: str,
+        table_name: str,
+        split_properties: Dict[str, str],
+        schema: pa.Schema,
+        constraints: Constraints,
+        table_version: Optional[str] = None,
+        encrypted: bool = False,
+    ) -> str:
+        """
+        A canonical hash of everything that determines the result of a ReadRecordsRequest.
+
+        Constraints are hashed in their `Constraints.canonical` form rather than as Athena sent them,
+        which also has ids and serialized blocks that change from one query to the next.
+        """
+        payload = json.dumps(
+            [
+                database_name,
+                table_name,
+                split_properties,
+                AthenaSDKUtils.encode_schema(schema),
+                constraints.canonical(),
+                table_version,
+                encrypted,
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, database_name: str, table_name: str) -> Optional[float]:
+        return self.table_ttls.get((database_name, table_name), self.ttl)
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at is None or entry.expires_at > self._clock():
+                    try:
+                        loaded = self._load(entry)
+                    except FileNotFoundError:
+                        # Someone cleaned up the directory
+                        loaded = None
+                    if loaded is not None:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return loaded
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    @staticmethod
+    def _load(entry: CachedResult) -> CachedResult:
+        """
+        Memory-map the records of an entry cached on disk. The mapping stays valid
+        even if the entry is evicted (and its file deleted) while the records are being sent.
+        """
+        if entry.path is None:
+            return entry
+        return CachedResult(
+            entry.database_name,
+            entry.table_name,
+            entry.size,
+            entry.expires_at,
+            buffer=pa.memory_map(entry.path).read_buffer(),
+        )
+
+    def put_records(
+        self,
+        key: str,
+        database_name: str,
+        table_name: str,
+        record_batch: pa.RecordBatch,
+    ) -> None:
+        """Cache records that were returned inline."""
+        if not self.caches(database_name, table_name):
+            return
+        expires_at = self._expires_at(database_name, table_name)
+        buffer = record_batch.serialize()
+        size = buffer.size
+        if size > self.max_bytes:
+            return
+        path = None
+        if self.directory is not None:
+            path = os.path.join(self.directory, key + _SUFFIX)
+            with open(path, "wb") as fout:
+                fout.write(buffer)
+            buffer = None
+        self._add(
+            key,
+            CachedResult(
+                database_name,
+                table_name,
+                size,
+                expires_at,
+                buffer=buffer,
+                path=path,
+            ),
+        )
+
+    def put_remote(
+        self,
+        key: str,
+        database_name: str,
+        table_name: str,
+        remote_blocks: List[Dict],
+        encryption_key: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Cache the location of spilled records, if `cache_spilled`."""
+        if not self.cache_spilled or not self.caches(database_name, table_name):
+            return
+        expires_at = self._expires_at(database_name, table_name)
+        size = len(json.dumps(remote_blocks))
+        self._add(
+            key,
+            CachedResult(
+                database_name,
+                table_name,
+                size,
+                expires_at,
+                remote_blocks=remote_blocks,
+                encryption_key=encryption_key,
+            ),
+        )
+
+    def caches(self, database_name: str, table_name: str) -> bool:
+        """False if results of the given table are never cached (a TTL of 0)."""
+        ttl = self.ttl_for(database_name, table_name)
+        return ttl is None or ttl > 0
+
+    def _expires_at(self, database_name: str, table_name: str) -> Optional[float]:
+        ttl = self.ttl_for(database_name, table_name)
+        return None if ttl is None else self._clock() + ttl
+
+    def _add(self, key: str, entry: CachedResult) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate_table(
+        self, database_name: Optional[str] = None, table_name: Optional[str] = None
+    ) -> None:
+        """
+        Invalidate everything cached for a database, or a single table in it.
+        With no arguments, the whole cache is invalidated.
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if database_name is not None and entry.database_name != database_name:
+                    continue
+                if table_name is not None and entry.table_name != table_name:
+                    continue
+                self._remove(key)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,116 @@
+from typing import Any, Iterable, Iterator, List, Optional
+
+import pyarrow as pa
+
+from athena.federation.converters import build_converters
+
+DEFAULT_ROWS_PER_BATCH = 10_000
+DEFAULT_BYTES_PER_BATCH = 4 * 1024 * 1024  # 4MB
+
+
+def projected_schema(schema: pa.Schema, columns: Optional[List[str]]) -> pa.Schema:
+    """
+    The fields of `schema` named in `columns`, in that order - or the whole schema if `columns` is None.
+    """
+    if columns is None:
+        return schema
+    return pa.schema([schema.field(name) for name in columns], metadata=schema.metadata)
+
+
+class RowBatcher:
+    """
+    RowBatcher turns rows into column-oriented RecordBatches.
+
+    Rows can either be tuples (or lists) with values in the same order as the schema,
+    or dictionaries keyed by column name. Tuples must have a value for every column,
+    otherwise a `ValueError` names the row that doesn't. Rows are buffered as-is and only transposed
+    into columns when a batch is cut, which happens at `rows_per_batch` rows or
+    (approximately) `bytes_per_batch` bytes, whichever comes first.
+
+    ```
+    batcher = RowBatcher(schema)
+    for row in rows:
+        batch = batcher.append(row)
+        if batch is not None:
+            yield batch
+    batch = batcher.flush()
+    ```
+
+    Or, more simply: `yield from RowBatcher(schema).batches(rows)`
+    """
+
+    def __init__(
+        self,
+        schema: pa.Schema,
+        rows_per_batch: int = DEFAULT_ROWS_PER_BATCH,
+        bytes_per_batch: Optional[int] = DEFAULT_BYTES_PER_BATCH,
+    ) -> None:
+        self._schema = schema
+        self._converters = build_converters(schema)
+        self._rows_per_batch = rows_per_batch
+        self._bytes_per_batch = bytes_per_batch
+        # We don't know how big rows are until we've built a batch, so the first
+        # batch is cut on row count only and later ones are sized from it.
+        self._row_limit = rows_per_batch
+        self._rows: List[Any] = []
+        # Rows in the batches already cut, to report the index of a bad row
+        self._rows_flushed = 0
+
+    def append(self, row: Any) -> Optional[pa.RecordBatch]:
+        """
+        Add a row, returning a RecordBatch if this row filled one up.
+        """
+        self._rows.append(row)
+        if len(self._rows) >= self._row_limit:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[pa.RecordBatch]:
+        """
+        Return any buffered rows as a RecordBatch, or None if there aren't any.
+        """
+        if not self._rows:
+            return None
+        rows, self._rows = self._rows, []
+        columns = self._transpose(rows)
+        self._rows_flushed += len(rows)
+        batch = pa.RecordBatch.from_arrays(
+            [
+                converter.convert(values)
+                for converter, values in zip(self._converters, columns)
+            ],
+            schema=self._schema,
+        )
+        if self._bytes_per_batch and batch.nbytes:
+            bytes_per_row = batch.nbytes / batch.num_rows
+            self._row_limit = max(
+                1,
+                min(self._rows_per_batch, int(self._bytes_per_batch / bytes_per_row)),
+            )
+        return batch
+
+    def batches(self, rows: Iterable[Any]) -> Iterator[pa.RecordBatch]:
+        """
+        Batch up all the given rows.
+        """
+        for row in rows:
+            batch = self.append(row)
+            if batch is not None:
+                yield batch
+        batch = self.flush()
+        if batch is not None:
+            yield batch
+
+    def _transpose(self, rows: List[Any]) -> List[Any]:
+        if isinstance(rows[0], dict):
+            return [[row.get(name) for row in rows] for name in self._schema.names]
+        # zip would silently cut every column down to the shortest row
+        width = len(self._schema)
+        if any(length != width for length in set(map(len, rows))):
+            index = next(i for i, row in enumerate(rows) if len(row) != width)
+            raise ValueError(
+                f"Row {self._rows_flushed + index} has {len(rows[index])} values, "
+                f"but the schema has {width} columns: {self._schema.names}"
+            )
+        # zip does the transposition in C
+        return list(zip(*rows))
@@ -0,0 +1,97 @@
+from typing import Iterable, List, Optional
+
+import pyarrow as pa
+
+# Types Athena can read from a connector, apart from the nested ones (struct, list and map).
+_SUPPORTED = [
+    pa.types.is_boolean,
+    pa.types.is_signed_integer,
+    pa.types.is_floating,
+    pa.types.is_decimal128,
+    pa.types.is_string,
+    pa.types.is_binary,
+    pa.types.is_date,
+    pa.types.is_timestamp,
+]
+
+# Types with a close supported alternative
+_ALTERNATIVES = [
+    (
+        pa.types.is_unsigned_integer,
+        "use a signed integer type wide enough for its values",
+    ),
+    (pa.types.is_large_string, "use pa.string()"),
+    (pa.types.is_large_binary, "use pa.binary()"),
+    (pa.types.is_large_list, "use pa.list_()"),
+    (pa.types.is_fixed_size_list, "use pa.list_()"),
+    (pa.types.is_dictionary, "use the dictionary's value type"),
+    (pa.types.is_time, "use a timestamp, or a string"),
+]
+
+
+class SchemaValidationError(ValueError):
+    """
+    Raised when a table's schema has columns Athena can't read.
+    """
+
+    def __init__(self, table_name: str, problems: List[str]) -> None:
+        self.table_name = table_name
+        self.problems = problems
+        super().__init__(
+            f"Schema of {table_name} is not supported by Athena: " + "; ".join(problems)
+        )
+
+
+def unsupported_type_reason(data_type: pa.DataType) -> Optional[str]:
+    """
+    Why Athena can't read a column of `data_type` (looking inside nested types), or None if it can.
+    """
+    float16 = pa.types.is_floating(data_type) and data_type.bit_width == 16
+    if any(is_type(data_type) for is_type in _SUPPORTED) and not float16:
+        return None
+    if pa.types.is_struct(data_type):
+        if data_type.num_fields == 0:
+            return "structs need at least one field"
+        for field in data_type:
+            reason = unsupported_type_reason(field.type)
+            if reason is not None:
+                return f"field {field.name}: {reason}"
+        return None
+    if pa.types.is_list(data_type):
+        reason = unsupported_type_reason(data_type.value_type)
+        return None if reason is None else f"list values: {reason}"
+    if pa.types.is_map(data_type):
+        for part, part_type in (
+            ("keys", data_type.key_type),
+            ("values", data_type.item_type),
+        ):
+            reason = unsupported_type_reason(part_type)
+            if reason is not None:
+                return f"map {part}: {reason}"
+        return None
+    for is_type, alternative in _ALTERNATIVES:
+        if is_type(data_type):
+            return f"{data_type} is not supported, {alternative}"
+    return f"{data_type} is not supported"
+
+
+def validate_schema(
+    schema: pa.Schema, partition_columns: Iterable[str] = ()
+) -> List[str]:
+    """
+    Check that Athena can read every column of `schema`, and that the partition columns are part of it.
+    Returns a list of problems, empty if the schema is fine.
+    """
+    problems = []
+    seen = set()
+    for field in schema:
+        if field.name in seen:
+            problems.append(f"duplicate column {field.name}")
+        seen.add(field.name)
+        reason = unsupported_type_reason(field.type)
+        if reason is not None:
+            problems.append(f"column {field.name}: {reason}")
+    for column in partition_columns:
+        if column not in seen:
+            problems.append(f"partition column {column} is not in the schema")
+    return problems
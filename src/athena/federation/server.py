@@ -0,0 +1,295 @@
+"""
+Serve a handler over HTTP, for running a connector in a container rather than in Lambda.
+
+    python -m athena.federation.server my_module:MyDataSource --spill-bucket my-bucket --workers 16
+
+accepts the same JSON events as the Lambda function, POSTed to `/` (or to the path of the Lambda
+Runtime Interface Emulator, so the same `curl` commands work), and returns the same responses.
+The process stays up, so metadata caches, result caches and connections last across requests.
+
+`GET /health` is for load balancer health checks, `GET /metrics` returns request counts and latencies,
+and the SDK's timings and counters (see `RequestMetrics`) aggregated per request type.
+"""
+
+import argparse
+import copy
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+
+from athena.federation.cache import MetadataCache
+from athena.federation.cli import load_data_source, peak_rss_bytes, percentile
+from athena.federation.instrumentation import MetricsSink, RequestMetrics
+from athena.federation.lambda_handler import AthenaLambdaHandler
+
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+
+# Latencies kept per request type for percentiles
+LATENCY_SAMPLES = 1000
+
+# The Lambda Runtime Interface Emulator's invocation path
+INVOKE_PATHS = ("/", "/2015-03-31/functions/function/invocations")
+
+
+class ServerStats(MetricsSink):
+    """
+    Request counts, errors and latencies per request type, plus the totals of the SDK's
+    `RequestMetrics`. Metrics are passed on to the handler's own sink, if it has one.
+    """
+
+    def __init__(self, downstream: Optional[MetricsSink] = None) -> None:
+        self.downstream = downstream
+        self.started_at = time.time()
+        self.in_flight = 0
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=LATENCY_SAMPLES)
+        )
+        self.timings: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(
+        self, request_type: str, seconds: float, error: bool = False
+    ) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[request_type] += 1
+            if error:
+                self.errors[request_type] += 1
+            self.latencies[request_type].append(seconds)
+
+    def emit(self, metrics: RequestMetrics) -> None:
+        with self._lock:
+            for name, seconds in metrics.timings.items():
+                self.timings[metrics.request_type][name] += seconds
+            counters = self.counters[metrics.request_type]
+            for name, value in metrics.counters.items():
+                if "_peak_" in name:
+                    # High-water marks: keep the highest, adding them up means nothing
+                    counters[name] = max(counters[name], value)
+                else:
+                    counters[name] += value
+        if self.downstream is not None:
+            self.downstream.emit(metrics)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            request_types = {}
+            for request_type, count in self.requests.items():
+                latencies = list(self.latencies[request_type])
+                request_types[request_type] = {
+                    "requests": count,
+                    "errors": self.errors[request_type],
+                    "latency_ms": {
+                        f"p{pct}": percentile(latencies, pct) * 1000
+                        for pct in (50, 90, 99)
+                    },
+                    "timings_seconds": dict(self.timings[request_type]),
+                    "counters": dict(self.counters[request_type]),
+                }
+            return {
+                "uptime_seconds": time.time() - self.started_at,
+                "in_flight": self.in_flight,
+                "requests": request_types,
+            }
+
+
+class AthenaHTTPServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server that passes Athena events to `handler`.
+
+    Every connection gets a thread, but at most `workers` requests are processed at once -
+    the others wait for a free worker, or get a 503 after `queue_timeout` seconds if it's set.
+    Each request is processed by a (shallow) copy of the handler, which shares its data source,
+    caches and spill client, since the handler keeps the event being processed as state.
+    Any `response_format` works, but with "bytes" responses are sent as they are, without re-encoding.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        handler: AthenaLambdaHandler,
+        address=("0.0.0.0", DEFAULT_PORT),
+        workers: int = DEFAULT_WORKERS,
+        queue_timeout: Optional[float] = None,
+        log_requests: bool = False,
+    ) -> None:
+        super().__init__(address, _RequestHandler)
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.log_requests = log_requests
+        # Wraps the handler's own sink, which still gets the metrics of every request
+        self.stats = ServerStats(handler.metrics_sink)
+        self.handler = copy.copy(handler)
+        self.handler.metrics_sink = self.stats
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def invoke(self, event: Dict[str, Any]) -> bytes:
+        handler = copy.copy(self.handler)
+        response = handler.process_event(event)
+        if isinstance(response, (bytes, bytearray)):
+            return response
+        if isinstance(response, str):
+            return response.encode("utf-8")
+        return json.dumps(response).encode("utf-8")
+
+    def acquire_worker(self) -> bool:
+        return self._slots.acquire(timeout=self.queue_timeout)
+
+    def release_worker(self) -> None:
+        self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = self.stats.as_dict()
+        metrics["workers"] = self.workers
+        metrics["arrow_allocated_bytes"] = pa.total_allocated_bytes()
+        metrics["peak_rss_bytes"] = peak_rss_bytes()
+        for name in ("metadata_cache", "result_cache"):
+            cache = getattr(self.handler, name, None)
+            if cache is not None:
+                metrics[name] = cache.stats()
+        return metrics
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # Keep connections open, e.g. behind a load balancer
+    protocol_version = "HTTP/1.1"
+    server: AthenaHTTPServer
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.server.metrics())
+        else:
+            self._send_json(404, {"errorMessage": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path not in INVOKE_PATHS:
+            self._send_json(404, {"errorMessage": f"Not found: {self.path}"})
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            event = json.loads(body)
+        except ValueError as e:
+            self._send_json(400, {"errorMessage": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(event, dict):
+            self._send_json(400, {"errorMessage": "The event must be a JSON object"})
+            return
+
+        if not self.server.acquire_worker():
+            self._send_json(503, {"errorMessage": "All workers are busy"})
+            return
+        request_type = str(event.get("@type"))
+        stats = self.server.stats
+        stats.request_started()
+        start = time.perf_counter()
+        try:
+            response = self.server.invoke(event)
+        except Exception as e:
+            stats.request_finished(
+                request_type, time.perf_counter() - start, error=True
+            )
+            traceback.print_exc()
+            # The same format as a Lambda function error
+            self._send_json(
+                500,
+                {
+                    "errorMessage": str(e),
+                    "errorType": type(e).__name__,
+                    "stackTrace": traceback.format_tb(e.__traceback__),
+                },
+            )
+            return
+        finally:
+            self.server.release_worker()
+        stats.request_finished(request_type, time.perf_counter() - start)
+        self._send(200, response)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(body).encode("utf-8"))
+
+    def _send(self, status: int, body) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.log_requests:
+            super().log_message(format, *args)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("data_source", help="module:ClassName of your data source")
+    parser.add_argument(
+        "--spill-bucket",
+        default=os.environ.get("TARGET_BUCKET"),
+        help="defaults to $TARGET_BUCKET",
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--warm",
+        action="append",
+        default=[],
+        metavar="DATABASE.TABLE",
+        help="load and encode the schema of a table on startup (repeatable)",
+    )
+    parser.add_argument("--log-requests", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.spill_bucket:
+        parser.error("--spill-bucket (or $TARGET_BUCKET) is required")
+
+    handler = AthenaLambdaHandler(
+        load_data_source(args.data_source),
+        args.spill_bucket,
+        metadata_cache=MetadataCache(),
+        response_format="bytes",
+    )
+    handler.warm(tables=[tuple(table.split(".", 1)) for table in args.warm])
+
+    server = AthenaHTTPServer(
+        handler,
+        (args.host, args.port),
+        workers=args.workers,
+        log_requests=args.log_requests,
+    )
+    # Containers are stopped with SIGTERM. shutdown() waits for serve_forever, so it needs its own thread.
+    signal.signal(
+        signal.SIGTERM,
+        lambda *_: threading.Thread(target=server.shutdown).start(),
+    )
+    print(f"Listening on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
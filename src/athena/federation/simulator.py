@@ -0,0 +1,322 @@
+"""
+Play the Athena federation protocol against a handler locally, without AWS.
+
+    python -m athena.federation.simulator my_module:MyDataSource --database db --table t
+
+runs a full query against `MyDataSource`: Ping, ListSchemas, ListTables, GetTable, GetTableLayout,
+GetSplits (following continuation tokens) and then a ReadRecords request for every split, run concurrently.
+Spilled blocks are written to a local directory and read back, like Athena would.
+"""
+
+import argparse
+import base64
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import pyarrow as pa
+
+from athena.federation.cli import load_data_source, peak_rss_bytes, percentile
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.spill import LocalSpillClient, read_block
+from athena.federation.utils import AthenaSDKUtils
+import athena.federation.models as models
+
+DEFAULT_CONCURRENCY = 8
+
+# Lambda's response payload limit
+MAX_RESPONSE_BYTES = 6 * 1024 * 1024
+
+
+class SimulationReport:
+    """
+    What happened during a simulated query.
+
+    `rows` and `bytes` count the records read back from every split, where bytes are
+    the size of the Arrow IPC data Athena would have received (inline or spilled).
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.bytes = 0
+        self.spilled_bytes = 0
+        self.splits = 0
+        self.spilled_splits = 0
+        self.read_seconds = 0.0
+        self.max_response_bytes = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.peak_rss_bytes: Optional[int] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.read_seconds if self.read_seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.read_seconds if self.read_seconds else 0.0
+
+    @property
+    def spill_ratio(self) -> float:
+        """The fraction of splits whose records were spilled."""
+        return self.spilled_splits / self.splits if self.splits else 0.0
+
+    def latency(self, request_type: str) -> Dict[str, float]:
+        values = self.latencies.get(request_type, [])
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values, default=0.0),
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "spilledBytes": self.spilled_bytes,
+            "splits": self.splits,
+            "spilledSplits": self.spilled_splits,
+            "spillRatio": self.spill_ratio,
+            "readSeconds": self.read_seconds,
+            "rowsPerSecond": self.rows_per_second,
+            "bytesPerSecond": self.bytes_per_second,
+            "maxResponseBytes": self.max_response_bytes,
+            "peakRssBytes": self.peak_rss_bytes,
+            "latencies": {
+                request_type: self.latency(request_type)
+                for request_type in self.latencies
+            },
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.rows} rows, {self.bytes / 1024 / 1024:.2f} MB from {self.splits} splits "
+            f"in {self.read_seconds:.3f}s",
+            f"{self.rows_per_second:,.0f} rows/s, {self.bytes_per_second / 1024 / 1024:.2f} MB/s",
+            f"Spilled {self.spilled_splits}/{self.splits} splits ({self.spill_ratio:.0%}), "
+            f"{self.spilled_bytes / 1024 / 1024:.2f} MB",
+            f"Largest response: {self.max_response_bytes / 1024 / 1024:.2f} MB",
+        ]
+        if self.peak_rss_bytes is not None:
+            lines.append(f"Peak RSS: {self.peak_rss_bytes / 1024 / 1024:.1f} MB")
+        for request_type in self.latencies:
+            stats = self.latency(request_type)
+            lines.append(
+                f"{request_type}: n={stats['count']} p50={stats['p50'] * 1000:.1f}ms "
+                f"p90={stats['p90'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms "
+                f"max={stats['max'] * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+class QuerySimulator:
+    """
+    QuerySimulator drives an `AthenaLambdaHandler` the way Athena does for a single query.
+
+    Every request is processed by a copy of the handler, so requests can run concurrently
+    like they would on separate Lambda invocations, while still sharing caches. Spill blocks are
+    written under `spill_dir` (a temporary directory by default) instead of S3.
+    Responses are JSON-encoded like the Lambda runtime does, so the size of the largest one is reported.
+    """
+
+    def __init__(
+        self,
+        handler: AthenaLambdaHandler,
+        spill_dir: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        page_size: int = -1,
+        catalog_name: str = "athena_python_sdk",
+    ) -> None:
+        self.handler = handler
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="athena-spill-")
+        self.spill_client = LocalSpillClient(self.spill_dir)
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.catalog_name = catalog_name
+        self.query_id = str(uuid4())
+
+    def request(
+        self, request_type: str, report: SimulationReport, **fields
+    ) -> Dict[str, Any]:
+        """Send a single request to (a copy of) the handler and time it."""
+        event = {
+            "@type": request_type,
+            "catalogName": self.catalog_name,
+            "queryId": self.query_id,
+            **fields,
+        }
+        handler = copy.copy(self.handler)
+        handler.spill_client = self.spill_client
+        start = time.perf_counter()
+        response = handler.process_event(event)
+        if isinstance(response, (str, bytes, bytearray)):
+            # The handler encoded the response itself (`response_format`)
+            encoded = response
+            response = json.loads(response)
+        else:
+            encoded = json.dumps(response)
+        report.latencies[request_type].append(time.perf_counter() - start)
+        report.max_response_bytes = max(report.max_response_bytes, len(encoded))
+        if len(encoded) > MAX_RESPONSE_BYTES:
+            print(
+                f"WARNING: {request_type} response is {len(encoded)} bytes, "
+                f"larger than Lambda's {MAX_RESPONSE_BYTES} byte limit"
+            )
+        return response
+
+    def run(
+        self,
+        database_name: str,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        constraints: Optional[Dict] = None,
+        limit: Optional[int] = None,
+    ) -> SimulationReport:
+        """
+        Simulate `SELECT <columns> FROM database_name.table_name WHERE <constraints> LIMIT <limit>`.
+
+        `constraints` are in Athena's format: `{"summary": {column: value set}}`.
+        The limit is only sent if the connector advertises support for it, like Athena does.
+        """
+        self.query_id = str(uuid4())
+        report = SimulationReport()
+        table = {"schemaName": database_name, "tableName": table_name}
+        constraints = constraints or {"summary": {}}
+
+        self.request("PingRequest", report)
+        capabilities = self.request("GetDataSourceCapabilitiesRequest", report)
+        if limit is not None and models.LIMIT_PUSHDOWN in capabilities["capabilities"]:
+            constraints = {**constraints, "limit": limit}
+        schemas = self.request("ListSchemasRequest", report)["schemas"]
+        if database_name not in schemas:
+            raise ValueError(f"Database {database_name} not in {schemas}")
+
+        table_names = []
+        next_token = None
+        while True:
+            response = self.request(
+                "ListTablesRequest",
+                report,
+                schemaName=database_name,
+                pageSize=self.page_size,
+                nextToken=next_token,
+            )
+            table_names.extend(t["tableName"] for t in response["tables"])
+            next_token = response.get("nextToken")
+            if next_token is None:
+                break
+        if table_name not in table_names:
+            raise ValueError(f"Table {table_name} not in {database_name}")
+
+        table_response = self.request("GetTableRequest", report, tableName=table)
+        schema = AthenaSDKUtils.parse_encoded_schema(table_response["schema"]["schema"])
+        if columns is not None:
+            schema = pa.schema([schema.field(name) for name in columns])
+        encoded_schema = {"schema": AthenaSDKUtils.encode_schema(schema)}
+
+        layout = self.request(
+            "GetTableLayoutRequest",
+            report,
+            tableName=table,
+            constraints=constraints,
+            partitionCols=table_response.get("partitionColumns", []),
+        )
+
+        splits = []
+        continuation_token = None
+        while True:
+            response = self.request(
+                "GetSplitsRequest",
+                report,
+                tableName=table,
+                partitions=layout["partitions"],
+                partitionCols=table_response.get("partitionColumns", []),
+                constraints=constraints,
+                continuationToken=continuation_token,
+            )
+            splits.extend(response["splits"])
+            continuation_token = response.get("continuationToken")
+            if continuation_token is None:
+                break
+
+        def read(split):
+            response = self.request(
+                "ReadRecordsRequest",
+                report,
+                tableName=table,
+                schema=encoded_schema,
+                split=split,
+                constraints=constraints,
+            )
+            return self._read_back(response, schema)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for rows, size, spilled in executor.map(read, splits):
+                report.rows += rows
+                report.bytes += size
+                report.splits += 1
+                if spilled:
+                    report.spilled_splits += 1
+                    report.spilled_bytes += size
+        report.read_seconds = time.perf_counter() - start
+        report.peak_rss_bytes = peak_rss_bytes()
+        return report
+
+    def _read_back(self, response: Dict[str, Any], schema: pa.Schema):
+        """
+        Decode the records in a ReadRecords response like Athena would.
+        Returns the number of rows, their size in bytes and whether they were spilled.
+        """
+        if response["@type"] == "ReadRecordsResponse":
+            records = response["records"]
+            batch = AthenaSDKUtils.decode_pyarrow_records(
+                records["schema"], records["records"]
+            )
+            return batch.num_rows, len(base64.b64decode(records["records"])), False
+
+        rows = size = 0
+        for block in response["remoteBlocks"]:
+            with open(self.spill_client.path(block["bucket"], block["key"]), "rb") as f:
+                data = f.read()
+            rows += read_block(data, schema, response["encryptionKey"]).num_rows
+            size += len(data)
+        return rows, size, True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("data_source", help="module:ClassName of your data source")
+    parser.add_argument("--database", required=True)
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--columns", help="comma-separated columns to select")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--spill-dir")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    handler = AthenaLambdaHandler(load_data_source(args.data_source), "local-spill")
+    simulator = QuerySimulator(
+        handler, spill_dir=args.spill_dir, concurrency=args.concurrency
+    )
+    report = simulator.run(
+        args.database,
+        args.table,
+        columns=args.columns.split(",") if args.columns else None,
+        limit=args.limit,
+    )
+    print(json.dumps(report.as_dict(), indent=2) if args.json else report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import base64
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+
+from athena.federation.instrumentation import RequestMetrics, current_metrics
+
+DEFAULT_MAX_CONCURRENT_UPLOADS = 4
+
+# Arrow IPC buffer compression codecs
+SPILL_COMPRESSION_CODECS = ("lz4", "zstd")
+
+# Same as the Java SDK: AES-256-GCM with a 96 bit nonce and 128 bit tag
+ENCRYPTION_KEY_BYTES = 32
+ENCRYPTION_NONCE_BYTES = 12
+
+
+def generate_encryption_key() -> Dict[str, str]:
+    """
+    Generate a random spill encryption key, in the format Athena expects.
+    """
+    return {
+        "key": base64.b64encode(os.urandom(ENCRYPTION_KEY_BYTES)).decode("utf-8"),
+        "nonce": base64.b64encode(os.urandom(ENCRYPTION_NONCE_BYTES)).decode("utf-8"),
+    }
+
+
+def _aes_gcm(encryption_key: Dict[str, str]):
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise ImportError(
+            "Spill encryption requires the `cryptography` package: pip install cryptography"
+        )
+    return AESGCM(base64.b64decode(encryption_key["key"])), base64.b64decode(
+        encryption_key["nonce"]
+    )
+
+
+def encrypt_block(data, encryption_key: Dict[str, str]) -> bytes:
+    aes, nonce = _aes_gcm(encryption_key)
+    # The authentication tag is appended to the ciphertext, like Java's AES/GCM/NoPadding
+    return aes.encrypt(nonce, bytes(data), None)
+
+
+def decrypt_block(data, encryption_key: Dict[str, str]) -> bytes:
+    aes, nonce = _aes_gcm(encryption_key)
+    return aes.decrypt(nonce, bytes(data), None)
+
+
+def serialize_block(
+    block: pa.RecordBatch,
+    compression: Optional[str] = None,
+    memory_pool: Optional[pa.MemoryPool] = None,
+):
+    """
+    Serialize a spill block to an Arrow IPC record batch message.
+
+    With `compression`, the message's buffers are compressed with LZ4 (frame) or ZSTD,
+    as described by the Arrow IPC format - readers decompress them transparently.
+    """
+    if compression is None:
+        return block.serialize(memory_pool=memory_pool)
+    # There's no way to serialize a single compressed message, so we write a stream
+    # and pick the record batch message out of it.
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_stream(sink, block.schema, options=options) as writer:
+        writer.write_batch(block)
+    reader = pa.ipc.MessageReader.open_stream(sink.getvalue())
+    reader.read_next_message()  # The schema
+    return reader.read_next_message().serialize()
+
+
+def read_block(
+    data, schema: pa.Schema, encryption_key: Optional[Dict[str, str]] = None
+) -> pa.RecordBatch:
+    """
+    Read a spill block written by `SpillUploader`, the way Athena does.
+    """
+    if encryption_key is not None:
+        data = decrypt_block(data, encryption_key)
+    return pa.ipc.read_record_batch(pa.py_buffer(data), schema)
+
+
+class SpillClient(ABC):
+    """
+    SpillClient writes a single serialized spill block to its destination.
+
+    The default implementation writes to S3, but you can provide your own - for example
+    to write to a local directory when testing your connector.
+    """
+
+    @abstractmethod
+    def write(self, bucket: str, key: str, data) -> None:
+        """
+        Write `data` (any bytes-like object) to `key` in `bucket`.
+        """
+        pass
+
+    def warm(self) -> None:
+        """
+        Do any expensive setup (imports, clients, connections) ahead of the first write.
+        """
+        pass
+
+
+class S3SpillClient(SpillClient):
+    """
+    Writes spill blocks to S3 with smart_open.
+
+    smart_open and boto3 take a while to import, so that's only done on the first write
+    (or `warm`) - most requests never spill. The boto3 client is created once and reused.
+    """
+
+    def __init__(self, client=None) -> None:
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import boto3
+
+                self._client = boto3.client("s3")
+            return self._client
+
+    def warm(self) -> None:
+        import smart_open  # noqa: F401
+
+        self.client
+
+    def write(self, bucket: str, key: str, data) -> None:
+        import smart_open
+
+        with smart_open.open(
+            f"s3://{bucket}/{key}", "wb", transport_params={"client": self.client}
+        ) as fout:
+            fout.write(data)
+
+
+class LocalSpillClient(SpillClient):
+    """
+    Writes spill blocks to `<root_dir>/<bucket>/<key>` on the local filesystem.
+    """
+
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = root_dir
+
+    def path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root_dir, bucket, key)
+
+    def write(self, bucket: str, key: str, data) -> None:
+        path = self.path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fout:
+            fout.write(data)
+
+
+class BlockUpload:
+    def __init__(self, key: str, size: int, seconds: float) -> None:
+        self.key = key
+        self.size = size
+        self.seconds = seconds
+
+    @property
+    def throughput(self) -> float:
+        """Upload throughput of this block in bytes per second."""
+        return self.size / self.seconds if self.seconds else 0.0
+
+
+class UploadStats:
+    """
+    Per-block upload latency and size for every block written by a `SpillUploader`.
+    """
+
+    def __init__(self) -> None:
+        self.blocks: List[BlockUpload] = []
+        self._lock = threading.Lock()
+
+    def record(self, upload: BlockUpload) -> None:
+        with self._lock:
+            self.blocks.append(upload)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(b.size for b in self.blocks)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(b.seconds for b in self.blocks)
+
+    @property
+    def throughput(self) -> float:
+        """
+        Aggregate throughput in bytes per second, based on the time spent uploading each block.
+
+        Note that blocks are uploaded concurrently, so wall clock throughput is usually higher.
+        """
+        return self.total_bytes / self.total_seconds if self.total_seconds else 0.0
+
+    def __str__(self) -> str:
+        if not self.blocks:
+            return "No spill blocks uploaded"
+        latencies = sorted(b.seconds for b in self.blocks)
+        return (
+            f"Uploaded {len(self.blocks)} spill blocks ({self.total_bytes} bytes), "
+            f"latency min/median/max: {latencies[0]:.3f}s/"
+            f"{latencies[len(latencies) // 2]:.3f}s/{latencies[-1]:.3f}s, "
+            f"throughput per block: {self.throughput / 1024 / 1024:.2f} MB/s"
+        )
+
+
+class SpillUploader:
+    """
+    SpillUploader serializes and uploads spill blocks on a bounded thread pool.
+
+    `submit` returns as soon as a block is queued so the data source can keep producing records
+    while earlier blocks are still being uploaded. At most `max_pending` blocks are queued or
+    in flight at once - once that's reached, `submit` blocks until an upload finishes.
+
+    Blocks can be compressed (`compression` is "lz4" or "zstd") and encrypted with AES-GCM
+    using `encryption_key`, the same way the Java SDK does. Like the Java SDK, every block of
+    a split is encrypted with the split's key and nonce.
+    """
+
+    def __init__(
+        self,
+        client: SpillClient,
+        max_workers: int = DEFAULT_MAX_CONCURRENT_UPLOADS,
+        max_pending: Optional[int] = None,
+        compression: Optional[str] = None,
+        encryption_key: Optional[Dict[str, str]] = None,
+        memory_pool: Optional[pa.MemoryPool] = None,
+    ) -> None:
+        if compression is not None and compression not in SPILL_COMPRESSION_CODECS:
+            raise ValueError(
+                f"compression must be one of {SPILL_COMPRESSION_CODECS}, not {compression!r}"
+            )
+        self._client = client
+        self._compression = compression
+        self._encryption_key = encryption_key
+        self._memory_pool = memory_pool
+        self._max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: List[Future] = []
+        self.stats = UploadStats()
+
+    def submit(self, bucket: str, key: str, block: pa.RecordBatch) -> None:
+        self._slots.acquire()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="spill"
+            )
+        try:
+            # Upload threads don't inherit the request's context, so pass its metrics along
+            future = self._executor.submit(
+                self._upload, bucket, key, block, current_metrics()
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _upload(
+        self,
+        bucket: str,
+        key: str,
+        block: pa.RecordBatch,
+        metrics: Optional[RequestMetrics] = None,
+    ) -> None:
+        start = time.perf_counter()
+        data = serialize_block(block, self._compression, self._memory_pool)
+        if self._encryption_key is not None:
+            data = encrypt_block(data, self._encryption_key)
+        self._client.write(bucket, key, data)
+        upload = BlockUpload(key, len(data), time.perf_counter() - start)
+        self.stats.record(upload)
+        if metrics is not None:
+            metrics.add_time("spill_upload", upload.seconds)
+            metrics.count("spill_blocks")
+            metrics.count("spill_bytes", upload.size)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of blocks queued or being uploaded."""
+        return sum(not future.done() for future in self._futures)
+
+    def wait(self) -> UploadStats:
+        """
+        Wait for all submitted blocks to be uploaded and shut down the thread pool.
+
+        Raises the first upload error, if any.
+        """
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            self._futures = []
+        return self.stats
@@ -1,35 +1,92 @@
 import base64
+import inspect
 from uuid import uuid4
 
 import pyarrow as pa
 
+from athena.federation.cache import TTLCache
+from athena.federation.converters import build_converters
+from athena.federation.instrumentation import timer
+
+# The same schemas get encoded and parsed over and over again (every ReadRecordsRequest
+# for a query carries the same schema), so we memoize both for the life of the process.
+SCHEMA_CACHE_SIZE = 256
+encoded_schema_cache = TTLCache(max_size=SCHEMA_CACHE_SIZE, ttl=None)
+parsed_schema_cache = TTLCache(max_size=SCHEMA_CACHE_SIZE, ttl=None)
+
 
 class AthenaSDKUtils:
-    def encode_pyarrow_object(pya_obj):
+    def serialize_pyarrow_object(pya_obj) -> pa.Buffer:
         """
-        Encodes either a PyArrow Schema or set of Records to Base64.
+        Serializes either a PyArrow Schema or set of Records to an Arrow IPC message.
         I'm not entirely sure why, but I had to cut off the first 4 characters
         of the `serialize()` output to be compatible with the Java SDK.
         """
-        return base64.b64encode(pya_obj.serialize().slice(4)).decode("utf-8")
+        with timer("ipc_serialization"):
+            # Slicing doesn't copy
+            return pya_obj.serialize().slice(4)
+
+    def encode_pyarrow_object(pya_obj):
+        """
+        Encodes either a PyArrow Schema or set of Records to Base64.
+        """
+        serialized = AthenaSDKUtils.serialize_pyarrow_object(pya_obj)
+        with timer("base64"):
+            return base64.b64encode(serialized).decode("utf-8")
+
+    def encode_schema(schema: pa.Schema) -> str:
+        """
+        Same as `encode_pyarrow_object`, but memoized.
+        """
+        cached = encoded_schema_cache.get(schema)
+        # Schemas compare equal regardless of their metadata, but the metadata is encoded too.
+        if cached is not None and cached[0].equals(schema, check_metadata=True):
+            return cached[1]
+        encoded = AthenaSDKUtils.encode_pyarrow_object(schema)
+        encoded_schema_cache.set(schema, (schema, encoded))
+        return encoded
 
     def parse_encoded_schema(b64_schema):
-        return pa.read_schema(pa.BufferReader(base64.b64decode(b64_schema)))
+        return parsed_schema_cache.get_or_load(
+            b64_schema,
+            lambda: pa.ipc.read_schema(pa.BufferReader(base64.b64decode(b64_schema))),
+        )
 
     def encode_pyarrow_records(pya_schema, record_hash):
-        # This is basically the same as pa.record_batch(data, names=['c0', 'c1', 'c2'])
+        # This is basically the same as pa.record_batch(data, schema=pya_schema),
+        # but converts nested and JSON-like values the same way records are.
         return pa.RecordBatch.from_arrays(
-            [pa.array(record_hash[name]) for name in pya_schema.names],
+            [
+                converter.convert(record_hash[converter.name])
+                for converter in build_converters(pya_schema)
+            ],
             schema=pya_schema,
         )
 
+    def to_record_batch(data) -> pa.RecordBatch:
+        """
+        Converts a dictionary of column lists, a Table or a RecordBatch to a single RecordBatch.
+        """
+        if isinstance(data, pa.RecordBatch):
+            return data
+        if isinstance(data, pa.Table):
+            batches = data.combine_chunks().to_batches(max_chunksize=None)
+            if not batches:
+                # No rows at all, so no batches either
+                return pa.RecordBatch.from_arrays(
+                    [pa.array([], type=field.type) for field in data.schema],
+                    schema=data.schema,
+                )
+            return batches[0]
+        return pa.RecordBatch.from_pydict(data)
+
     def decode_pyarrow_records(b64_schema, b64_records):
         """
         Decodes an encoded record set provided a similarly encoded schema.
         Returns just the records as the schema will be included with that
         """
         pa_schema = AthenaSDKUtils.parse_encoded_schema(b64_schema)
-        return pa.read_record_batch(base64.b64decode(b64_records), pa_schema)
+        return pa.ipc.read_record_batch(base64.b64decode(b64_records), pa_schema)
 
     def generate_spill_metadata(bucket_name: str, bucket_path: str) -> dict:
         """
@@ -41,3 +98,15 @@ class AthenaSDKUtils:
             "key": f"{bucket_path}/f{str(uuid4())}",
             "directory": True,
         }
+
+    def supported_kwargs(func, **kwargs) -> dict:
+        """
+        Returns only the keyword arguments that `func` accepts.
+
+        This lets us pass new, optional arguments to data source methods
+        without breaking implementations written against older versions of the SDK.
+        """
+        parameters = inspect.signature(func).parameters
+        if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values()):
+            return kwargs
+        return {k: v for k, v in kwargs.items() if k in parameters}
@@ -0,0 +1,9 @@
+import pytest
+
+from athena.federation.spill import LocalSpillClient
+
+
+@pytest.fixture
+def spill_client(tmp_path):
+    """Writes spill blocks under a temporary directory instead of S3."""
+    return LocalSpillClient(str(tmp_path))
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.async_data_source import AsyncAthenaDataSource
+from athena.federation.async_lambda_handler import AsyncAthenaLambdaHandler
+from athena.federation.cache import MetadataCache
+from athena.federation.spill import SpillClient
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema([("id", pa.int64())])
+
+
+class Source(AsyncAthenaDataSource):
+    async def databases(self):
+        await asyncio.sleep(0)
+        return ["db"]
+
+    async def tables(self, database_name):
+        return ["t"]
+
+    async def schema(self, database_name, table_name):
+        await asyncio.sleep(0)
+        return SCHEMA
+
+
+class NoSpills(SpillClient):
+    def write(self, bucket, key, data):
+        raise AssertionError("Nothing should be spilled")
+
+
+def make_handler():
+    return AsyncAthenaLambdaHandler(
+        Source(), "bucket", spill_client=NoSpills(), metadata_cache=MetadataCache()
+    )
+
+
+def list_schemas(handler):
+    return handler.process_event({"@type": "ListSchemasRequest", "catalogName": "c"})
+
+
+def test_warm_caches_resolved_values():
+    handler = make_handler()
+    handler.warm(tables=[("db", "t")])
+    assert list_schemas(handler)["schemas"] == ["db"]
+    response = handler.process_event(
+        {
+            "@type": "GetTableRequest",
+            "catalogName": "c",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+        }
+    )
+    assert response["@type"] == "GetTableResponse"
+
+
+def test_warm_async():
+    handler = make_handler()
+
+    async def main():
+        await handler.warm_async(tables=[("db", "t")])
+        return await handler.process_event_async(
+            {"@type": "ListSchemasRequest", "catalogName": "c"}
+        )
+
+    assert asyncio.run(main())["schemas"] == ["db"]
+
+
+class Records(Source):
+    """Yields `batches` batches of 10 ids, with a pause before each one."""
+
+    def __init__(self, batches=5, fail_after=None) -> None:
+        super().__init__()
+        self.batches = batches
+        self.fail_after = fail_after
+        self.produced = 0
+        self.closed = False
+
+    async def records(self, database_name, table_name, split):
+        try:
+            for i in range(self.batches):
+                if i == self.fail_after:
+                    raise RuntimeError("backend went away")
+                await asyncio.sleep(0.001)
+                self.produced += 1
+                yield {"id": list(range(i * 10, i * 10 + 10))}
+        finally:
+            self.closed = True
+
+
+class Rows(Source):
+    async def rows(self, database_name, table_name, split):
+        for i in range(25):
+            await asyncio.sleep(0)
+            yield (i,)
+
+
+def read_records(handler, limit=-1):
+    response = handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": {
+                "spillLocation": {"bucket": "bucket", "key": "query"},
+                "properties": {},
+            },
+            "constraints": {"summary": {}, "limit": limit},
+        }
+    )
+    records = response["records"]
+    return (
+        AthenaSDKUtils.decode_pyarrow_records(records["schema"], records["records"])
+        .column("id")
+        .to_pylist()
+    )
+
+
+def loop_threads():
+    return [t for t in threading.enumerate() if t.name == "event-loop"]
+
+
+def test_records_in_order():
+    source = Records()
+    handler = AsyncAthenaLambdaHandler(source, "bucket", spill_client=NoSpills())
+    assert read_records(handler) == list(range(50))
+    assert source.closed
+
+
+def test_rows_in_order():
+    handler = AsyncAthenaLambdaHandler(Rows(), "bucket", spill_client=NoSpills())
+    assert read_records(handler) == list(range(25))
+
+
+def test_records_async():
+    handler = AsyncAthenaLambdaHandler(Records(), "bucket", spill_client=NoSpills())
+
+    async def main():
+        return await handler.process_event_async(
+            {
+                "@type": "ReadRecordsRequest",
+                "catalogName": "c",
+                "tableName": {"schemaName": "db", "tableName": "t"},
+                "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+                "split": {"spillLocation": {"bucket": "b", "key": "k"}},
+            }
+        )
+
+    records = asyncio.run(main())["records"]
+    ids = AthenaSDKUtils.decode_pyarrow_records(records["schema"], records["records"])
+    assert ids.column("id").to_pylist() == list(range(50))
+
+
+def test_exception_in_records_reaches_the_caller():
+    source = Records(fail_after=2)
+    handler = AsyncAthenaLambdaHandler(source, "bucket", spill_client=NoSpills())
+    with pytest.raises(RuntimeError, match="backend went away"):
+        read_records(handler)
+    assert source.closed
+
+
+def test_stopping_early_closes_the_async_generator():
+    threads = len(loop_threads())
+    source = Records(batches=1000)
+    handler = AsyncAthenaLambdaHandler(source, "bucket", spill_client=NoSpills())
+    for _ in range(5):
+        source.closed = False
+        source.produced = 0
+        assert read_records(handler, limit=25) == list(range(25))
+        assert source.closed
+        # The next batch is prefetched, but nothing more
+        assert source.produced <= 4
+
+    async def tasks():
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    # Nothing left running on the loop, and requests share a single loop thread
+    assert handler._loop_thread.run(tasks()) == []
+    assert len(loop_threads()) == threads + 1
@@ -0,0 +1,67 @@
+import asyncio
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.async_data_source import AsyncAthenaDataSource
+from athena.federation.athena_data_source import AthenaDataSource
+
+SCHEMA = pa.schema([("id", pa.int64()), ("name", pa.string()), ("v", pa.int64())])
+
+ROWS = [(i, f"name-{i}", i * 10) for i in range(5)]
+
+
+def project(columns):
+    indexes = [SCHEMA.names.index(name) for name in columns or SCHEMA.names]
+    return [tuple(row[i] for i in indexes) for row in ROWS]
+
+
+class Rows(AthenaDataSource):
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def rows(self, database_name, table_name, split, columns=None):
+        return project(columns)
+
+
+class AsyncRows(AsyncAthenaDataSource):
+    async def databases(self):
+        return ["db"]
+
+    async def tables(self, database_name):
+        return ["t"]
+
+    async def schema(self, database_name, table_name):
+        return SCHEMA
+
+    async def rows(self, database_name, table_name, split, columns=None):
+        for row in project(columns):
+            yield row
+
+
+async def collect(batches):
+    return [batch async for batch in batches]
+
+
+def read(source, **kwargs):
+    batches = source.records("db", "t", {}, **kwargs)
+    if isinstance(source, AsyncAthenaDataSource):
+        batches = asyncio.run(collect(batches))
+    return pa.Table.from_batches(list(batches))
+
+
+@pytest.mark.parametrize("source", [Rows(), AsyncRows()], ids=["sync", "async"])
+@pytest.mark.parametrize("columns", [None, ["id", "v"], ["v", "name"]])
+def test_rows_of_projected_columns(source, columns):
+    table = read(source, columns=columns)
+    assert table.column_names == (columns or SCHEMA.names)
+    expected = pa.Table.from_pylist(
+        [dict(zip(SCHEMA.names, row)) for row in ROWS], schema=SCHEMA
+    ).select(columns or SCHEMA.names)
+    assert table.equals(expected)
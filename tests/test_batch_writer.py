@@ -0,0 +1,166 @@
+import json
+import sys
+import types
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from athena.federation.batch_writer import BatchWriter, is_dataframe, is_single_batch
+from athena.federation.encoding import encode_json
+from athena.federation.models import ReadRecordsResponse
+from athena.federation.spill import SpillUploader
+
+SCHEMA = pa.schema([("id", pa.int64()), ("name", pa.string())])
+
+EXPECTED = pa.RecordBatch.from_pydict(
+    {"id": [1, 2, 3], "name": ["a", "b", "c"]}, schema=SCHEMA
+)
+
+
+def make_writer(spill_client, **kwargs) -> BatchWriter:
+    return BatchWriter(
+        {"bucket": "bucket", "key": "query"},
+        SCHEMA,
+        uploader=SpillUploader(spill_client),
+        **kwargs,
+    )
+
+
+def written(writer: BatchWriter) -> pa.RecordBatch:
+    writer.close()
+    return writer.all_records()
+
+
+class ArrowStream:
+    """Some other library's table, exposing the Arrow C stream protocol."""
+
+    def __init__(self, table: pa.Table) -> None:
+        self.table = table
+
+    def __arrow_c_stream__(self, requested_schema=None):
+        return self.table.__arrow_c_stream__(requested_schema)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"id": [1, 2, 3], "name": ["a", "b", "c"]},
+        {"id": np.array([1, 2, 3]), "name": np.array(["a", "b", "c"], dtype=object)},
+        EXPECTED,
+        pa.Table.from_batches([EXPECTED.slice(0, 1), EXPECTED.slice(1)]),
+        ArrowStream(pa.Table.from_batches([EXPECTED])),
+    ],
+    ids=["dict", "numpy", "record_batch", "table", "arrow_c_stream"],
+)
+def test_write_rows_accepts_columnar_data(spill_client, data):
+    writer = make_writer(spill_client)
+    writer.write_rows(data)
+    assert written(writer).equals(EXPECTED)
+
+
+def test_write_rows_accepts_dataframes(spill_client):
+    pd = pytest.importorskip("pandas")
+    writer = make_writer(spill_client)
+    writer.write_rows(pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]}))
+    assert written(writer).equals(EXPECTED)
+
+
+def test_batches_are_reordered_and_cast_to_the_schema(spill_client):
+    writer = make_writer(spill_client)
+    writer.write_rows(
+        pa.record_batch(
+            [pa.array(["a", "b", "c"]), pa.array([1, 2, 3], type=pa.int32())],
+            names=["name", "id"],
+        )
+    )
+    assert written(writer).equals(EXPECTED)
+
+
+def test_single_batches():
+    assert is_single_batch({"id": [1]})
+    assert is_single_batch(EXPECTED)
+    assert is_single_batch(pa.Table.from_batches([EXPECTED]))
+    assert is_single_batch(ArrowStream(pa.Table.from_batches([EXPECTED])))
+    assert not is_single_batch([{"id": [1]}])
+    assert not is_single_batch(iter([EXPECTED]))
+
+
+def test_is_dataframe_with_pandas_partially_imported(monkeypatch):
+    # What another thread importing pandas leaves in sys.modules for a while
+    monkeypatch.setitem(sys.modules, "pandas", types.ModuleType("pandas"))
+    assert not is_dataframe({"id": [1]})
+    assert not is_single_batch([1])
+
+
+def test_limit_trims_and_stops_writing(spill_client):
+    writer = make_writer(spill_client, limit=4)
+    writer.write_rows(EXPECTED)
+    assert not writer.full
+    writer.write_rows(EXPECTED)
+    assert writer.full
+    writer.write_rows(EXPECTED)
+    assert written(writer).column("id").to_pylist() == [1, 2, 3, 1]
+
+
+def test_limit_stops_reading_a_table_once_full(spill_client):
+    writer = make_writer(spill_client, limit=2)
+    table = pa.Table.from_batches([EXPECTED] * 3)
+    writer.write_rows(table)
+    assert written(writer).num_rows == 2
+
+
+def response_bytes(records: pa.RecordBatch) -> int:
+    """The size of the ReadRecordsResponse Athena would receive for `records`."""
+    response = ReadRecordsResponse("catalog", SCHEMA, records).as_dict()
+    assert len(encode_json(response)) == len(json.dumps(response))
+    return len(json.dumps(response))
+
+
+def batch(start: int, rows: int) -> pa.RecordBatch:
+    ids = list(range(start, start + rows))
+    return pa.RecordBatch.from_pydict(
+        {"id": ids, "name": [f"name-{i}" * (i % 7) for i in ids]}, schema=SCHEMA
+    )
+
+
+@pytest.mark.parametrize("rows", [0, 1, 2, 3, 100, 10_000])
+def test_predicted_response_bytes(spill_client, rows):
+    writer = make_writer(spill_client, catalog_name="catalog")
+    writer.write_rows(batch(0, rows))
+    assert writer.predicted_response_bytes == response_bytes(writer.all_records())
+
+
+def test_predicted_response_bytes_of_several_batches(spill_client):
+    writer = make_writer(spill_client, catalog_name="catalog")
+    for i in range(10):
+        writer.write_rows(batch(i * 77, 77))
+    # The batches are combined into one, which can be a little smaller (padding)
+    actual = response_bytes(writer.all_records())
+    assert actual <= writer.predicted_response_bytes <= actual + 10 * 64
+
+
+@pytest.mark.parametrize("batches", [1, 10])
+def test_inline_or_spill_at_the_response_limit(spill_client, batches):
+    limit = response_bytes(pa.Table.from_batches([batch(0, 5000)]).to_batches()[0])
+
+    def write(max_inline_response_bytes):
+        writer = make_writer(
+            spill_client,
+            catalog_name="catalog",
+            max_inline_response_bytes=max_inline_response_bytes,
+        )
+        rows = 5000 // batches
+        for i in range(batches):
+            writer.write_rows(batch(i * rows, rows))
+        writer.close()
+        return writer
+
+    # Just fits
+    writer = write(limit)
+    assert not writer.spilled
+    assert response_bytes(writer.all_records()) == limit
+    # One byte too many
+    writer = write(limit - 1)
+    assert writer.spilled
+    assert writer.remote_blocks
@@ -0,0 +1,152 @@
+import pyarrow as pa
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.cache import MetadataCache, TTLCache
+from athena.federation.lambda_handler import AthenaLambdaHandler
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("a", "default") == "default"
+    assert len(cache) == 0
+
+
+def test_no_ttl():
+    clock = Clock()
+    cache = TTLCache(ttl=None, clock=clock)
+    cache.set("a", 1)
+    clock.now = 10**9
+    assert cache.get("a") == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # "a" is now the most recently used, so "b" goes
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    # Setting an existing key counts as a use too
+    cache.set("a", 4)
+    cache.set("d", 5)
+    assert cache.get("c") is None
+    assert (cache.get("a"), cache.get("d")) == (4, 5)
+    assert len(cache) == 2
+
+
+def test_stats_and_get_or_load():
+    cache = TTLCache()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return "value"
+
+    assert cache.get_or_load("a", load) == "value"
+    assert cache.get_or_load("a", load) == "value"
+    assert len(loads) == 1
+    # Falsy values are cached too
+    cache.set("none", None)
+    assert cache.get_or_load("none", load) is None
+    assert len(loads) == 1
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1}
+
+
+def test_invalidate():
+    cache = TTLCache()
+    for key in ["a", "b", "ab"]:
+        cache.set(key, key)
+    cache.invalidate(lambda key: key.startswith("a"))
+    assert (cache.get("a"), cache.get("ab"), cache.get("b")) == (None, None, "b")
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_invalidate_table():
+    cache = MetadataCache()
+    keys = [
+        ("databases",),
+        ("tables", "db", None, None),
+        ("schema", "db", "t1"),
+        ("schema", "db", "t2"),
+        ("partition_columns", "db", "t1"),
+        ("schema", "other", "t1"),
+    ]
+    for key in keys:
+        cache.set(key, key)
+
+    cache.invalidate_table("db", "t1")
+    assert [key for key in keys if cache.get(key) is None] == [
+        ("schema", "db", "t1"),
+        ("partition_columns", "db", "t1"),
+    ]
+
+    cache.invalidate_table("db")
+    assert [key for key in keys if cache.get(key) is not None] == [
+        ("databases",),
+        ("schema", "other", "t1"),
+    ]
+
+    cache.invalidate_table()
+    assert len(cache) == 0
+
+
+class Catalog(AthenaDataSource):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+        self.columns = ["a"]
+
+    def databases(self):
+        self.calls.append("databases")
+        return ["db"]
+
+    def tables(self, database_name):
+        self.calls.append("tables")
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        self.calls.append("schema")
+        return pa.schema([(name, pa.string()) for name in self.columns])
+
+
+def get_table(handler):
+    response = handler.process_event(
+        {
+            "@type": "GetTableRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+        }
+    )
+    return response["schema"]
+
+
+def test_handler_uses_the_metadata_cache():
+    source = Catalog()
+    cache = MetadataCache()
+    handler = AthenaLambdaHandler(source, "bucket", metadata_cache=cache)
+    first = get_table(handler)
+    assert get_table(handler) == first
+    assert source.calls == ["schema"]
+
+    source.columns = ["a", "b"]
+    cache.invalidate_table("db", "t")
+    assert get_table(handler) != first
+    assert source.calls == ["schema", "schema"]
@@ -0,0 +1,229 @@
+import datetime
+import logging
+import uuid
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.constraints import (
+    AllOrNoneValueSet,
+    Constraints,
+    EquatableValueSet,
+    SortedRangeSet,
+)
+from athena.federation.utils import AthenaSDKUtils
+
+
+def block(arrow_type, values):
+    """A single-column block, the way the Java SDK serializes constraint values."""
+    schema = pa.schema([("col1", arrow_type)])
+    return {
+        "aId": str(uuid.uuid4()),
+        "schema": AthenaSDKUtils.encode_pyarrow_object(schema),
+        "records": AthenaSDKUtils.encode_pyarrow_object(
+            pa.record_batch([pa.array(values, type=arrow_type)], schema=schema)
+        ),
+    }
+
+
+def marker(arrow_type, value, bound):
+    """A range bound. Unbounded sides have a null value."""
+    return {
+        "@type": "Marker",
+        "valueBlock": block(arrow_type, [value]),
+        "bound": bound,
+        "nullValue": value is None,
+    }
+
+
+def sorted_range_set(arrow_type, ranges, null_allowed=False):
+    return {
+        "@type": "SortedRangeSet",
+        "type": {"@type": "ArrowType$Int", "bitWidth": 64, "isSigned": True},
+        "ranges": [
+            {
+                "@type": "Range",
+                "low": marker(arrow_type, *low),
+                "high": marker(arrow_type, *high),
+            }
+            for low, high in ranges
+        ],
+        "nullAllowed": null_allowed,
+    }
+
+
+def equatable_value_set(arrow_type, values, white_list=True, null_allowed=False):
+    return {
+        "@type": "EquatableValueSet",
+        "valueBlock": block(arrow_type, values),
+        "whiteList": white_list,
+        "nullAllowed": null_allowed,
+    }
+
+
+def constraints(summary, limit=-1):
+    return Constraints.from_dict(
+        {"@type": "Constraints", "summary": summary, "limit": limit}
+    )
+
+
+BATCH = pa.record_batch(
+    {
+        "id": pa.array([1, 2, 3, 4, 5, None], type=pa.int64()),
+        "small": pa.array([1, 2, 3, 4, 5, None], type=pa.int32()),
+        "name": pa.array(["a", "b", "c", "d", "e", None]),
+        "day": pa.array(
+            [datetime.date(2024, 1, d) for d in range(1, 6)] + [None],
+            type=pa.date32(),
+        ),
+    }
+)
+
+
+def ids(summary):
+    return constraints(summary).filter(BATCH).column("id").to_pylist()
+
+
+def test_limit():
+    assert Constraints.from_dict({"summary": {}, "limit": 10}).limit == 10
+
+
+def test_no_limit():
+    # Athena sends -1 for "no limit"
+    assert Constraints.from_dict({"summary": {}, "limit": -1}).limit is None
+    assert Constraints.from_dict({"summary": {}}).limit is None
+    assert Constraints.from_dict(None).limit is None
+
+
+def test_parse():
+    parsed = constraints(
+        {
+            "id": sorted_range_set(
+                pa.int64(), [((2, "EXACTLY"), (None, "BELOW"))], null_allowed=True
+            ),
+            "name": equatable_value_set(pa.string(), ["a", "b"], white_list=False),
+            "day": {"@type": "AllOrNoneValueSet", "all": False, "nullAllowed": True},
+            "other": {"@type": "SomethingNew"},
+        },
+        limit=5,
+    )
+    assert parsed.limit == 5
+    assert "other" not in parsed
+    assert isinstance(parsed["id"], SortedRangeSet)
+    assert parsed["id"].null_allowed
+    [r] = parsed["id"].ranges
+    assert (r.low, r.high, r.low_inclusive) == (2, None, True)
+    assert isinstance(parsed["name"], EquatableValueSet)
+    assert parsed["name"].values == ["a", "b"]
+    assert not parsed["name"].white_list
+    assert isinstance(parsed["day"], AllOrNoneValueSet)
+    assert parsed.matches({"id": 7, "name": "c", "day": None})
+    assert not parsed.matches({"id": 7, "name": "a", "day": None})
+
+
+@pytest.mark.parametrize(
+    "ranges, expected",
+    [
+        # id = 3
+        ([((3, "EXACTLY"), (3, "EXACTLY"))], [3]),
+        # id > 3
+        ([((3, "ABOVE"), (None, "BELOW"))], [4, 5]),
+        # id <= 2
+        ([((None, "ABOVE"), (2, "EXACTLY"))], [1, 2]),
+        # id >= 2 AND id < 4
+        ([((2, "EXACTLY"), (4, "BELOW"))], [2, 3]),
+        # id < 2 OR id > 4
+        ([((None, "ABOVE"), (2, "BELOW")), ((4, "ABOVE"), (None, "BELOW"))], [1, 5]),
+        # id IS NOT NULL
+        ([((None, "ABOVE"), (None, "BELOW"))], [1, 2, 3, 4, 5]),
+        # No ranges at all
+        ([], []),
+    ],
+)
+def test_filter_ranges(ranges, expected):
+    assert ids({"id": sorted_range_set(pa.int64(), ranges)}) == expected
+
+
+def test_filter_null_allowed():
+    ranges = [((4, "EXACTLY"), (None, "BELOW"))]
+    summary = {"id": sorted_range_set(pa.int64(), ranges, null_allowed=True)}
+    assert ids(summary) == [4, 5, None]
+    # id IS NULL
+    summary = {"id": {"@type": "AllOrNoneValueSet", "all": False, "nullAllowed": True}}
+    assert ids(summary) == [None]
+
+
+def test_filter_equatable():
+    assert ids({"name": equatable_value_set(pa.string(), ["b", "d", "z"])}) == [2, 4]
+    assert ids(
+        {"name": equatable_value_set(pa.string(), ["b", "d"], white_list=False)}
+    ) == [1, 3, 5]
+
+
+def test_filter_several_columns():
+    day = datetime.date(2024, 1, 2)
+    summary = {
+        "day": sorted_range_set(pa.date32(), [((day, "ABOVE"), (None, "BELOW"))]),
+        "name": equatable_value_set(pa.string(), ["a", "c", "e"]),
+        "missing": equatable_value_set(pa.string(), ["x"]),
+    }
+    assert ids(summary) == [3, 5]
+
+
+@pytest.mark.parametrize(
+    "summary, expected",
+    [
+        # Bounds past the end of an int32
+        (
+            {
+                "small": sorted_range_set(
+                    pa.int64(), [((2**40, "EXACTLY"), (None, "BELOW"))]
+                )
+            },
+            [],
+        ),
+        (
+            {
+                "small": sorted_range_set(
+                    pa.int64(), [((None, "ABOVE"), (2**40, "BELOW"))]
+                )
+            },
+            [1, 2, 3, 4, 5],
+        ),
+        (
+            {
+                "small": sorted_range_set(
+                    pa.int64(), [((-(2**40), "ABOVE"), (2, "EXACTLY"))]
+                )
+            },
+            [1, 2],
+        ),
+        ({"small": equatable_value_set(pa.int64(), [2, 2**40])}, [2]),
+        (
+            {"small": equatable_value_set(pa.int64(), [2**40], white_list=False)},
+            [1, 2, 3, 4, 5],
+        ),
+        # Fractions with an integer column
+        (
+            {
+                "small": sorted_range_set(
+                    pa.float64(), [((None, "ABOVE"), (2.5, "BELOW"))]
+                )
+            },
+            [1, 2],
+        ),
+        ({"id": equatable_value_set(pa.float64(), [2.0, 2.5])}, [2]),
+    ],
+)
+def test_filter_values_outside_the_column_type(summary, expected):
+    assert ids(summary) == expected
+
+
+def test_filter_skips_incomparable_constraints(caplog):
+    summary = {
+        "day": equatable_value_set(pa.string(), ["not a date"]),
+        "id": sorted_range_set(pa.int64(), [((3, "EXACTLY"), (None, "BELOW"))]),
+    }
+    with caplog.at_level(logging.WARNING):
+        assert ids(summary) == [3, 4, 5]
+    assert "Not filtering on day" in caplog.text
@@ -0,0 +1,164 @@
+import datetime
+import decimal
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from athena.federation.converters import (
+    ColumnConversionError,
+    ColumnConverter,
+    build_converters,
+    cast_column,
+)
+
+
+def convert(data_type, values, **kwargs):
+    return ColumnConverter(pa.field("x", data_type), **kwargs).convert(values)
+
+
+@pytest.mark.parametrize(
+    "data_type, values",
+    [
+        (pa.int32(), [1, None, 3]),
+        (pa.int64(), [1, 2.0, 3]),
+        (pa.float64(), [1, 2.5, None]),
+        (pa.bool_(), [True, False, None]),
+        (pa.string(), ["a", None]),
+        (pa.int64(), [None, None]),
+    ],
+)
+def test_values_are_converted_to_the_field_type(data_type, values):
+    array = convert(data_type, values)
+    assert array.type == data_type
+    assert array.to_pylist() == [None if v is None else v for v in values]
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_out_of_range_integers_raise(strict):
+    with pytest.raises(ColumnConversionError) as e:
+        convert(pa.int32(), [1, 3_000_000_000], strict=strict)
+    assert e.value.column == "x"
+    assert e.value.row == 1
+    assert e.value.value == 3_000_000_000
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_floats_are_not_truncated_to_integers(strict):
+    with pytest.raises(ColumnConversionError) as e:
+        convert(pa.int64(), [1, 2.7, 3], strict=strict)
+    assert e.value.row == 1
+
+
+def test_strict_conversion_names_the_row():
+    with pytest.raises(ColumnConversionError) as e:
+        convert(pa.int64(), [1, 2, "three"], strict=True)
+    assert (e.value.row, e.value.value) == (2, "three")
+
+
+def test_non_strict_conversion_parses_numbers_as_strings():
+    assert convert(pa.int64(), ["1", "2"]).to_pylist() == [1, 2]
+
+
+def test_non_nullable_fields_reject_nulls():
+    converter = ColumnConverter(pa.field("x", pa.int64(), nullable=False))
+    with pytest.raises(ColumnConversionError) as e:
+        converter.convert([1, None])
+    assert e.value.row == 1
+
+
+def test_fast_primitives():
+    array = convert(pa.int32(), [1, 2, 3], fast_primitives=True)
+    assert array.type == pa.int32()
+    assert array.to_pylist() == [1, 2, 3]
+    # Columns with nulls take the regular path
+    assert convert(pa.int32(), [1, None], fast_primitives=True).to_pylist() == [1, None]
+
+
+def test_numpy_arrays():
+    assert convert(pa.int32(), np.array([1, 2, 3])).to_pylist() == [1, 2, 3]
+
+
+def test_arrow_arrays_are_cast_safely():
+    assert convert(pa.int32(), pa.array([1, 2])).type == pa.int32()
+    with pytest.raises(ColumnConversionError) as e:
+        convert(pa.int16(), pa.array([1, 70_000]))
+    assert (e.value.row, e.value.value) == (1, 70_000)
+
+
+def test_cast_column_names_the_first_value_out_of_range():
+    with pytest.raises(ColumnConversionError) as e:
+        cast_column(pa.array([1, 2, 300, 400]), pa.field("x", pa.int8()))
+    assert (e.value.column, e.value.row, e.value.value) == ("x", 2, 300)
+
+
+def test_build_converters():
+    schema = pa.schema([("id", pa.int64()), ("name", pa.string())])
+    assert [c.name for c in build_converters(schema)] == ["id", "name"]
+
+
+ORDER = pa.struct(
+    [
+        ("sku", pa.string()),
+        ("quantity", pa.int32()),
+        ("price", pa.decimal128(10, 2)),
+    ]
+)
+
+
+def test_nested_json_like_values():
+    values = [
+        {"sku": "a", "quantity": 1, "price": "1.50"},
+        None,
+        {"sku": "b", "quantity": None, "price": 2.25},
+    ]
+    array = convert(ORDER, values)
+    assert array.type == ORDER
+    assert array.to_pylist() == [
+        {"sku": "a", "quantity": 1, "price": decimal.Decimal("1.50")},
+        None,
+        {"sku": "b", "quantity": None, "price": decimal.Decimal("2.25")},
+    ]
+
+
+def test_lists_of_structs():
+    array = convert(pa.list_(ORDER), [[{"sku": "a", "price": "1"}], [], None])
+    assert array.to_pylist() == [
+        [{"sku": "a", "quantity": None, "price": decimal.Decimal("1.00")}],
+        [],
+        None,
+    ]
+
+
+def test_maps_from_dicts_or_pairs():
+    array = convert(pa.map_(pa.string(), pa.int64()), [{"a": 1}, [("b", 2)], None])
+    assert array.to_pylist() == [[("a", 1)], [("b", 2)], None]
+
+
+def test_timestamps_and_dates_as_strings():
+    utc = datetime.timezone.utc
+    timestamps = convert(
+        pa.timestamp("ms", tz="UTC"), ["2024-01-02T03:04:05Z", None]
+    ).to_pylist()
+    assert timestamps == [datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=utc), None]
+    dates = convert(pa.date32(), ["2024-01-02", datetime.datetime(2024, 1, 3)])
+    assert dates.to_pylist() == [datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)]
+
+
+@pytest.mark.parametrize(
+    "data_type, values",
+    [
+        (pa.list_(pa.int32()), [[1, 2.5]]),
+        (pa.struct([("n", pa.int8())]), [{"n": 1}, {"n": 300}]),
+        (pa.map_(pa.string(), pa.int16()), [{"a": 70_000}]),
+    ],
+)
+def test_nested_integers_are_checked(data_type, values):
+    with pytest.raises(ColumnConversionError):
+        convert(data_type, values)
+
+
+def test_nested_errors_name_the_row():
+    with pytest.raises(ColumnConversionError) as e:
+        convert(ORDER, [{"price": "1"}, {"price": "not a number"}], strict=True)
+    assert e.value.row == 1
@@ -0,0 +1,83 @@
+import base64
+import json
+import os
+
+import pyarrow as pa
+import pytest
+
+from athena.federation import encoding
+from athena.federation.encoding import (
+    CHUNK_SIZE,
+    Base64Payload,
+    b64encode_into,
+    base64_length,
+    encode_json,
+)
+
+SIZES = [0, 1, 2, 3, 4, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 2 * CHUNK_SIZE + 2]
+
+
+def expected(response):
+    """What the Lambda runtime would send for the same response with base64 strings."""
+
+    def encode(obj):
+        if isinstance(obj, Base64Payload):
+            return base64.b64encode(obj.data).decode("ascii")
+        raise TypeError
+
+    return json.dumps(response, default=encode).encode("utf-8")
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_b64encode_into(size):
+    data = os.urandom(size)
+    out = bytearray(b"-" * (base64_length(size) + 5))
+    assert b64encode_into(data, out, 2) == 2 + base64_length(size)
+    assert out == b"--" + base64.b64encode(data) + b"---"
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_payload_sizes(size):
+    payload = Base64Payload(os.urandom(size))
+    assert len(payload) == len(base64.b64encode(payload.data))
+    assert str(payload) == base64.b64encode(payload.data).decode("ascii")
+    response = {"@type": "ReadRecordsResponse", "records": {"records": payload}}
+    assert encode_json(response) == expected(response)
+
+
+def test_several_payloads():
+    response = {
+        "schema": Base64Payload(os.urandom(100)),
+        # More than 10, so placeholder 1 is a prefix of placeholder 10
+        "blocks": [Base64Payload(os.urandom(size)) for size in SIZES + [5, 6, 7]],
+        "unicode": "café ☃",
+        "empty": Base64Payload(b""),
+        "nested": {"list": [1, 2.5, None, True], "last": Base64Payload(b"x")},
+    }
+    assert encode_json(response) == expected(response)
+
+
+def test_small_chunks(monkeypatch):
+    # Every chunk boundary, with chunks small enough to have lots of them
+    monkeypatch.setattr(encoding, "CHUNK_SIZE", 3)
+    payloads = [Base64Payload(os.urandom(size)) for size in range(20)]
+    response = {"payloads": payloads}
+    assert encode_json(response) == expected(response)
+
+
+def test_arrow_buffers():
+    buffer = pa.py_buffer(os.urandom(1000)).slice(3, 500)
+    response = {"records": Base64Payload(buffer)}
+    assert encode_json(response) == json.dumps(
+        {"records": base64.b64encode(buffer.to_pybytes()).decode("ascii")}
+    ).encode("utf-8")
+
+
+def test_no_payloads():
+    response = {"@type": "PingResponse", "capabilities": 23}
+    assert encode_json(response) == json.dumps(response).encode("utf-8")
+
+
+def test_not_serializable():
+    with pytest.raises(TypeError, match="object is not JSON serializable"):
+        encode_json({"value": object()})
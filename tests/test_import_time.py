@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+# Only needed once records are read (or spilled)
+LAZY_MODULES = ["pyarrow.compute", "smart_open", "boto3", "cryptography", "pandas"]
+
+
+def imported_lazy_modules(code: str):
+    """Runs `code` in a fresh interpreter and returns the lazy modules it imported."""
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")]),
+    )
+    check = f"import json, sys; print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code) + "\n" + check],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "athena.federation.lambda_handler",
+        "athena.federation.async_lambda_handler",
+        "athena.federation.server",
+    ],
+)
+def test_import_is_lazy(module):
+    assert imported_lazy_modules(f"import {module}") == []
+
+
+def test_metadata_requests_are_lazy():
+    code = """
+    import pyarrow as pa
+    from athena.federation.athena_data_source import AthenaDataSource
+    from athena.federation.lambda_handler import AthenaLambdaHandler
+
+    class Source(AthenaDataSource):
+        def databases(self):
+            return ["db"]
+
+        def tables(self, database_name):
+            return ["t"]
+
+        def schema(self, database_name, table_name):
+            return pa.schema([("id", pa.int64())])
+
+    handler = AthenaLambdaHandler(Source(), "bucket")
+    table = {"schemaName": "db", "tableName": "t"}
+    for event in [
+        {"@type": "PingRequest", "queryId": "q"},
+        {"@type": "ListSchemasRequest"},
+        {"@type": "ListTablesRequest", "schemaName": "db"},
+        {"@type": "GetTableRequest", "tableName": table},
+    ]:
+        handler.process_event({"catalogName": "c", **event})
+    """
+    assert imported_lazy_modules(code) == []
@@ -0,0 +1,148 @@
+import json
+
+import pyarrow as pa
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.instrumentation import (
+    CallbackMetricsSink,
+    EMFMetricsSink,
+    RequestMetrics,
+    count,
+    current_metrics,
+    timed,
+    timer,
+)
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema([("id", pa.int64())])
+
+
+class Source(AthenaDataSource):
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def records(self, database_name, table_name, split):
+        for i in range(3):
+            yield {"id": list(range(i * 10, i * 10 + 10))}
+
+
+def read_records(handler):
+    return handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": {"spillLocation": {"bucket": "b", "key": "k"}, "properties": {}},
+        }
+    )
+
+
+class Closeable:
+    """A generator that records whether it was closed."""
+
+    def __init__(self, items) -> None:
+        self.items = items
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            yield from self.items
+        finally:
+            self.closed = True
+
+
+def test_helpers_are_no_ops_without_metrics():
+    assert current_metrics() is None
+    with timer("conversion"):
+        pass
+    count("rows", 10)
+    items = [1, 2, 3]
+    assert timed(items, "data_source") is items
+
+
+def test_helpers_record_to_the_current_request():
+    recorded = []
+    sink = CallbackMetricsSink(recorded.append)
+    metrics = RequestMetrics("ReadRecordsRequest", {"queryId": "q"})
+    token = sink.record(metrics)
+    with timer("conversion"):
+        count("rows", 10)
+        count("rows", 5)
+    count("spilled")
+    assert list(timed([1, 2], "data_source")) == [1, 2]
+    sink.finish(metrics, token)
+
+    assert current_metrics() is None
+    assert recorded == [metrics]
+    assert metrics.counters == {"rows": 15, "spilled": 1}
+    assert set(metrics.timings) == {"conversion", "data_source"}
+    assert metrics.as_dict()["queryId"] == "q"
+
+
+def test_timed_closes_the_wrapped_generator():
+    metrics = RequestMetrics("ReadRecordsRequest")
+    source = Closeable([1, 2, 3])
+    iterator = metrics.timed(iter(source), "data_source")
+    assert next(iterator) == 1
+    iterator.close()
+    assert source.closed
+    assert metrics.timings["data_source"] > 0
+
+    source = Closeable([1, 2, 3])
+    assert list(metrics.timed(iter(source), "data_source")) == [1, 2, 3]
+    assert source.closed
+
+
+def test_emf_line():
+    lines = []
+    handler = AthenaLambdaHandler(
+        Source(), "bucket", metrics_sink=EMFMetricsSink("Test", printer=lines.append)
+    )
+    read_records(handler)
+    [line] = lines
+    emf = json.loads(line)
+
+    [directive] = emf["_aws"]["CloudWatchMetrics"]
+    assert directive["Namespace"] == "Test"
+    assert directive["Dimensions"] == [["RequestType"]]
+    assert isinstance(emf["_aws"]["Timestamp"], int)
+    assert emf["RequestType"] == "ReadRecordsRequest"
+    assert (emf["catalogName"], emf["queryId"], emf["tableName"]) == ("c", "q", "t")
+
+    units = {d["Name"]: d["Unit"] for d in directive["Metrics"]}
+    assert len(units) == len(directive["Metrics"])
+    # Every metric is defined, and every definition has a value
+    properties = {
+        "_aws",
+        "RequestType",
+        "catalogName",
+        "queryId",
+        "schemaName",
+        "tableName",
+    }
+    assert set(units) == set(emf) - properties
+    assert all(isinstance(emf[name], (int, float)) for name in units)
+    assert units["total_ms"] == units["conversion_ms"] == "Milliseconds"
+    assert units["rows"] == "Count"
+    assert emf["rows"] == 30
+    assert units["bytes"] == units["process_peak_arrow_bytes"] == "Bytes"
+
+
+def test_failing_sink_doesnt_fail_the_request():
+    def fail(metrics):
+        raise RuntimeError("no metrics today")
+
+    handler = AthenaLambdaHandler(
+        Source(), "bucket", metrics_sink=CallbackMetricsSink(fail)
+    )
+    assert read_records(handler)["@type"] == "ReadRecordsResponse"
+    assert current_metrics() is None
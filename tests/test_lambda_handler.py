@@ -0,0 +1,197 @@
+import datetime
+
+import pyarrow as pa
+
+from athena.federation import models
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema([("id", pa.int64())])
+
+TABLE = {"schemaName": "db", "tableName": "t"}
+
+
+class Endless(AthenaDataSource):
+    """Yields batches until it's closed, and records the limit it was given."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.limits = []
+        self.batches = 0
+        self.closed = False
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def records(self, database_name, table_name, split, limit=None):
+        self.limits.append(limit)
+        try:
+            while True:
+                start = self.batches * 1000
+                self.batches += 1
+                yield {"id": list(range(start, start + 1000))}
+        finally:
+            self.closed = True
+
+
+def read_records(handler, constraints):
+    response = handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": TABLE,
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": {
+                "spillLocation": {"bucket": "bucket", "key": "query"},
+                "properties": {},
+            },
+            "constraints": constraints,
+        }
+    )
+    return AthenaSDKUtils.decode_pyarrow_records(
+        response["records"]["schema"], response["records"]["records"]
+    )
+
+
+def test_limit_is_advertised():
+    handler = AthenaLambdaHandler(Endless(), "bucket")
+    response = handler.process_event(
+        {"@type": "GetDataSourceCapabilitiesRequest", "catalogName": "c"}
+    )
+    assert response["capabilities"] == {
+        models.LIMIT_PUSHDOWN: [
+            {"subType": models.LIMIT_PUSHDOWN_INTEGER_CONSTANT, "properties": []}
+        ]
+    }
+
+    handler = AthenaLambdaHandler(Endless(), "bucket", limit_pushdown=False)
+    response = handler.process_event(
+        {"@type": "GetDataSourceCapabilitiesRequest", "catalogName": "c"}
+    )
+    assert response["capabilities"] == {}
+
+
+def test_read_records_stops_at_the_limit():
+    source = Endless()
+    handler = AthenaLambdaHandler(source, "bucket")
+    records = read_records(handler, {"summary": {}, "limit": 2500})
+    assert records.column("id").to_pylist() == list(range(2500))
+    assert source.limits == [2500]
+    # Nothing more was read than needed, and the generator was closed
+    assert source.batches == 3
+    assert source.closed
+
+
+def test_no_limit():
+    class Finite(Endless):
+        def records(self, database_name, table_name, split, limit=None):
+            self.limits.append(limit)
+            yield {"id": list(range(10))}
+
+    source = Finite()
+    records = read_records(
+        AthenaLambdaHandler(source, "bucket"), {"summary": {}, "limit": -1}
+    )
+    assert records.num_rows == 10
+    assert source.limits == [None]
+
+
+class NoPartitions(Endless):
+    def schema(self, database_name, table_name):
+        return pa.schema([("id", pa.int64()), ("day", pa.string())])
+
+    def partition_columns(self, database_name, table_name):
+        return ["day"]
+
+    def partitions(self, database_name, table_name):
+        return pa.schema([("day", pa.string())]).empty_table()
+
+
+def test_get_table_layout_without_matching_partitions():
+    handler = AthenaLambdaHandler(NoPartitions(), "bucket")
+    schema = NoPartitions().schema("db", "t")
+    response = handler.process_event(
+        {
+            "@type": "GetTableLayoutRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": TABLE,
+            "schema": {"schema": AthenaSDKUtils.encode_schema(schema)},
+            "constraints": {"summary": {}},
+            "partitionCols": ["day"],
+        }
+    )
+    partitions = AthenaSDKUtils.decode_pyarrow_records(
+        response["partitions"]["schema"], response["partitions"]["records"]
+    )
+    assert partitions.num_rows == 0
+
+
+class DictPartitions(Endless):
+    def schema(self, database_name, table_name):
+        return pa.schema(
+            [("id", pa.int64()), ("year", pa.int32()), ("day", pa.date32())]
+        )
+
+    def partition_columns(self, database_name, table_name):
+        return ["year", "day"]
+
+    def partitions(self, database_name, table_name):
+        return {
+            "year": [2023, 2024, 2024],
+            "day": ["2023-12-31", "2024-01-01", "2024-01-02"],
+        }
+
+
+def test_get_table_layout_types_dict_partitions_by_the_schema():
+    day = datetime.date(2024, 1, 1)
+    schema = pa.schema([("col1", pa.date32())])
+    value_block = {
+        "aId": "a",
+        "schema": AthenaSDKUtils.encode_pyarrow_object(schema),
+        "records": AthenaSDKUtils.encode_pyarrow_object(
+            pa.record_batch([pa.array([day], type=pa.date32())], schema=schema)
+        ),
+    }
+    # day >= DATE '2024-01-01'
+    constraints = {
+        "summary": {
+            "day": {
+                "@type": "SortedRangeSet",
+                "ranges": [
+                    {
+                        "low": {"valueBlock": value_block, "bound": "EXACTLY"},
+                        "high": {"valueBlock": value_block, "nullValue": True},
+                    }
+                ],
+                "nullAllowed": False,
+            }
+        }
+    }
+    handler = AthenaLambdaHandler(DictPartitions(), "bucket")
+    response = handler.process_event(
+        {
+            "@type": "GetTableLayoutRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": TABLE,
+            "constraints": constraints,
+            "partitionCols": ["year", "day"],
+        }
+    )
+    partitions = AthenaSDKUtils.decode_pyarrow_records(
+        response["partitions"]["schema"], response["partitions"]["records"]
+    )
+    assert partitions.schema == pa.schema([("year", pa.int32()), ("day", pa.date32())])
+    assert partitions.to_pylist() == [
+        {"year": 2024, "day": datetime.date(2024, 1, 1)},
+        {"year": 2024, "day": datetime.date(2024, 1, 2)},
+    ]
@@ -0,0 +1,115 @@
+import pyarrow as pa
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.instrumentation import CallbackMetricsSink
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.memory import MemoryBudget
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema([("id", pa.int64())])
+
+
+class Source(AthenaDataSource):
+    def __init__(self, arrow: bool) -> None:
+        super().__init__()
+        self.arrow = arrow
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def records(self, database_name, table_name, split):
+        for i in range(10):
+            ids = list(range(i * 10_000, (i + 1) * 10_000))
+            if self.arrow:
+                yield pa.record_batch([pa.array(ids, type=pa.int64())], schema=SCHEMA)
+            else:
+                yield {"id": ids}
+
+
+def read_records_counters(source):
+    metrics = []
+    handler = AthenaLambdaHandler(
+        source,
+        "bucket",
+        metrics_sink=CallbackMetricsSink(metrics.append),
+        memory_budget_bytes=None,
+    )
+    handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": {
+                "spillLocation": {"bucket": "bucket", "key": "query"},
+                "properties": {},
+            },
+        }
+    )
+    return metrics[0].counters
+
+
+def test_sdk_allocations_are_tracked():
+    counters = read_records_counters(Source(arrow=False))
+    # The converted columns, and the batches combined into one
+    assert counters["sdk_peak_arrow_bytes"] >= 100_000 * 8
+    assert counters["process_peak_arrow_bytes"] > 0
+
+
+def test_data_source_allocations_are_only_in_the_process_peak():
+    counters = read_records_counters(Source(arrow=True))
+    assert counters["process_peak_arrow_bytes"] >= 10_000 * 8
+    assert counters["sdk_peak_arrow_bytes"] < counters["process_peak_arrow_bytes"]
+
+
+def test_budget():
+    assert not MemoryBudget(None).exceeded
+    budget = MemoryBudget(1000)
+    keep = pa.array(range(1000), memory_pool=budget.pool)
+    assert budget.exceeded
+    assert budget.used_bytes() >= keep.nbytes
+    assert budget.process_peak_bytes >= keep.nbytes
+    # Freed through the pool, so before it
+    del keep
+
+
+def test_budget_ignores_other_allocations():
+    budget = MemoryBudget(1000)
+    elsewhere = pa.array(range(10_000))
+    assert not budget.exceeded
+    # Still part of the process high-water mark
+    assert budget.process_peak_bytes >= elsewhere.nbytes
+
+
+def test_over_budget_requests_spill(spill_client, caplog):
+    handler = AthenaLambdaHandler(
+        Source(arrow=False),
+        "bucket",
+        spill_client=spill_client,
+        memory_budget_bytes=1,
+    )
+    response = handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": {
+                "spillLocation": {"bucket": "bucket", "key": "query"},
+                "properties": {},
+            },
+        }
+    )
+    # Every batch is spilled as soon as it's converted, rather than returned inline
+    assert response["@type"] == "RemoteReadRecordsResponse"
+    assert len(response["remoteBlocks"]) == 10
+    assert "over the budget" in caplog.text
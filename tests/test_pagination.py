@@ -0,0 +1,185 @@
+import pyarrow as pa
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.pagination import Page, Paginator
+
+TABLE = {"schemaName": "db", "tableName": "t"}
+
+
+class ManySplits(AthenaDataSource):
+    def __init__(self, num_splits: int = 25) -> None:
+        super().__init__()
+        self.num_splits = num_splits
+        self.calls = 0
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return pa.schema([("id", pa.int64())])
+
+    def splits(self, database_name, table_name):
+        self.calls += 1
+        return ({"n": str(i)} for i in range(self.num_splits))
+
+
+class PagedSplits(ManySplits):
+    """Paginates its splits itself."""
+
+    def splits(self, database_name, table_name, continuation_token=None):
+        start = int(continuation_token or 0)
+        end = min(start + 10, self.num_splits)
+        next_token = str(end) if end < self.num_splits else None
+        return Page([{"n": str(i)} for i in range(start, end)], next_token)
+
+
+def all_pages(paginator, fetch, page_size, key="query"):
+    pages, token = [], None
+    while True:
+        items, token = paginator.page(fetch, page_size, token, key=key)
+        pages.append(items)
+        if token is None:
+            return pages
+
+
+def test_paginator_cuts_pages():
+    pages = all_pages(Paginator(), lambda token: iter(range(25)), 10)
+    assert pages == [list(range(10)), list(range(10, 20)), list(range(20, 25))]
+
+
+def test_paginator_without_page_size():
+    assert all_pages(Paginator(), lambda token: range(25), None) == [list(range(25))]
+
+
+def test_paginator_exact_multiple_has_no_empty_page():
+    assert all_pages(Paginator(), lambda token: range(20), 10) == [
+        list(range(10)),
+        list(range(10, 20)),
+    ]
+
+
+def test_paginator_resumes_without_its_cursor():
+    # e.g. the next page is requested on a cold start
+    fetch = lambda token: iter(range(25))
+    _, token = Paginator().page(fetch, 10, None, key="query")
+    items, _ = Paginator().page(fetch, 10, token, key="query")
+    assert items == list(range(10, 20))
+
+
+def test_paginator_passes_source_tokens_along():
+    def fetch(token):
+        start = int(token or 0)
+        return Page(
+            list(range(start, start + 5)), str(start + 5) if start < 10 else None
+        )
+
+    assert all_pages(Paginator(), fetch, None) == [
+        [0, 1, 2, 3, 4],
+        [5, 6, 7, 8, 9],
+        [10, 11, 12, 13, 14],
+    ]
+
+
+def get_splits(handler, query_id="query"):
+    pages, token = [], None
+    while True:
+        event = {
+            "@type": "GetSplitsRequest",
+            "catalogName": "c",
+            "queryId": query_id,
+            "tableName": TABLE,
+        }
+        if token is not None:
+            event["continuationToken"] = token
+        response = handler.process_event(event)
+        pages.append([split["properties"]["n"] for split in response["splits"]])
+        token = response["continuationToken"]
+        if token is None:
+            return pages
+
+
+def test_get_splits_pages():
+    source = ManySplits()
+    handler = AthenaLambdaHandler(source, "bucket", max_splits_per_page=10)
+    pages = get_splits(handler)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == [str(i) for i in range(25)]
+    # The generator is kept between pages rather than enumerated again
+    assert source.calls == 1
+
+
+def test_get_splits_pages_from_the_data_source():
+    handler = AthenaLambdaHandler(PagedSplits(), "bucket", max_splits_per_page=None)
+    pages = get_splits(handler)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == [str(i) for i in range(25)]
+
+
+def test_get_splits_always_returns_a_split():
+    handler = AthenaLambdaHandler(ManySplits(0), "bucket")
+    response = handler.process_event(
+        {
+            "@type": "GetSplitsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": TABLE,
+        }
+    )
+    assert [split["properties"] for split in response["splits"]] == [{}]
+    assert response["continuationToken"] is None
+
+
+class ManyTables(ManySplits):
+    def tables(self, database_name):
+        return (f"table_{i}" for i in range(25))
+
+
+class PagedTables(ManySplits):
+    """Paginates its tables itself, honouring Athena's page size."""
+
+    def tables(self, database_name, continuation_token=None, page_size=None):
+        start = int(continuation_token or 0)
+        end = min(start + (page_size or 25), 25)
+        next_token = str(end) if end < 25 else None
+        return Page([f"table_{i}" for i in range(start, end)], next_token)
+
+
+def list_tables(handler, page_size):
+    pages, token = [], None
+    while True:
+        response = handler.process_event(
+            {
+                "@type": "ListTablesRequest",
+                "catalogName": "c",
+                "queryId": "query",
+                "schemaName": "db",
+                "pageSize": page_size,
+                "nextToken": token,
+            }
+        )
+        pages.append([table["tableName"] for table in response["tables"]])
+        token = response["nextToken"]
+        if token is None:
+            return pages
+
+
+def test_list_tables_pages():
+    pages = list_tables(AthenaLambdaHandler(ManyTables(), "bucket"), 10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == [f"table_{i}" for i in range(25)]
+
+
+def test_list_tables_without_page_size():
+    # Athena sends -1 for "no limit"
+    pages = list_tables(AthenaLambdaHandler(ManyTables(), "bucket"), -1)
+    assert [len(page) for page in pages] == [25]
+
+
+def test_list_tables_pages_from_the_data_source():
+    pages = list_tables(AthenaLambdaHandler(PagedTables(), "bucket"), 10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == [f"table_{i}" for i in range(25)]
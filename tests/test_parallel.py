@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.parallel import ParallelRecords
+
+
+class Subtasks(AthenaDataSource):
+    """
+    Subtask `n` yields `batches` batches of ids `n * 1000 + i`.
+    Subtasks listed in `failing` raise after their first batch.
+    """
+
+    def __init__(self, batches=3, failing=(), delay=0.0) -> None:
+        super().__init__()
+        self.batches = batches
+        self.failing = failing
+        self.delay = delay
+        self.produced = 0
+        self.finished = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to worker processes, which count for themselves
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, lock=threading.Lock())
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return None
+
+    def subtask_records(self, database_name, table_name, split, subtask):
+        try:
+            for i in range(self.batches):
+                if i == 1 and subtask in self.failing:
+                    raise ValueError(f"subtask {subtask} failed")
+                # Later subtasks are quicker, so they'd finish first if we let them
+                time.sleep(self.delay / (subtask + 1))
+                with self.lock:
+                    self.produced += 1
+                yield {"id": [subtask * 1000 + i]}
+        finally:
+            with self.lock:
+                self.finished += 1
+
+
+def records(source, subtasks, **kwargs):
+    return ParallelRecords(source, "db", "t", {}, subtasks, max_workers=4, **kwargs)
+
+
+def ids(batches):
+    return [batch["id"][0] for batch in batches]
+
+
+def expected(subtasks, batches):
+    return [n * 1000 + i for n in subtasks for i in range(batches)]
+
+
+def subtask_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("subtask")]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_ordered(executor):
+    source = Subtasks(batches=3, delay=0.01)
+    result = ids(records(source, range(6), executor=executor))
+    assert result == expected(range(6), 3)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_unordered(executor):
+    source = Subtasks(batches=3, delay=0.01)
+    result = ids(records(source, range(6), executor=executor, ordered=False))
+    assert sorted(result) == expected(range(6), 3)
+
+
+def test_unordered_doesnt_wait_for_slow_subtasks():
+    release = threading.Event()
+
+    class Slow(Subtasks):
+        def subtask_records(self, database_name, table_name, split, subtask):
+            if subtask == 0:
+                assert release.wait(5)
+            yield {"id": [subtask]}
+
+    batches = iter(records(Slow(), [0, 1], ordered=False))
+    assert next(batches) == {"id": [1]}
+    release.set()
+    assert next(batches) == {"id": [0]}
+    assert next(batches, None) is None
+
+
+def test_no_subtasks():
+    assert list(records(Subtasks(), [])) == []
+
+
+@pytest.mark.parametrize("ordered, waiting", [(True, 2), (False, 2 * 4)])
+def test_slow_consumer_bounds_producers(ordered, waiting):
+    # Ordered, each subtask has a queue of `queue_size` batches,
+    # unordered they share one with room for `queue_size` per worker
+    source = Subtasks(batches=100)
+    batches = iter(records(source, [0], ordered=ordered, queue_size=2))
+    try:
+        for consumed in range(1, 6):
+            next(batches)
+            time.sleep(0.05)
+            # The queue is full, plus one batch waiting to be put on it
+            assert source.produced <= consumed + waiting + 1
+    finally:
+        batches.close()
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize("ordered", [True, False])
+def test_subtask_error_reaches_the_caller(executor, ordered):
+    source = Subtasks(batches=3, failing=[2])
+    with pytest.raises(ValueError, match="subtask 2 failed"):
+        list(records(source, range(4), executor=executor, ordered=ordered))
+    assert not subtask_threads()
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_close_stops_the_workers(ordered):
+    source = Subtasks(batches=10_000)
+    batches = iter(records(source, range(8), ordered=ordered, queue_size=2))
+    for _ in range(3):
+        next(batches)
+    # e.g. the query's LIMIT was reached
+    batches.close()
+    # Every running subtask stopped, and the queued ones never started
+    assert source.finished <= 4
+    assert source.produced < 100
+    assert not subtask_threads()
+
+
+def test_process_close_cancels_queued_subtasks():
+    source = Subtasks(batches=2)
+    batches = iter(records(source, range(100), executor="process", queue_size=1))
+    assert ids([next(batches), next(batches)]) == [0, 1]
+    start = time.monotonic()
+    batches.close()
+    assert time.monotonic() - start < 10
+
+
+def test_invalid_executor():
+    with pytest.raises(ValueError, match="executor"):
+        records(Subtasks(), [0], executor="fiber")
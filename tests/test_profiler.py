@@ -0,0 +1,154 @@
+import logging
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.instrumentation import CallbackMetricsSink
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.profiler import (
+    ColumnProfiler,
+    index_type,
+    narrowest_integer_type,
+)
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema(
+    [
+        ("small", pa.int64()),
+        ("big", pa.int64()),
+        ("unsigned", pa.uint32()),
+        ("kind", pa.string()),
+        ("unique", pa.string()),
+        ("nulls", pa.int32()),
+    ]
+)
+
+
+def make_batch(start=0, rows=1000):
+    ids = range(start, start + rows)
+    return pa.record_batch(
+        [
+            pa.array([i % 100 for i in ids], type=pa.int64()),
+            pa.array([i * 2**40 for i in ids], type=pa.int64()),
+            pa.array([i % 200 for i in ids], type=pa.uint32()),
+            pa.array([("red", "green", "blue")[i % 3] for i in ids]),
+            pa.array([f"id-{i}" for i in ids]),
+            pa.array([None] * rows, type=pa.int32()),
+        ],
+        schema=SCHEMA,
+    )
+
+
+@pytest.mark.parametrize(
+    "cardinality, expected",
+    [(1, pa.int8()), (128, pa.int8()), (129, pa.int16()), (2**20, pa.int32())],
+)
+def test_index_type(cardinality, expected):
+    assert index_type(cardinality) == expected
+
+
+@pytest.mark.parametrize(
+    "data_type, low, high, expected",
+    [
+        (pa.int64(), -128, 127, pa.int8()),
+        (pa.int64(), -129, 0, pa.int16()),
+        (pa.int32(), 0, 2**31 - 1, pa.int32()),
+        (pa.int64(), 0, 2**40, pa.int64()),
+        (pa.uint64(), 0, 255, pa.uint8()),
+        (pa.uint32(), 0, 256, pa.uint16()),
+    ],
+)
+def test_narrowest_integer_type(data_type, low, high, expected):
+    assert narrowest_integer_type(data_type, low, high) == expected
+
+
+def test_profile():
+    profiler = ColumnProfiler(SCHEMA)
+    profiler.observe(make_batch(0))
+    profiler.observe(make_batch(1000))
+    profiles = profiler.profiles
+
+    assert (profiles["small"].low, profiles["small"].high) == (0, 99)
+    assert profiles["small"].narrow_type == pa.int8()
+    assert profiles["small"].narrowing_bytes_saved == 2000 * 7
+    assert profiles["big"].narrow_type == pa.int64()
+    assert profiles["big"].narrowing_bytes_saved == 0
+    assert profiles["unsigned"].narrow_type == pa.uint8()
+    assert profiles["unsigned"].narrowing_bytes_saved == 2000 * 3
+    # All nulls, so we can't tell
+    assert profiles["nulls"].narrow_type == pa.int32()
+    assert profiles["nulls"].narrowing_bytes_saved == 0
+
+    assert profiles["kind"].max_cardinality == 3
+    assert 0 < profiles["kind"].dictionary_bytes_saved < profiles["kind"].nbytes
+    assert profiles["unique"].dictionary_bytes_saved == 0
+
+    assert profiler.narrowing_bytes_saved == 2000 * 7 + 2000 * 3
+    assert profiler.dictionary_bytes_saved == profiles["kind"].dictionary_bytes_saved
+    suggestions = profiler.suggestions()
+    assert len(suggestions) == 3
+    assert 'Column "small" (int64) only holds values from 0 to 99' in suggestions[0]
+    assert "declaring it as int8" in suggestions[0]
+    assert 'Column "kind" has at most 3 distinct values' in suggestions[2]
+
+
+def test_only_the_first_batches_are_profiled():
+    profiler = ColumnProfiler(SCHEMA, max_batches=1)
+    profiler.observe(make_batch(0, 10))
+    profiler.observe(make_batch(10**6, 10))
+    assert profiler.profiles["small"].rows == 10
+    assert profiler.profiles["big"].high == 9 * 2**40
+
+
+class Source(AthenaDataSource):
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def records(self, database_name, table_name, split):
+        return make_batch()
+
+
+def read_records(handler):
+    return handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": {"spillLocation": {"bucket": "b", "key": "k"}, "properties": {}},
+        }
+    )
+
+
+def test_handler_records_savings_and_logs_suggestions_once(caplog, capsys):
+    metrics = []
+    handler = AthenaLambdaHandler(
+        Source(),
+        "bucket",
+        profile_columns=True,
+        metrics_sink=CallbackMetricsSink(metrics.append),
+    )
+    capsys.readouterr()
+    with caplog.at_level(logging.INFO, logger="athena.federation.lambda_handler"):
+        first = read_records(handler)
+        read_records(handler)
+
+    # The records themselves are sent as they are
+    records = AthenaSDKUtils.decode_pyarrow_records(
+        first["records"]["schema"], first["records"]["records"]
+    )
+    assert records.equals(make_batch())
+
+    assert [m.counters["narrowing_bytes_saveable"] for m in metrics] == [10_000] * 2
+    assert all(m.counters["dictionary_bytes_saveable"] > 0 for m in metrics)
+    assert len(caplog.records) == 3
+    assert caplog.records[0].getMessage().startswith('db.t: Column "small"')
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,208 @@
+import uuid
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.constraints import Constraints
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.result_cache import ResultCache
+from athena.federation.spill import generate_encryption_key, read_block
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema([("id", pa.int64())])
+
+
+def key(split="1"):
+    return ResultCache.key("db", "t", {"split": split}, SCHEMA, Constraints())
+
+
+def test_startup_only_removes_its_own_files(tmp_path):
+    own = tmp_path / f"{key()}.arrow"
+    own.write_bytes(b"left over")
+    unrelated = tmp_path / "notes.arrow"
+    unrelated.write_bytes(b"someone else's")
+    ResultCache(directory=str(tmp_path))
+    assert not own.exists()
+    assert unrelated.exists()
+
+
+def test_records_round_trip(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    records = pa.RecordBatch.from_pydict({"id": [1, 2, 3]}, schema=SCHEMA)
+    cache.put_records(key(), "db", "t", records)
+    assert cache.get(key()).records(SCHEMA).equals(records)
+    assert cache.get(key("2")) is None
+
+
+def test_entries_expire():
+    now = [0.0]
+    cache = ResultCache(ttl=10, clock=lambda: now[0])
+    records = pa.RecordBatch.from_pydict({"id": [1]}, schema=SCHEMA)
+    cache.put_records(key(), "db", "t", records)
+    now[0] = 11
+    assert cache.get(key()) is None
+
+
+class Source(AthenaDataSource):
+    def __init__(self, rows=3) -> None:
+        super().__init__()
+        self.rows = rows
+        self.reads = 0
+        self.version = "1"
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def table_version(self, database_name, table_name):
+        return self.version
+
+    def records(self, database_name, table_name, split):
+        self.reads += 1
+        return {"id": list(range(self.rows))}
+
+
+def value_block(values):
+    """Constraint values, serialized like Athena does - with a new allocator id every time."""
+    schema = pa.schema([("col1", pa.int64())])
+    return {
+        "aId": str(uuid.uuid4()),
+        "schema": AthenaSDKUtils.encode_pyarrow_object(schema),
+        "records": AthenaSDKUtils.encode_pyarrow_object(
+            pa.record_batch([pa.array(values, type=pa.int64())], schema=schema)
+        ),
+    }
+
+
+def in_set(*values):
+    return {
+        "@type": "EquatableValueSet",
+        "valueBlock": value_block(list(values)),
+        "whiteList": True,
+        "nullAllowed": False,
+    }
+
+
+def read_records(handler, constraints=None, encryption_key=None):
+    split = {
+        "spillLocation": {"bucket": "bucket", "key": f"query-{uuid.uuid4()}"},
+        "properties": {"part": "1"},
+    }
+    if encryption_key is not None:
+        split["encryptionKey"] = encryption_key
+    return handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": str(uuid.uuid4()),
+            "tableName": {"schemaName": "db", "tableName": "t"},
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": split,
+            "constraints": constraints or {"summary": {}},
+        }
+    )
+
+
+def ids(response):
+    records = response["records"]
+    batch = AthenaSDKUtils.decode_pyarrow_records(records["schema"], records["records"])
+    return batch.column("id").to_pylist()
+
+
+def make_handler(source, spill_client, cache, **kwargs):
+    return AthenaLambdaHandler(
+        source, "bucket", spill_client=spill_client, result_cache=cache, **kwargs
+    )
+
+
+@pytest.mark.parametrize("directory", [False, True])
+def test_inline_hit_skips_the_data_source(spill_client, tmp_path, directory):
+    source = Source()
+    cache = ResultCache(directory=str(tmp_path / "cache") if directory else None)
+    handler = make_handler(source, spill_client, cache)
+    first = read_records(handler)
+    second = read_records(handler)
+    assert ids(first) == ids(second) == [0, 1, 2]
+    assert source.reads == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_equivalent_constraints_share_a_key(spill_client):
+    source = Source()
+    handler = make_handler(source, spill_client, ResultCache())
+    ranges = {
+        "@type": "SortedRangeSet",
+        "ranges": [
+            {
+                "low": {"valueBlock": value_block([lo]), "bound": "EXACTLY"},
+                "high": {"valueBlock": value_block([hi]), "bound": "EXACTLY"},
+            }
+            for lo, hi in [(0, 1), (5, 6)]
+        ],
+        "nullAllowed": False,
+    }
+    read_records(handler, {"summary": {"id": in_set(1, 2), "other": ranges}})
+    # Columns, values and ranges in a different order, and newly serialized values
+    reordered = dict(ranges, ranges=list(reversed(ranges["ranges"])))
+    read_records(handler, {"summary": {"other": reordered, "id": in_set(2, 1)}})
+    assert source.reads == 1
+
+    # Different constraints are a miss
+    read_records(handler, {"summary": {"id": in_set(1, 3)}})
+    assert source.reads == 2
+    read_records(handler, {"summary": {"id": in_set(1, 3)}, "limit": 10})
+    assert source.reads == 3
+
+
+def test_new_table_version_is_a_miss(spill_client):
+    source = Source()
+    handler = make_handler(source, spill_client, ResultCache())
+    read_records(handler)
+    read_records(handler)
+    assert source.reads == 1
+    source.version = "2"
+    source.rows = 4
+    assert ids(read_records(handler)) == [0, 1, 2, 3]
+    assert source.reads == 2
+
+
+def test_spilled_results_arent_cached_by_default(spill_client):
+    source = Source(rows=10_000)
+    cache = ResultCache()
+    handler = make_handler(source, spill_client, cache, max_inline_response_bytes=1024)
+    assert read_records(handler)["@type"] == "RemoteReadRecordsResponse"
+    assert read_records(handler)["@type"] == "RemoteReadRecordsResponse"
+    assert source.reads == 2
+    assert len(cache) == 0
+
+
+def test_spilled_hit_returns_the_same_blocks_and_key(spill_client):
+    source = Source(rows=10_000)
+    cache = ResultCache(cache_spilled=True)
+    handler = make_handler(
+        source,
+        spill_client,
+        cache,
+        max_inline_response_bytes=1024,
+        spill_block_bytes=16 * 1024,
+        encrypt_spills=True,
+    )
+    first = read_records(handler, encryption_key=generate_encryption_key())
+    second = read_records(handler, encryption_key=generate_encryption_key())
+    assert source.reads == 1
+    assert first["@type"] == second["@type"] == "RemoteReadRecordsResponse"
+    assert len(first["remoteBlocks"]) > 1
+    assert second["remoteBlocks"] == first["remoteBlocks"]
+    assert second["encryptionKey"] == first["encryptionKey"]
+
+    rows = 0
+    for block in second["remoteBlocks"]:
+        with open(spill_client.path(block["bucket"], block["key"]), "rb") as f:
+            rows += read_block(f.read(), SCHEMA, second["encryptionKey"]).num_rows
+    assert rows == 10_000
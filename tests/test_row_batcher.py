@@ -0,0 +1,33 @@
+import pyarrow as pa
+import pytest
+
+from athena.federation.row_batcher import RowBatcher
+
+SCHEMA = pa.schema([("id", pa.int64()), ("name", pa.string())])
+
+
+def test_tuples_and_dicts():
+    rows = [(1, "a"), (2, "b")]
+    assert RowBatcher(SCHEMA).flush() is None
+    batches = list(RowBatcher(SCHEMA).batches(rows))
+    assert pa.Table.from_batches(batches).to_pylist() == [
+        {"id": 1, "name": "a"},
+        {"id": 2, "name": "b"},
+    ]
+    batches = list(RowBatcher(SCHEMA).batches([{"id": 1}, {"name": "b", "id": 2}]))
+    assert pa.Table.from_batches(batches).to_pylist() == [
+        {"id": 1, "name": None},
+        {"id": 2, "name": "b"},
+    ]
+
+
+def test_cuts_batches_by_rows():
+    batches = list(RowBatcher(SCHEMA, rows_per_batch=2).batches([(1, "a")] * 5))
+    assert [batch.num_rows for batch in batches] == [2, 2, 1]
+
+
+@pytest.mark.parametrize("bad_row", [(3,), (3, "c", "extra")])
+def test_row_of_the_wrong_length(bad_row):
+    rows = [(i, str(i)) for i in range(5)] + [bad_row] + [(6, "f")]
+    with pytest.raises(ValueError, match=f"Row 5 has {len(bad_row)} values"):
+        list(RowBatcher(SCHEMA, rows_per_batch=3).batches(rows))
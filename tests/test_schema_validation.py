@@ -0,0 +1,91 @@
+import pyarrow as pa
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.schema_validation import (
+    SchemaValidationError,
+    unsupported_type_reason,
+    validate_schema,
+)
+
+
+@pytest.mark.parametrize(
+    "data_type",
+    [
+        pa.int64(),
+        pa.float32(),
+        pa.decimal128(10, 2),
+        pa.string(),
+        pa.timestamp("ms"),
+        pa.date32(),
+        pa.list_(pa.struct([("a", pa.int32()), ("b", pa.list_(pa.string()))])),
+        pa.map_(pa.string(), pa.float64()),
+    ],
+)
+def test_supported_types(data_type):
+    assert unsupported_type_reason(data_type) is None
+
+
+@pytest.mark.parametrize(
+    "data_type, reason",
+    [
+        (pa.uint32(), "use a signed integer"),
+        (pa.large_string(), "use pa.string()"),
+        (pa.float16(), "not supported"),
+        (pa.struct([]), "at least one field"),
+        (pa.list_(pa.struct([("a", pa.uint8())])), "list values: field a"),
+        (pa.map_(pa.string(), pa.time64("us")), "map values"),
+    ],
+)
+def test_unsupported_types(data_type, reason):
+    assert reason in unsupported_type_reason(data_type)
+
+
+def test_validate_schema():
+    schema = pa.schema([("id", pa.int64()), ("id", pa.string()), ("n", pa.uint8())])
+    problems = validate_schema(schema, ["day"])
+    assert len(problems) == 3
+    assert "duplicate column id" in problems
+    assert "partition column day is not in the schema" in problems
+    assert validate_schema(pa.schema([("id", pa.int64())])) == []
+
+
+class Unsigned(AthenaDataSource):
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return pa.schema([("id", pa.uint64())])
+
+
+def get_table(handler):
+    return handler.process_event(
+        {
+            "@type": "GetTableRequest",
+            "catalogName": "c",
+            "tableName": {"schemaName": "db", "tableName": "t"},
+        }
+    )
+
+
+def test_get_table_rejects_unsupported_schemas():
+    with pytest.raises(SchemaValidationError) as e:
+        get_table(AthenaLambdaHandler(Unsigned(), "bucket", validate_schemas=True))
+    assert e.value.table_name == "db.t"
+
+
+def test_get_table_warns_by_default(caplog):
+    handler = AthenaLambdaHandler(Unsigned(), "bucket")
+    assert get_table(handler)["@type"] == "GetTableResponse"
+    assert "db.t" in caplog.text
+    assert "future release" in caplog.text
+
+
+def test_get_table_validation_can_be_disabled(caplog):
+    handler = AthenaLambdaHandler(Unsigned(), "bucket", validate_schemas=False)
+    assert get_table(handler)["@type"] == "GetTableResponse"
+    assert caplog.text == ""
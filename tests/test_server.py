@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.instrumentation import CallbackMetricsSink
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.server import AthenaHTTPServer
+from athena.federation.utils import AthenaSDKUtils
+
+SCHEMA = pa.schema([("id", pa.int64())])
+
+
+class Source(AthenaDataSource):
+    def __init__(self) -> None:
+        super().__init__()
+        # Set to make ReadRecordsRequests wait until `release` is set
+        self.blocked = threading.Event()
+        self.release = threading.Event()
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def records(self, database_name, table_name, split):
+        if self.blocked.is_set():
+            self.release.wait(timeout=5)
+        return {"id": [1, 2, 3]}
+
+
+@pytest.fixture
+def source():
+    return Source()
+
+
+@pytest.fixture
+def emitted():
+    return []
+
+
+@pytest.fixture
+def server(source, emitted, spill_client):
+    handler = AthenaLambdaHandler(
+        source,
+        "bucket",
+        spill_client=spill_client,
+        metrics_sink=CallbackMetricsSink(emitted.append),
+        response_format="bytes",
+    )
+    server = AthenaHTTPServer(handler, ("127.0.0.1", 0), workers=1, queue_timeout=0.2)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    source.release.set()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def url(server, path="/"):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+def get(server, path):
+    with urllib.request.urlopen(url(server, path), timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+def post(server, event):
+    request = urllib.request.Request(
+        url(server), data=json.dumps(event).encode("utf-8"), method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+READ_RECORDS = {
+    "@type": "ReadRecordsRequest",
+    "catalogName": "c",
+    "queryId": "q",
+    "tableName": {"schemaName": "db", "tableName": "t"},
+    "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+    "split": {
+        "spillLocation": {"bucket": "bucket", "key": "query"},
+        "properties": {},
+    },
+}
+
+
+def test_health(server):
+    assert get(server, "/health") == (200, {"status": "ok"})
+
+
+def test_read_records_round_trip(server):
+    status, response = post(server, READ_RECORDS)
+    assert status == 200
+    assert response["@type"] == "ReadRecordsResponse"
+    records = AthenaSDKUtils.decode_pyarrow_records(
+        response["records"]["schema"], response["records"]["records"]
+    )
+    assert records.column("id").to_pylist() == [1, 2, 3]
+
+
+def test_errors_are_returned_like_lambda(server):
+    status, response = post(server, {"@type": "NoSuchRequest"})
+    assert status == 500
+    assert response["errorType"]
+    ping = {"@type": "PingRequest", "catalogName": "c", "queryId": "q"}
+    assert post(server, ping)[0] == 200
+
+
+def test_metrics(server, emitted):
+    post(server, READ_RECORDS)
+    post(server, READ_RECORDS)
+    status, metrics = get(server, "/metrics")
+    assert status == 200
+    assert metrics["workers"] == 1
+    assert metrics["in_flight"] == 0
+    read_records = metrics["requests"]["ReadRecordsRequest"]
+    assert read_records["requests"] == 2
+    assert read_records["errors"] == 0
+    assert read_records["latency_ms"]["p50"] > 0
+    assert read_records["timings_seconds"]["total"] > 0
+    # The handler's own sink still gets every request's metrics
+    assert [m.request_type for m in emitted] == ["ReadRecordsRequest"] * 2
+
+
+def test_handler_sink_is_wrapped(source, spill_client):
+    emitted = []
+    sink = CallbackMetricsSink(emitted.append)
+    handler = AthenaLambdaHandler(
+        source, "bucket", spill_client=spill_client, metrics_sink=sink
+    )
+    server = AthenaHTTPServer(handler, ("127.0.0.1", 0))
+    try:
+        for _ in range(2):
+            server.invoke(READ_RECORDS)
+    finally:
+        server.server_close()
+    assert handler.metrics_sink is sink
+    assert server.stats.downstream is sink
+    assert len(emitted) == 2
+    assert server.stats.as_dict()["requests"] == {}  # Counted by the HTTP handler
+    assert server.stats.timings["ReadRecordsRequest"]["total"] > 0
+
+
+def test_busy_workers(server, source):
+    source.blocked.set()
+    first = threading.Thread(target=post, args=(server, READ_RECORDS))
+    first.start()
+    try:
+        # Wait for the first request to take the only worker
+        for _ in range(100):
+            if server.stats.in_flight:
+                break
+            time.sleep(0.01)
+        assert server.stats.in_flight == 1
+        status, response = post(server, READ_RECORDS)
+        assert status == 503
+        assert response["errorMessage"] == "All workers are busy"
+    finally:
+        source.release.set()
+        first.join()
+    assert post(server, READ_RECORDS)[0] == 200
@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+
+import pytest
+
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.simulator import QuerySimulator, main
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "example")
+
+
+@pytest.fixture
+def sample_data_source(monkeypatch):
+    monkeypatch.syspath_prepend(EXAMPLE)
+    from sample_data_source import SampleDataSource
+
+    return SampleDataSource()
+
+
+def test_simulated_query(sample_data_source, tmp_path):
+    handler = AthenaLambdaHandler(
+        sample_data_source, "local-spill", max_inline_response_bytes=64 * 1024
+    )
+    simulator = QuerySimulator(handler, spill_dir=str(tmp_path), concurrency=2)
+    report = simulator.run("sampledb", "demo")
+
+    # split1 has 4 rows and is returned inline, split2 has 16000 and is spilled
+    assert report.rows == 4 + 16_000
+    assert (report.splits, report.spilled_splits, report.spill_ratio) == (2, 1, 0.5)
+    assert 0 < report.spilled_bytes < report.bytes
+    assert os.listdir(tmp_path)
+    assert 0 < report.max_response_bytes < 64 * 1024
+
+    stats = report.as_dict()
+    assert stats["rowsPerSecond"] > 0
+    assert stats["latencies"]["ReadRecordsRequest"]["count"] == 2
+    assert set(stats["latencies"]) == {
+        "PingRequest",
+        "GetDataSourceCapabilitiesRequest",
+        "ListSchemasRequest",
+        "ListTablesRequest",
+        "GetTableRequest",
+        "GetTableLayoutRequest",
+        "GetSplitsRequest",
+        "ReadRecordsRequest",
+    }
+    latency = report.latency("GetTableRequest")
+    assert latency["count"] == 1
+    assert 0 < latency["p50"] == latency["p99"] == latency["max"]
+    assert "16004 rows" in str(report)
+
+
+def test_simulated_query_with_columns_and_limit(sample_data_source, tmp_path):
+    handler = AthenaLambdaHandler(sample_data_source, "local-spill")
+    simulator = QuerySimulator(handler, spill_dir=str(tmp_path))
+    report = simulator.run("sampledb", "demo", columns=["name"], limit=10)
+    # Each split stops at the limit
+    assert report.rows == 4 + 10
+    assert report.spilled_splits == 0
+
+
+def test_unknown_table(sample_data_source, tmp_path):
+    handler = AthenaLambdaHandler(sample_data_source, "local-spill")
+    with pytest.raises(ValueError, match="Table missing not in sampledb"):
+        QuerySimulator(handler, spill_dir=str(tmp_path)).run("sampledb", "missing")
+
+
+def test_cli(monkeypatch, capsys, tmp_path):
+    monkeypatch.chdir(EXAMPLE)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    main(
+        [
+            "sample_data_source:SampleDataSource",
+            "--database",
+            "sampledb",
+            "--table",
+            "demo",
+            "--spill-dir",
+            str(tmp_path),
+            "--json",
+        ]
+    )
+    output = capsys.readouterr().out
+    report = json.loads(output[output.index("{") :])
+    assert report["rows"] == 16_004
+    assert report["splits"] == 2
@@ -0,0 +1,154 @@
+import base64
+
+import pyarrow as pa
+import pytest
+
+from athena.federation.athena_data_source import AthenaDataSource
+from athena.federation.lambda_handler import AthenaLambdaHandler
+from athena.federation.spill import (
+    SpillUploader,
+    encrypt_block,
+    generate_encryption_key,
+    read_block,
+    serialize_block,
+)
+from athena.federation.utils import AthenaSDKUtils
+
+CODECS = [None, "lz4", "zstd"]
+
+SCHEMA = pa.schema(
+    [("id", pa.int64()), ("status", pa.string()), ("price", pa.float64())]
+)
+
+
+def make_block(rows: int = 1000) -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict(
+        {
+            "id": list(range(rows)),
+            "status": [f"status-{i % 7}" for i in range(rows)],
+            "price": [None if i % 10 == 0 else i / 4 for i in range(rows)],
+        },
+        schema=SCHEMA,
+    )
+
+
+def encryption_key(encrypted: bool):
+    if not encrypted:
+        return None
+    pytest.importorskip("cryptography")
+    return generate_encryption_key()
+
+
+@pytest.mark.parametrize("encrypted", [False, True])
+@pytest.mark.parametrize("compression", CODECS)
+def test_block_round_trip(compression, encrypted):
+    block = make_block()
+    key = encryption_key(encrypted)
+    data = serialize_block(block, compression)
+    if key is not None:
+        data = encrypt_block(data, key)
+    assert read_block(data, block.schema, key).equals(block)
+
+
+@pytest.mark.parametrize("compression", CODECS)
+def test_unencrypted_blocks_decode_like_inline_records(compression):
+    block = make_block()
+    data = serialize_block(block, compression)
+    decoded = AthenaSDKUtils.decode_pyarrow_records(
+        AthenaSDKUtils.encode_schema(block.schema),
+        base64.b64encode(bytes(data)).decode("utf-8"),
+    )
+    assert decoded.equals(block)
+
+
+def test_compression_makes_blocks_smaller():
+    block = make_block(10_000)
+    raw = serialize_block(block).size
+    for compression in ["lz4", "zstd"]:
+        assert serialize_block(block, compression).size < raw
+
+
+def test_blocks_need_the_right_key():
+    pytest.importorskip("cryptography")
+    from cryptography.exceptions import InvalidTag
+
+    block = make_block()
+    data = encrypt_block(serialize_block(block), generate_encryption_key())
+    with pytest.raises(InvalidTag):
+        read_block(data, block.schema, generate_encryption_key())
+
+
+@pytest.mark.parametrize("encrypted", [False, True])
+@pytest.mark.parametrize("compression", CODECS)
+def test_uploaded_blocks_round_trip(spill_client, compression, encrypted):
+    block = make_block()
+    key = encryption_key(encrypted)
+    uploader = SpillUploader(spill_client, compression=compression, encryption_key=key)
+    uploader.submit("bucket", "query/spill.0", block)
+    uploader.wait()
+    with open(spill_client.path("bucket", "query/spill.0"), "rb") as f:
+        assert read_block(f.read(), block.schema, key).equals(block)
+
+
+class BlocksSource(AthenaDataSource):
+    """Enough rows to spill several blocks."""
+
+    def databases(self):
+        return ["db"]
+
+    def tables(self, database_name):
+        return ["t"]
+
+    def schema(self, database_name, table_name):
+        return SCHEMA
+
+    def records(self, database_name, table_name, split):
+        for _ in range(20):
+            yield make_block(5000)
+
+
+@pytest.mark.parametrize("encrypted", [False, True])
+@pytest.mark.parametrize("compression", CODECS)
+def test_spilled_read_records_round_trip(spill_client, compression, encrypted):
+    if encrypted:
+        pytest.importorskip("cryptography")
+    handler = AthenaLambdaHandler(
+        BlocksSource(),
+        "bucket",
+        spill_client=spill_client,
+        max_inline_response_bytes=64 * 1024,
+        spill_block_bytes=256 * 1024,
+        spill_compression=compression,
+        encrypt_spills=encrypted,
+        memory_budget_bytes=None,
+    )
+    table = {"schemaName": "db", "tableName": "t"}
+    splits = handler.process_event(
+        {
+            "@type": "GetSplitsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": table,
+        }
+    )["splits"]
+    response = handler.process_event(
+        {
+            "@type": "ReadRecordsRequest",
+            "catalogName": "c",
+            "queryId": "q",
+            "tableName": table,
+            "schema": {"schema": AthenaSDKUtils.encode_schema(SCHEMA)},
+            "split": splits[0],
+            "constraints": {"summary": {}},
+        }
+    )
+    assert response["@type"] == "RemoteReadRecordsResponse"
+    assert (response["encryptionKey"] is not None) == encrypted
+    assert len(response["remoteBlocks"]) > 1
+
+    batches = []
+    for location in response["remoteBlocks"]:
+        with open(spill_client.path(location["bucket"], location["key"]), "rb") as f:
+            batches.append(read_block(f.read(), SCHEMA, response["encryptionKey"]))
+    expected = pa.Table.from_batches([make_block(5000)] * 20)
+    assert pa.Table.from_batches(batches).equals(expected)
@@ -0,0 +1,18 @@
+import pyarrow as pa
+
+from athena.federation.utils import AthenaSDKUtils
+
+
+def test_to_record_batch():
+    batch = pa.RecordBatch.from_pydict({"id": [1, 2, 3]})
+    assert AthenaSDKUtils.to_record_batch(batch) is batch
+    table = pa.Table.from_batches([batch.slice(0, 1), batch.slice(1)])
+    assert AthenaSDKUtils.to_record_batch(table).equals(batch)
+    assert AthenaSDKUtils.to_record_batch({"id": [1, 2, 3]}).equals(batch)
+
+
+def test_to_record_batch_of_an_empty_table():
+    schema = pa.schema([("day", pa.string())])
+    batch = AthenaSDKUtils.to_record_batch(schema.empty_table())
+    assert batch.schema == schema
+    assert batch.num_rows == 0